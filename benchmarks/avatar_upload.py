@@ -0,0 +1,113 @@
+"""
+Compare raw avatar uploads run inline in the handler with the avatar pipeline.
+
+The pipeline resizes the image in the image pool and uploads it in the upload
+pool, skipping avatars it has uploaded before. Uploads go to a local Cloudinary
+stand-in that takes `--delay-ms` per upload. Every user uploads a distinct
+photo-sized image, and the pipeline runs twice to show the deduplicated case.
+Besides throughput and bytes sent, the largest event loop stall seen by a 10 ms
+ticker is reported: inline uploads freeze the loop for the whole upload.
+
+    python -m benchmarks.avatar_upload --uploads 32 --pool-size 4 --delay-ms 100
+"""
+import argparse
+import asyncio
+import io
+import time
+
+import cloudinary.uploader
+from PIL import Image
+
+from benchmarks.cloudinary_stub import CloudinaryStub
+from src.services.cache import TwoTierCache
+from src.services.images import image_pool
+from src.services.pools import BoundedPool
+from src.services.storage import CloudinaryStorage
+from src.services.upload_file import UploadFileService
+from src.services.upload_stream import SpooledUpload
+
+
+async def _max_loop_stall(stop: asyncio.Event) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - started - 0.01)
+    return worst
+
+
+def photo(index: int, width: int, height: int) -> bytes:
+    image = Image.effect_noise((width, height), 32).convert("RGB")
+    image.putpixel((0, 0), (index % 256, index // 256 % 256, 0))
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+async def measure(name: str, upload, photos: list, stub: CloudinaryStub) -> None:
+    stop = asyncio.Event()
+    stall = asyncio.create_task(_max_loop_stall(stop))
+    sent_before = stub.uploaded_bytes
+    started = time.perf_counter()
+    await asyncio.gather(*(upload(data, f"user{i}") for i, data in enumerate(photos)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    sent = (stub.uploaded_bytes - sent_before) / 1_000_000
+    print(
+        f"{name:>9} {len(photos) / elapsed:>10.1f} {elapsed:>9.2f} {sent:>8.2f}"
+        f" {await stall * 1000:>14.1f}"
+    )
+
+
+async def main(uploads: int, pool_size: int, delay: float, width: int, height: int) -> None:
+    photos = [photo(i, width, height) for i in range(uploads)]
+    stub = CloudinaryStub(delay=delay).start()
+    storage = CloudinaryStorage(
+        "bench",
+        "123",
+        "secret",
+        upload_prefix=stub.url,
+        pool=BoundedPool("upload", "thread", pool_size, uploads),
+    )
+    service = UploadFileService(
+        storage,
+        cache=TwoTierCache("bench_avatar_url", ttl=60, local_ttl=60, max_size=2 * uploads),
+    )
+
+    async def inline(data, username):
+        # The original handler: upload the raw file from the event loop.
+        public_id = f"RestApp/{username}"
+        cloudinary.uploader.upload(io.BytesIO(data), public_id=public_id, overwrite=True)
+
+    async def pipeline(data, username):
+        upload = SpooledUpload(len(data))
+        await upload.write(data)
+        await upload.finish()
+        return await service.upload_spooled_async(upload)
+
+    print(
+        f"uploads={uploads} pool_size={pool_size} delay_ms={delay * 1000:.0f}"
+        f" photo={width}x{height} ({sum(map(len, photos)) / len(photos) / 1_000_000:.2f} MB)"
+    )
+    print(f"{'mode':>9} {'uploads/s':>10} {'total s':>9} {'sent MB':>8} {'max stall ms':>14}")
+    try:
+        await measure("inline", inline, photos, stub)
+        await measure("pipeline", pipeline, photos, stub)
+        await measure("repeated", pipeline, photos, stub)
+    finally:
+        storage.pool.shutdown()
+        image_pool.shutdown()
+        stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--uploads", type=int, default=32)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--delay-ms", type=float, default=100)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    args = parser.parse_args()
+    asyncio.run(
+        main(args.uploads, args.pool_size, args.delay_ms / 1000, args.width, args.height)
+    )
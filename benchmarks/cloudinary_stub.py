@@ -0,0 +1,78 @@
+"""
+A local HTTP stand-in for the Cloudinary upload API.
+
+Point `CLOUDINARY_UPLOAD_PREFIX` (or `UploadFileService(upload_prefix=...)`) at
+`stub.url` to upload against it.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class CloudinaryStub:
+    """
+    Threaded HTTP server answering every POST like a successful Cloudinary upload.
+
+    Attributes:
+        delay (float): Seconds each upload takes.
+        uploads (int): Number of uploads received.
+        uploaded_bytes (int): Total size of the received request bodies.
+        max_concurrency (int): Highest number of uploads served at once.
+        connections (int): Number of TCP connections accepted.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.uploads = 0
+        self.uploaded_bytes = 0
+        self.max_concurrency = 0
+        self.connections = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub._lock:
+                    stub._active += 1
+                    stub.max_concurrency = max(stub.max_concurrency, stub._active)
+                time.sleep(stub.delay)
+                with stub._lock:
+                    stub._active -= 1
+                    stub.uploads += 1
+                    stub.uploaded_bytes += len(body)
+                response = json.dumps({"version": int(time.time()), "bytes": len(body)}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "CloudinaryStub":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,100 @@
+"""
+Compare contact creation one request at a time with the bulk creation.
+
+The single path is what `POST /api/contacts` does per contact: look up the email
+and phone number, insert, commit and refresh. The bulk path is
+`ContactService.create_contacts_bulk`, which validates the whole list, checks a
+chunk of contacts with one query and inserts it with multi-row INSERT ... RETURNING.
+
+The database is an in-memory SQLite, where a round trip costs next to nothing.
+`--latency-ms` adds a delay to every statement and commit to stand in for the
+network round trip to a database server.
+
+    python -m benchmarks.contacts_bulk --contacts 10000 --latency-ms 0.5
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import event
+
+from benchmarks.statements import StatementCounter, create_sqlite_database
+from src.db.models import Contact, User
+from src.repositories.contacts import ContactRepository
+from src.schemas import ContactModel
+from src.services.contacts import ContactService
+
+
+def items(count: int) -> list:
+    return [
+        {
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "email": f"contact{i}@example.com",
+            "phone_number": f"+38050{i:07}",
+            "birthday_date": "1990-05-17",
+            "info": "imported",
+        }
+        for i in range(count)
+    ]
+
+
+async def single(session_maker, payload: list) -> None:
+    for item in payload:
+        async with session_maker() as session:
+            body = ContactModel.model_validate(item)
+            if await ContactRepository(session).does_contact_exist(body.email, body.phone_number):
+                raise ValueError("contact exists")
+            contact = Contact(**body.model_dump(), user_id=1)
+            session.add(contact)
+            await session.commit()
+            await session.refresh(contact)
+
+
+async def bulk(session_maker, payload: list) -> None:
+    async with session_maker() as session:
+        result = await ContactService(session).create_contacts_bulk(payload, user_id=1)
+        assert result.created == len(payload)
+
+
+def add_latency(engine, latency: float) -> None:
+    def wait(*args):
+        time.sleep(latency)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", wait)
+    event.listen(engine.sync_engine, "commit", wait)
+
+
+async def measure(name: str, create, count: int, latency: float) -> float:
+    engine, session_maker = await create_sqlite_database()
+    async with session_maker() as session:
+        session.add(User(id=1, username="bench", email="bench@example.com", hashed_password="x"))
+        await session.commit()
+    counter = StatementCounter(engine)
+    add_latency(engine, latency)
+    payload = items(count)
+    started = time.perf_counter()
+    await create(session_maker, payload)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{name:>7} {counter.statements:>11} {counter.commits:>8}"
+        f" {count / elapsed:>12.0f} {elapsed:>8.2f}"
+    )
+    await engine.dispose()
+    return count / elapsed
+
+
+async def main(contacts: int, latency: float) -> None:
+    print(f"contacts={contacts} latency_ms={latency * 1000:g}")
+    print(f"{'path':>7} {'statements':>11} {'commits':>8} {'contacts/s':>12} {'total s':>8}")
+    single_rate = await measure("single", single, contacts, latency)
+    bulk_rate = await measure("bulk", bulk, contacts, latency)
+    print(f"speedup: {bulk_rate / single_rate:.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--contacts", type=int, default=10000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+    asyncio.run(main(args.contacts, args.latency_ms / 1000))
@@ -0,0 +1,91 @@
+"""
+Compare the cost of the `X-Total-Count` strategies of the contacts list.
+
+Contacts are inserted into an SQLite database with the application schema, then
+the first page of a filtered and of an unfiltered listing is read alone, with a
+separate uncapped COUNT(*), with an uncapped `count(*) OVER ()` column, with the
+capped count of `count=exact` and with the estimate of `count=estimated`. PostgreSQL estimates (`reltuples`, planner rows)
+are not covered here.
+
+    python -m benchmarks.contacts_count --rows 1000000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import func, select
+
+from benchmarks.contacts_pagination import seed, timed
+from benchmarks.statements import create_sqlite_database
+from src.db.models import Contact
+from src.repositories.contacts import ContactRepository
+
+LISTINGS = [("all", ""), ("last_name", "Last99")]
+
+
+async def main(rows: int, limit: int, cap: int, repeat: int) -> None:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine, session_factory = await create_sqlite_database(f"sqlite+aiosqlite:///{path}")
+    try:
+        started = time.perf_counter()
+        await seed(session_factory, rows)
+        print(f"rows={rows} limit={limit} cap={cap} (seeded in {time.perf_counter() - started:.1f} s)")
+        print(
+            f"{'filter':>10} {'page ms':>8} {'+COUNT ms':>10} {'window ms':>10} {'exact ms':>9}"
+            f" {'total':>8} {'estimate ms':>12} {'estimate':>9}"
+        )
+        async with session_factory() as session:
+            repository = ContactRepository(session)
+            for name, term in LISTINGS:
+                filters = {"first_name": "", "last_name": "", "email": ""}
+                if term:
+                    filters[name] = term
+
+                async def page_and_count():
+                    await repository.get_contacts(**filters, skip=0, limit=limit)
+                    count = select(func.count()).select_from(Contact)
+                    return await session.scalar(count.where(*repository._search_filters(**filters)))
+
+                page_time, _ = await timed(
+                    lambda: repository.get_contacts(**filters, skip=0, limit=limit), repeat
+                )
+                count_time, _ = await timed(page_and_count, repeat)
+
+                async def page_with_window():
+                    query = repository._page_query(
+                        repository._search_filters(**filters), 0, limit, "created_at", None
+                    )
+                    return (await session.execute(query.add_columns(func.count().over()))).all()
+
+                window_time, _ = await timed(page_with_window, repeat)
+                exact_time, (_, total) = await timed(
+                    lambda: repository.get_contacts_with_total(
+                        **filters, skip=0, limit=limit, count_cap=cap
+                    ),
+                    repeat,
+                )
+                estimate_time, (estimate, _) = await timed(
+                    lambda: repository.estimate_contacts(**filters), repeat
+                )
+                total = f">{cap}" if total > cap else str(total)
+                print(
+                    f"{name:>10} {page_time * 1000:>8.1f} {count_time * 1000:>10.1f}"
+                    f" {window_time * 1000:>10.1f} {exact_time * 1000:>9.1f} {total:>8} {estimate_time * 1000:>12.1f}"
+                    f" {estimate:>9}"
+                )
+    finally:
+        await engine.dispose()
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--cap", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.limit, args.cap, args.repeat))
@@ -0,0 +1,72 @@
+"""
+Compare the memory of exporting contacts as one list with the streaming export.
+
+Contacts are inserted into an SQLite database with the application schema, then
+exported twice: once the way a client can page through `GET /api/contacts`, by
+loading every row as an ORM object and serializing the list of response models,
+and once through `export_contacts`, which serializes Core rows from a server-side
+cursor batch by batch. The peak of traced Python allocations is reported for both.
+
+    python -m benchmarks.contacts_export --rows 1000000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.contacts_pagination import seed
+from benchmarks.statements import create_sqlite_database
+from src.repositories.contacts import ContactRepository
+from src.schemas import ContactResponse
+from src.services.contact_export import export_contacts
+
+
+async def as_list(session_factory, rows: int) -> int:
+    async with session_factory() as session:
+        contacts = await ContactRepository(session).get_contacts("", "", "", skip=0, limit=rows)
+        body = "".join(
+            ContactResponse.model_validate(contact).model_dump_json() + "\n" for contact in contacts
+        )
+    return len(body)
+
+
+async def streamed(session_factory, rows: int, fmt: str) -> int:
+    size = 0
+    async for piece in export_contacts(session_factory, fmt):
+        size += len(piece)
+    return size
+
+
+async def measure(name: str, export) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = await export()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:>14} {size / 2**20:>9.1f} {peak / 2**20:>9.1f} {elapsed:>8.2f}")
+
+
+async def main(rows: int) -> None:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine, session_factory = await create_sqlite_database(f"sqlite+aiosqlite:///{path}")
+    try:
+        await seed(session_factory, rows)
+        print(f"rows={rows}")
+        print(f"{'export':>14} {'out MB':>9} {'peak MB':>9} {'total s':>8}")
+        await measure("list", lambda: as_list(session_factory, rows))
+        await measure("stream ndjson", lambda: streamed(session_factory, rows, "ndjson"))
+        await measure("stream csv", lambda: streamed(session_factory, rows, "csv"))
+    finally:
+        await engine.dispose()
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows))
@@ -0,0 +1,100 @@
+"""
+Compare the latency of deep contact pages fetched by offset and by keyset cursor.
+
+Contacts are inserted into an SQLite database with the application schema, then
+one page is read at several depths, once with `skip` and once starting behind
+the last row of the previous page. Offset pages scan and discard every row
+before them; keyset pages seek the `(created_at, id)` index.
+
+    python -m benchmarks.contacts_pagination --rows 1000000 --limit 100
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert
+
+from benchmarks.statements import create_sqlite_database
+from src.db.models import Contact, User
+from src.repositories.contacts import ContactRepository
+
+BATCH = 20000
+
+
+async def seed(session_factory, rows: int) -> None:
+    started = datetime(2020, 1, 1)
+    async with session_factory() as session:
+        await session.execute(
+            insert(User).values(id=1, username="bench", email="bench@example.com", hashed_password="x")
+        )
+        for offset in range(0, rows, BATCH):
+            await session.execute(
+                insert(Contact),
+                [
+                    {
+                        "first_name": f"First{i}",
+                        "last_name": f"Last{i % 1000}",
+                        "email": f"contact{i}@example.com",
+                        "phone_number": f"{i:012}",
+                        "birthday_date": date(1990, 1, 1),
+                        "created_at": started + timedelta(seconds=i // 10),
+                        "user_id": 1,
+                    }
+                    for i in range(offset, min(rows, offset + BATCH))
+                ],
+            )
+        await session.commit()
+
+
+async def timed(coro, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await coro()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+async def main(rows: int, limit: int, repeat: int) -> None:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine, session_factory = await create_sqlite_database(f"sqlite+aiosqlite:///{path}")
+    try:
+        started = time.perf_counter()
+        await seed(session_factory, rows)
+        print(f"rows={rows} limit={limit} (seeded in {time.perf_counter() - started:.1f} s)")
+        print(f"{'depth':>10} {'offset ms':>10} {'keyset ms':>10}")
+        async with session_factory() as session:
+            repository = ContactRepository(session)
+            depth = limit
+            while depth < rows:
+                offset_time, _ = await timed(
+                    lambda: repository.get_contacts("", "", "", skip=depth, limit=limit), repeat
+                )
+                previous = (
+                    await repository.get_contacts("", "", "", skip=depth - 1, limit=1)
+                )[0]
+                keyset_time, page = await timed(
+                    lambda: repository.get_contacts(
+                        "", "", "", skip=0, limit=limit, after=(previous.created_at, previous.id)
+                    ),
+                    repeat,
+                )
+                assert page[0].id == previous.id + 1
+                print(f"{depth:>10} {offset_time * 1000:>10.2f} {keyset_time * 1000:>10.2f}")
+                depth *= 10
+    finally:
+        await engine.dispose()
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.limit, args.repeat))
@@ -0,0 +1,85 @@
+"""
+Compare contact substring search with a plain LIKE and with the FTS5 trigram index.
+
+Contacts are inserted into an SQLite database with the application schema, whose
+triggers keep the `contacts_fts` index in sync, then each search term is run as
+the original `LIKE '%term%'` on the `contacts` table and through the repository,
+which searches the index. The ranked `q=` search over the `contacts_search` index
+is timed as well. PostgreSQL with `pg_trgm` and `tsvector` is not covered here.
+
+    python -m benchmarks.contacts_search --rows 1000000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import select
+
+from benchmarks.contacts_pagination import seed, timed
+from benchmarks.statements import create_sqlite_database
+from src.db.models import Contact
+from src.repositories.contacts import ContactRepository
+
+SEARCHES = [
+    ("first_name", "First123456"),
+    ("last_name", "Last999"),
+    ("email", "ct77777@"),
+    ("email", "no-such-contact"),
+]
+
+RANKED_SEARCHES = ["first123456", "last999", "contact77777", "last9 first9"]
+
+
+async def main(rows: int, limit: int, repeat: int) -> None:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine, session_factory = await create_sqlite_database(f"sqlite+aiosqlite:///{path}")
+    try:
+        started = time.perf_counter()
+        await seed(session_factory, rows)
+        print(f"rows={rows} limit={limit} (seeded in {time.perf_counter() - started:.1f} s)")
+        print(f"{'column':>10} {'term':>16} {'found':>6} {'LIKE ms':>9} {'FTS5 ms':>9}")
+        async with session_factory() as session:
+            repository = ContactRepository(session)
+            for name, term in SEARCHES:
+                filters = {"first_name": "", "last_name": "", "email": "", name: term}
+
+                async def like():
+                    query = (
+                        select(Contact)
+                        .where(getattr(Contact, name).contains(term))
+                        .order_by(Contact.created_at, Contact.id)
+                        .limit(limit)
+                    )
+                    return list((await session.execute(query)).scalars())
+
+                like_time, expected = await timed(like, repeat)
+                fts_time, found = await timed(
+                    lambda: repository.get_contacts(**filters, skip=0, limit=limit), repeat
+                )
+                assert [c.id for c in found] == [c.id for c in expected]
+                print(
+                    f"{name:>10} {term:>16} {len(found):>6}"
+                    f" {like_time * 1000:>9.1f} {fts_time * 1000:>9.1f}"
+                )
+
+            print(f"{'ranked q':>27} {'found':>6} {'ms':>9}")
+            for q in RANKED_SEARCHES:
+                elapsed, found = await timed(
+                    lambda: repository.search_contacts(q, skip=0, limit=limit), repeat
+                )
+                print(f"{q:>27} {len(found):>6} {elapsed * 1000:>9.1f}")
+    finally:
+        await engine.dispose()
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.limit, args.repeat))
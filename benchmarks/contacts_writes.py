@@ -0,0 +1,128 @@
+"""
+Compare database round trips and latency of the old and the new contact write paths.
+
+The old paths loaded the contact (or checked for a duplicate by loading whole rows)
+before writing it, then committed and refreshed the row. The new paths are a
+single INSERT, UPDATE or DELETE ... RETURNING followed by the commit, and the
+duplicate check is an EXISTS query.
+
+    python -m benchmarks.contacts_writes --contacts 500
+"""
+import argparse
+import asyncio
+import time
+from datetime import date
+
+from sqlalchemy import or_, select
+
+from benchmarks.statements import StatementCounter, create_sqlite_database
+from src.db.models import Contact, User
+from src.repositories.contacts import ContactRepository
+from src.schemas import ContactModel
+from src.services.contacts import ContactService
+
+
+def body(i: int, first_name: str = "First") -> ContactModel:
+    return ContactModel(
+        first_name=f"{first_name}{i}",
+        last_name=f"Last{i}",
+        email=f"contact{i}@example.com",
+        phone_number=f"+38050{i:07}",
+        birthday_date=date(1990, 5, 17),
+    )
+
+
+async def legacy_create(session, i: int) -> None:
+    data = body(i)
+    query = select(Contact).where(
+        or_(Contact.email == data.email, Contact.phone_number == data.phone_number)
+    )
+    if (await session.execute(query)).scalars().first() is not None:
+        raise ValueError("contact exists")
+    contact = Contact(**data.model_dump(exclude_unset=True), user_id=1)
+    session.add(contact)
+    await session.commit()
+    await session.refresh(contact)
+
+
+async def legacy_update(session, i: int) -> None:
+    contact = await session.get(Contact, i + 1)
+    for field, value in body(i, "Renamed").model_dump(exclude_unset=True).items():
+        setattr(contact, field, value)
+    await session.commit()
+    await session.refresh(contact)
+
+
+async def legacy_delete(session, i: int) -> None:
+    contact = await session.get(Contact, i + 1)
+    await session.delete(contact)
+    await session.commit()
+
+
+async def legacy_exists(session, i: int) -> None:
+    query = select(Contact).where(
+        or_(Contact.email == f"contact{i}@example.com", Contact.phone_number == "none")
+    )
+    assert (await session.execute(query)).scalars().first() is not None
+
+
+async def current_create(session, i: int) -> None:
+    await ContactService(session).create_contact(body(i), user_id=1)
+
+
+async def current_update(session, i: int) -> None:
+    await ContactService(session).modify_contact(i + 1, body(i, "Renamed"))
+
+
+async def current_delete(session, i: int) -> None:
+    await ContactService(session).delete_contact(i + 1)
+
+
+async def current_exists(session, i: int) -> None:
+    repository = ContactRepository(session)
+    assert await repository.does_contact_exist(f"contact{i}@example.com", "none")
+
+
+PATHS = {
+    "legacy": [legacy_create, legacy_exists, legacy_update, legacy_delete],
+    "current": [current_create, current_exists, current_update, current_delete],
+}
+
+
+async def measure(name: str, contacts: int) -> None:
+    engine, session_maker = await create_sqlite_database()
+    async with session_maker() as session:
+        session.add(User(id=1, username="bench", email="bench@example.com", hashed_password="x"))
+        await session.commit()
+    counter = StatementCounter(engine)
+    for write in PATHS[name]:
+        counter.reset()
+        started = time.perf_counter()
+        for i in range(contacts):
+            async with session_maker() as session:
+                await write(session, i)
+        elapsed = time.perf_counter() - started
+        operation = write.__name__.split("_")[1]
+        print(
+            f"{name:>8} {operation:>7} {counter.statements / contacts:>11.1f}"
+            f" {counter.commits / contacts:>8.1f} {counter.round_trips / contacts:>12.1f}"
+            f" {elapsed / contacts * 1000:>8.3f}"
+        )
+    await engine.dispose()
+
+
+async def main(contacts: int) -> None:
+    print(f"contacts={contacts}")
+    print(
+        f"{'path':>8} {'write':>7} {'statements':>11} {'commits':>8}"
+        f" {'round trips':>12} {'ms/op':>8}"
+    )
+    for name in PATHS:
+        await measure(name, contacts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--contacts", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.contacts))
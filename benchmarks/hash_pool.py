@@ -0,0 +1,67 @@
+"""
+Benchmark concurrent login throughput against the size of the hashing pool.
+
+Every login costs one bcrypt verification, so the benchmark fires `--logins`
+concurrent verifications through a `BoundedPool` of each size and reports the
+achieved logins per second together with the worst event loop stall observed
+meanwhile. Run it from the project root:
+
+    python -m benchmarks.hash_pool --sizes 1 2 4 8 --logins 64
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from src.services import hashing
+from src.services.pools import BoundedPool
+
+
+async def _watch_loop(stop: asyncio.Event, interval: float = 0.005) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def _run(kind: str, size: int, logins: int, hashed: str) -> tuple[float, float]:
+    pool = BoundedPool("bench", kind=kind, size=size, max_queue=logins)
+    await pool.run(hashing.verify_password, "password", hashed)
+
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(_watch_loop(stop))
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(pool.run(hashing.verify_password, "password", hashed) for _ in range(logins))
+    )
+    elapsed = time.perf_counter() - started
+    stop.set()
+    stall = await watcher
+    pool.shutdown()
+    return logins / elapsed, stall
+
+
+async def main(kind: str, sizes: list[int], logins: int) -> None:
+    hashed = hashing.hash_password("password")
+    started = time.perf_counter()
+    for _ in range(logins):
+        hashing.verify_password("password", hashed)
+    inline = logins / (time.perf_counter() - started)
+
+    print(f"cpus={os.cpu_count()} kind={kind} logins={logins}")
+    print(f"{'pool size':>10} {'logins/s':>10} {'speedup':>8} {'max loop stall ms':>18}")
+    print(f"{'inline':>10} {inline:>10.1f} {1.0:>8.2f} {'(blocked)':>18}")
+    for size in sizes:
+        rate, stall = await _run(kind, size, logins, hashed)
+        print(f"{size:>10} {rate:>10.1f} {rate / inline:>8.2f} {stall * 1000:>18.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--kind", choices=["thread", "process"], default="thread")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--logins", type=int, default=64)
+    args = parser.parse_args()
+    asyncio.run(main(args.kind, args.sizes, args.logins))
@@ -0,0 +1,118 @@
+"""
+Compare email throughput of a FastMail connection per message and the pooled transport.
+
+Both send the confirmation template to a local aiosmtpd server, which stands in
+for the real SMTP relay. The server can add a delay to every new connection to
+mimic the TLS handshake and login of a remote relay.
+
+    python -m benchmarks.mail --messages 200 --connect-delay-ms 50
+"""
+import argparse
+import asyncio
+import socket
+import time
+from pathlib import Path
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.handlers import Sink
+from fastapi_mail import ConnectionConfig, FastMail, MessageSchema, MessageType
+
+from src.services.mail_transport import SMTPTransport
+
+TEMPLATE_FOLDER = Path(__file__).parent.parent / "src" / "mail-templates"
+CONTEXT = {"host": "http://localhost:8000/", "username": "agent007", "token": "token"}
+
+
+class SlowHandshakeSink(Sink):
+    def __init__(self, connect_delay: float):
+        self.connect_delay = connect_delay
+        self.connections = 0
+        self.messages = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.connections += 1
+        await asyncio.sleep(self.connect_delay)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return "250 OK"
+
+
+def _settings(port: int) -> ConnectionConfig:
+    return ConnectionConfig(
+        MAIL_USERNAME="bench@example.com",
+        MAIL_PASSWORD="bench",
+        MAIL_FROM="bench@example.com",
+        MAIL_PORT=port,
+        MAIL_SERVER="127.0.0.1",
+        MAIL_STARTTLS=False,
+        MAIL_SSL_TLS=False,
+        USE_CREDENTIALS=False,
+        VALIDATE_CERTS=False,
+        TEMPLATE_FOLDER=TEMPLATE_FOLDER,
+    )
+
+
+async def send_with_fastmail(settings: ConnectionConfig, index: int) -> None:
+    message = MessageSchema(
+        subject="Confirm your email",
+        recipients=[f"user{index}@example.com"],
+        template_body=CONTEXT,
+        subtype=MessageType.html,
+    )
+    await FastMail(settings).send_message(message, template_name="email-confirmation.html")
+
+
+async def run(name, handler, send, messages: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            await send(index)
+
+    handler.connections = handler.messages = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(messages)))
+    elapsed = time.perf_counter() - started
+    print(
+        f"{name:>9} {messages / elapsed:>10.1f} {handler.connections:>12}"
+        f" {elapsed / messages * 1000:>9.2f}"
+    )
+
+
+async def main(messages: int, concurrency: int, pool_size: int, connect_delay: float) -> None:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    handler = SlowHandshakeSink(connect_delay)
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    settings = _settings(port)
+    transport = SMTPTransport(settings, pool_size=pool_size)
+
+    async def send_pooled(index: int) -> None:
+        html = transport.render("email-confirmation.html", CONTEXT)
+        await transport.send(
+            transport.build_message("Confirm your email", [f"user{index}@example.com"], html)
+        )
+
+    print(f"messages={messages} concurrency={concurrency} pool_size={pool_size}")
+    print(f"{'transport':>9} {'msg/s':>10} {'connections':>12} {'ms/msg':>9}")
+    try:
+        await run("fastmail", handler, lambda i: send_with_fastmail(settings, i), messages, concurrency)
+        await run("pooled", handler, send_pooled, messages, concurrency)
+    finally:
+        await transport.close()
+        controller.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--connect-delay-ms", type=float, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.concurrency, args.pool_size, args.connect_delay_ms / 1000))
@@ -0,0 +1,78 @@
+"""
+Compare database round trips and latency of the old and the new registration path.
+
+The old path looked the user up by email, then by username, then inserted,
+committed and refreshed the row. The new path is the one of `POST /api/auth/register`:
+one query checks the email and the username together (before the password would be
+hashed), then the confirmation email is staged in the outbox and the user is written
+with INSERT ... RETURNING, both in the transaction of the commit. Password hashing is
+left out since both paths pay it; the old path sent its email outside the database.
+
+    python -m benchmarks.registration --users 500
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.statements import StatementCounter, create_sqlite_database
+from src.db.models import User
+from src.repositories.users import UserRepository
+from src.schemas import UserCreate
+from src.services.outbox import OutboxService
+from src.services.users import UserService
+
+
+async def legacy_register(session, body: UserCreate) -> User:
+    repository = UserRepository(session)
+    if await repository.get_user_by_email(body.email):
+        raise ValueError("email taken")
+    if await repository.get_user_by_username(body.username):
+        raise ValueError("username taken")
+    user = User(
+        username=body.username, email=body.email, hashed_password=body.password
+    )
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+
+async def current_register(session, body: UserCreate) -> User:
+    user_service = UserService(session)
+    await user_service.ensure_available(body.email, body.username)
+    await OutboxService(session).email_confirmation(
+        body.email, body.username, "http://bench/", coalesce=False
+    )
+    return await user_service.create_user(body)
+
+
+async def measure(name, register, users: int) -> None:
+    engine, session_maker = await create_sqlite_database()
+    counter = StatementCounter(engine)
+    started = time.perf_counter()
+    for i in range(users):
+        body = UserCreate(
+            username=f"user{i}", email=f"user{i}@example.com", password="hash"
+        )
+        async with session_maker() as session:
+            await register(session, body)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{name:>8} {counter.statements / users:>11.1f} {counter.commits / users:>8.1f}"
+        f" {counter.round_trips / users:>12.1f} {elapsed / users * 1000:>8.3f}"
+    )
+    await engine.dispose()
+
+
+async def main(users: int) -> None:
+    print(f"users={users}")
+    print(f"{'path':>8} {'statements':>11} {'commits':>8} {'round trips':>12} {'ms/user':>8}")
+    await measure("legacy", legacy_register, users)
+    await measure("current", current_register, users)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.users))
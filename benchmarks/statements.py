@@ -0,0 +1,54 @@
+"""
+Helpers shared by the benchmarks that count database round trips.
+"""
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.db.models import Base
+
+
+class StatementCounter:
+    """
+    Count statements and commits sent through an engine.
+
+    Every executed statement and every COMMIT is one round trip to the database.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine.sync_engine, "commit", self._on_commit)
+
+    def _on_execute(self, *args):
+        self.statements += 1
+
+    def _on_commit(self, *args):
+        self.commits += 1
+
+    @property
+    def round_trips(self) -> int:
+        return self.statements + self.commits
+
+    def reset(self) -> None:
+        self.statements = 0
+        self.commits = 0
+
+
+async def create_sqlite_database(url: str = "sqlite+aiosqlite://"):
+    """
+    Create an SQLite database with the application schema.
+
+    Returns:
+        tuple[AsyncEngine, async_sessionmaker]: The engine and a session factory
+        configured like the application's one.
+    """
+    engine = create_async_engine(
+        url, connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(
+        autoflush=False, autocommit=False, expire_on_commit=False, bind=engine
+    )
@@ -1,14 +1,41 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.responses import JSONResponse
-from slowapi.errors import RateLimitExceeded
-from src.api import utils, contacts, auth, users
+from src.api import utils, contacts, auth, users, avatars
+from src.conf.config import config
+from src.services.email import mail_transport
+from src.services.hashing import hash_pool
+from src.services.images import image_pool
+from src.services.pools import PoolSaturatedError
+from src.services.rate_limit import RateLimitExceeded, limiter
+from src.services.revocation import revocation_list
+from src.services.storage import upload_pool
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start and stop the worker-level resources of the application.
+    """
+    revocation_refresher = asyncio.create_task(
+        revocation_list.run_refresher(config.REVOCATION_FILTER_REFRESH_SECONDS)
+    )
+    yield
+    revocation_refresher.cancel()
+    hash_pool.shutdown()
+    upload_pool.shutdown()
+    image_pool.shutdown()
+    await limiter.close()
+    await mail_transport.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:8000",
@@ -22,21 +49,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "X-Total-Count", "X-Total-Count-Mode"],
 )
 
 
 @app.exception_handler(RateLimitExceeded)
 async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
-    logger.info(f"Rate limit exceeded for '{request.client.host}' host.")
+    logger.info(f"Rate limit '{exc.scope}' exceeded for '{request.client.host}' host.")
     return JSONResponse(
         status_code=status.HTTP_429_TOO_MANY_REQUESTS,
         content={"error": "Too many requests. Try again later plz."},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
     )
 
+
+@app.exception_handler(PoolSaturatedError)
+async def pool_saturated_handler(request: Request, exc: PoolSaturatedError):
+    logger.warning(f"Rejected request to '{request.url.path}': {exc}.")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"error": "Server is busy. Try again later plz."},
+        headers={"Retry-After": "1"},
+    )
+
+
 app.include_router(utils.router, prefix="/api")
 app.include_router(contacts.router, prefix="/api")
 app.include_router(auth.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
+app.include_router(avatars.router, prefix="/api")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,50 @@
+"""contacts search vector words
+
+Revision ID: 4c7e1a9d2f63
+Revises: 9a3f6c2d1b84
+Create Date: 2026-10-18 11:36:08.512903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7e1a9d2f63'
+down_revision: Union[str, None] = '9a3f6c2d1b84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+WEIGHTS = (('first_name', 'A'), ('last_name', 'A'), ('email', 'B'), ('phone_number', 'B'), ('info', 'C'))
+
+
+def _add_search_vector(words: str) -> None:
+    op.execute(
+        "ALTER TABLE contacts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        + " || ".join(
+            f"setweight(to_tsvector('simple', {words.format(column)}), '{weight}')"
+            for column, weight in WEIGHTS
+        )
+        + ") STORED"
+    )
+    op.execute("CREATE INDEX ix_contacts_search_vector ON contacts USING gin (search_vector)")
+
+
+def _drop_search_vector() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_contacts_search_vector')
+    op.drop_column('contacts', 'search_vector')
+
+
+def upgrade() -> None:
+    # Split emails and phone numbers into words, as the search query does.
+    if op.get_bind().dialect.name == 'postgresql':
+        _drop_search_vector()
+        _add_search_vector("regexp_replace(coalesce({}, ''), '[\\W_]+', ' ', 'g')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        _drop_search_vector()
+        _add_search_vector("coalesce({}, '')")
@@ -0,0 +1,40 @@
+"""outbox pending dedupe
+
+Revision ID: 9a3f6c2d1b84
+Revises: e8c3b7a50d12
+Create Date: 2026-10-18 10:12:41.218406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a3f6c2d1b84'
+down_revision: Union[str, None] = 'e8c3b7a50d12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Pending duplicates queued by concurrent requests: the newest one wins.
+    op.execute(
+        "UPDATE email_outbox SET status = 'failed', last_error = 'Superseded by a newer request' "
+        "WHERE status = 'pending' AND dedupe_key IS NOT NULL AND id < ("
+        "SELECT MAX(newer.id) FROM email_outbox AS newer "
+        "WHERE newer.dedupe_key = email_outbox.dedupe_key AND newer.status = 'pending')"
+    )
+    op.create_index(
+        'ux_email_outbox_pending_dedupe_key',
+        'email_outbox',
+        ['dedupe_key'],
+        unique=True,
+        postgresql_where=sa.text("status = 'pending'"),
+        sqlite_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ux_email_outbox_pending_dedupe_key', table_name='email_outbox')
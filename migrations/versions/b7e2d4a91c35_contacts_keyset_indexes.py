@@ -0,0 +1,28 @@
+"""contacts keyset indexes
+
+Revision ID: b7e2d4a91c35
+Revises: f1b9d3c07a24
+Create Date: 2026-10-17 18:42:05.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d4a91c35'
+down_revision: Union[str, None] = 'f1b9d3c07a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contacts_created_at_id', 'contacts', ['created_at', 'id'], unique=False)
+    op.create_index('ix_contacts_last_name_id', 'contacts', ['last_name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_last_name_id', table_name='contacts')
+    op.drop_index('ix_contacts_created_at_id', table_name='contacts')
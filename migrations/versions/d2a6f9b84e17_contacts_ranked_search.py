@@ -0,0 +1,68 @@
+"""contacts ranked search
+
+Revision ID: d2a6f9b84e17
+Revises: c5d8e1f3a6b9
+Create Date: 2026-10-17 20:05:31.447120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a6f9b84e17'
+down_revision: Union[str, None] = 'c5d8e1f3a6b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(
+            "ALTER TABLE contacts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(first_name, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(last_name, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(email, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(phone_number, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(info, '')), 'C')) STORED"
+        )
+        op.execute("CREATE INDEX ix_contacts_search_vector ON contacts USING gin (search_vector)")
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE contacts_search USING fts5("
+            "first_name, last_name, email, phone_number, info, content='contacts', content_rowid='id', "
+            "tokenize='unicode61', prefix='2 3')"
+        )
+        op.execute(
+            "CREATE TRIGGER contacts_search_ai AFTER INSERT ON contacts BEGIN "
+            "INSERT INTO contacts_search(rowid, first_name, last_name, email, phone_number, info) "
+            "VALUES (new.id, new.first_name, new.last_name, new.email, new.phone_number, new.info); END"
+        )
+        op.execute(
+            "CREATE TRIGGER contacts_search_ad AFTER DELETE ON contacts BEGIN "
+            "INSERT INTO contacts_search(contacts_search, rowid, first_name, last_name, email, phone_number, info) "
+            "VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.phone_number, old.info); END"
+        )
+        op.execute(
+            "CREATE TRIGGER contacts_search_au AFTER UPDATE OF first_name, last_name, email, phone_number, info "
+            "ON contacts BEGIN "
+            "INSERT INTO contacts_search(contacts_search, rowid, first_name, last_name, email, phone_number, info) "
+            "VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.phone_number, old.info); "
+            "INSERT INTO contacts_search(rowid, first_name, last_name, email, phone_number, info) "
+            "VALUES (new.id, new.first_name, new.last_name, new.email, new.phone_number, new.info); END"
+        )
+        op.execute("INSERT INTO contacts_search(contacts_search) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_contacts_search_vector')
+        op.drop_column('contacts', 'search_vector')
+    elif dialect == 'sqlite':
+        for trigger in ('contacts_search_au', 'contacts_search_ad', 'contacts_search_ai'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS contacts_search')
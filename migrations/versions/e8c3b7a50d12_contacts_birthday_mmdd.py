@@ -0,0 +1,38 @@
+"""contacts birthday mmdd
+
+Revision ID: e8c3b7a50d12
+Revises: d2a6f9b84e17
+Create Date: 2026-10-17 20:48:16.730925
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c3b7a50d12'
+down_revision: Union[str, None] = 'd2a6f9b84e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    op.add_column('contacts', sa.Column('birthday_mmdd', sa.Integer(), nullable=True))
+    if dialect == 'sqlite':
+        op.execute("UPDATE contacts SET birthday_mmdd = CAST(strftime('%m%d', birthday_date) AS INTEGER)")
+    else:
+        op.execute(
+            "UPDATE contacts SET birthday_mmdd = "
+            "EXTRACT(MONTH FROM birthday_date) * 100 + EXTRACT(DAY FROM birthday_date)"
+        )
+        # SQLite would have to rebuild the table, dropping the search triggers with it.
+        op.alter_column('contacts', 'birthday_mmdd', nullable=False)
+    op.create_index(op.f('ix_contacts_birthday_mmdd'), 'contacts', ['birthday_mmdd'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_contacts_birthday_mmdd'), table_name='contacts')
+    op.drop_column('contacts', 'birthday_mmdd')
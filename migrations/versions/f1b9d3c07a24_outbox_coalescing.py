@@ -0,0 +1,30 @@
+"""outbox coalescing
+
+Revision ID: f1b9d3c07a24
+Revises: a4c2e8f61d57
+Create Date: 2026-10-17 15:10:12.604311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b9d3c07a24'
+down_revision: Union[str, None] = 'a4c2e8f61d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('email_outbox', sa.Column('dedupe_key', sa.String(length=200), nullable=True))
+    op.add_column('email_outbox', sa.Column('suppressed', sa.Integer(), server_default='0', nullable=False))
+    op.create_index(op.f('ix_email_outbox_dedupe_key'), 'email_outbox', ['dedupe_key'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_email_outbox_dedupe_key'), table_name='email_outbox')
+    op.drop_column('email_outbox', 'suppressed')
+    op.drop_column('email_outbox', 'dedupe_key')
@@ -1,30 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
-from src.schemas import UserCreate, Token, User, RequestEmail, ResetPassword
-from src.services.email import send_email_confirmation, send_reset_password_email
-from src.services.auth import create_access_token, Hash, get_email_from_token, get_password_from_token
+from src.schemas import UserCreate, Token, User, RequestEmail, ResetPassword, RefreshTokenRequest
+from src.services.auth import (
+    create_access_token,
+    build_access_claims,
+    Hash,
+    get_email_from_token,
+    get_password_from_token,
+    oauth2_scheme,
+    revoke_access_token,
+)
+from src.services.outbox import OutboxService
+from src.services.refresh_tokens import RefreshTokenService
 from src.services.users import UserService
+from src.services.rate_limit import rate_limit
+from src.conf.config import config
 from src.db.db import get_db
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(
+    prefix="/auth",
+    tags=["auth"],
+    dependencies=[Depends(rate_limit("auth", config.RATE_LIMIT_AUTH, key="ip"))],
+)
 
 
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
 async def register_user(
     user_data: UserCreate, 
-    background_tasks: BackgroundTasks,
     request: Request, 
     db: AsyncSession = Depends(get_db)
 ):
     """
     Register a new user.
 
-    This endpoint creates a new user with the provided credentials and sends a confirmation email.
+    This endpoint creates a new user with the provided credentials and queues a confirmation
+    email in the outbox, in the same transaction as the new user.
 
     Args:
         user_data (UserCreate): Data for creating a new user.
-        background_tasks (BackgroundTasks): Background tasks manager for sending emails.
         request (Request): The current request object to construct the base URL.
         db (AsyncSession): The database session.
 
@@ -36,24 +51,14 @@ async def register_user(
     """
     user_service = UserService(db)
 
-    email_user = await user_service.get_user_by_email(user_data.email)
-    if email_user:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="You can't use this email",
-        )
-
-    username_user = await user_service.get_user_by_username(user_data.username)
-    if username_user:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="You can't use this username",
-        )
-    user_data.password = Hash().get_pwd_hash(user_data.password)
-    new_user = await user_service.create_user(user_data)
-    background_tasks.add_task(
-        send_email_confirmation, new_user.email, new_user.username, str(request.base_url)
+    # Checked first: a duplicate must not take a slot of the hashing pool.
+    await user_service.ensure_available(user_data.email, user_data.username)
+    user_data.password = await Hash().get_pwd_hash_async(user_data.password)
+    # In the transaction of create_user: committed with it, or dropped with it.
+    await OutboxService(db).email_confirmation(
+        user_data.email, user_data.username, str(request.base_url), coalesce=False
     )
+    new_user = await user_service.create_user(user_data)
 
     return new_user
 
@@ -66,21 +71,25 @@ async def login_user(
     """
     Log in a user.
 
-    This endpoint authenticates the user using their username and password and returns an access token.
+    This endpoint authenticates the user using their username and password and returns an access
+    token together with a refresh token. Password hashes created with another bcrypt cost than
+    `BCRYPT_ROUNDS` are transparently recomputed.
 
     Args:
         form_data (OAuth2PasswordRequestForm): The form containing username and password.
         db (AsyncSession): The database session.
 
     Returns:
-        Token: An access token for the authenticated user.
+        Token: An access token and a refresh token for the authenticated user.
 
     Raises:
         HTTPException: If credentials are incorrect or the email is not confirmed.
     """
     user_service = UserService(db)
     user = await user_service.get_user_by_username(form_data.username)
-    if not user or not Hash().verify_password(form_data.password, user.hashed_password):
+    if not user or not await Hash().verify_password_async(
+        form_data.password, user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Wrong credentials",
@@ -93,8 +102,77 @@ async def login_user(
             detail="Email is not confirmed",
         )
 
-    access_token = await create_access_token(data={"sub": user.username})
-    return {"access_token": access_token, "token_type": "bearer"}
+    if Hash().needs_update(user.hashed_password):
+        new_hash = await Hash().get_pwd_hash_async(form_data.password)
+        await user_service.update_password_hash(user.id, new_hash)
+
+    access_token = await create_access_token(data=build_access_claims(user))
+    refresh_token = await RefreshTokenService(db).issue(user)
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    body: RefreshTokenRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Renew an access token.
+
+    This endpoint exchanges a refresh token for a new access token and a new refresh token,
+    without verifying the password. Each refresh token can be used once; reusing one revokes
+    every token issued from the same login.
+
+    Args:
+        body (RefreshTokenRequest): The request body containing the refresh token.
+        db (AsyncSession): The database session.
+
+    Returns:
+        Token: A new access token and refresh token.
+
+    Raises:
+        HTTPException: If the refresh token is invalid, expired, revoked or reused.
+    """
+    user, refresh_token = await RefreshTokenService(db).rotate(body.refresh_token)
+    access_token = await create_access_token(data=build_access_claims(user))
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+
+@router.post("/logout")
+async def logout(
+    body: Optional[RefreshTokenRequest] = None,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Log out the current session.
+
+    This endpoint revokes the presented access token until it expires and, when a refresh
+    token is given, every refresh token issued from the same login.
+
+    Args:
+        body (Optional[RefreshTokenRequest]): The refresh token of the session (optional).
+        token (str): The access token to revoke.
+        db (AsyncSession): The database session.
+
+    Returns:
+        dict: A message confirming the logout.
+
+    Raises:
+        HTTPException: If the access token is invalid or already revoked.
+    """
+    await revoke_access_token(token, db)
+    if body is not None:
+        await RefreshTokenService(db).revoke(body.refresh_token)
+    return {"message": "Successfully logged out"}
 
 
 @router.get("/confirmed_email/{token}")
@@ -130,18 +208,16 @@ async def confirmed_email(token: str, db: AsyncSession = Depends(get_db)):
 @router.post("/request_email")
 async def request_email(
     body: RequestEmail,
-    background_tasks: BackgroundTasks,
     request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """
     Request email verification.
 
-    This endpoint sends an email verification request to the user.
+    This endpoint queues an email verification request to the user in the outbox.
 
     Args:
         body (RequestEmail): The request body containing the email address.
-        background_tasks (BackgroundTasks): Background tasks manager for sending emails.
         request (Request): The current request object to construct the base URL.
         db (AsyncSession): The database session.
 
@@ -154,15 +230,14 @@ async def request_email(
     if user and user.confirmed:
         return {"message": "Your email is already confirmed"}
     if user:
-        background_tasks.add_task(
-            send_email_confirmation, user.email, user.username, str(request.base_url)
-        )
+        outbox = OutboxService(db)
+        await outbox.email_confirmation(user.email, user.username, str(request.base_url))
+        await outbox.commit()
     return {"message": "Check your mail for verification"}
 
 @router.post("/reset_password")
 async def reset_password_request(
     body: ResetPassword,
-    background_tasks: BackgroundTasks,
     request: Request,
     db: AsyncSession = Depends(get_db),
 ):
@@ -182,20 +257,15 @@ async def reset_password_request(
             detail="Email not confirmed",
         )
 
-    hashed_password = Hash().get_password_hash(body.password)
-
-    reset_token = await create_access_token(
-        data={"sub": user.email, "password": hashed_password}
-    )
-
-    # Send email
-    background_tasks.add_task(
-        send_reset_password_email,
-        to_email=body.email,
+    # Queue email: the new password is hashed, then merged into a pending email for the user if any
+    outbox = OutboxService(db)
+    await outbox.reset_password_email(
+        email=user.email,
         username=user.username,
         host=str(request.base_url),
-        reset_token=reset_token,
+        password=body.password,
     )
+    await outbox.commit()
 
     return {"message": "Check your email"}
 
@@ -223,8 +293,9 @@ async def confirm_reset_password(token: str, db: AsyncSession = Depends(get_db))
             detail="User not found",
         )
 
-    # Update password
-    await user.reset_password(user.id, hashed_password)
+    # Update password and sign out every session
+    await user_service.reset_password(user.id, hashed_password)
+    await RefreshTokenService(db).revoke_all(user.id)
 
     return {"message": "Password successfully changed"}
 
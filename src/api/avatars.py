@@ -0,0 +1,59 @@
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+
+from src.services.storage import LocalStorage, avatar_storage
+
+router = APIRouter(prefix="/avatars", tags=["avatars"])
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _none_match(if_none_match: str, etag: str) -> bool:
+    """
+    Tell whether an `If-None-Match` header matches an entity tag.
+
+    The header is a comma-separated list of entity tags, or `*`. Tags are compared
+    with the weak comparison of RFC 9110, so `W/"tag"` matches `"tag"` too.
+
+    Args:
+        if_none_match (str): The header value.
+        etag (str): The quoted entity tag of the resource.
+
+    Returns:
+        bool: True if the client's copy is current.
+    """
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+
+@router.get("/{name}", response_class=FileResponse)
+async def get_avatar(name: str, request: Request):
+    """
+    Serve an avatar of the local avatar storage.
+
+    Avatars are content-addressed, so the digest is a strong ETag and the response may be
+    cached for a year. The file is sent with `FileResponse`, which uses zero-copy `sendfile`
+    where the server supports the ASGI `zerocopysend` extension.
+
+    Args:
+        name (str): The file name, `<sha256>.jpg`.
+        request (Request): The incoming HTTP request.
+
+    Returns:
+        FileResponse: The avatar, or an empty `304 Not Modified` response if the client's
+            copy is current.
+
+    Raises:
+        HTTPException: If avatars are not stored locally or the avatar does not exist.
+    """
+    digest = name.removesuffix(".jpg")
+    path = avatar_storage.path_for(digest) if isinstance(avatar_storage, LocalStorage) else None
+    if path is None or not name.endswith(".jpg"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
+
+    if not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
+    headers = {"ETag": f'"{digest}"', "Cache-Control": CACHE_CONTROL}
+    if _none_match(request.headers.get("if-none-match", ""), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(path, media_type="image/jpeg", headers=headers)
@@ -1,11 +1,30 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+import json
+from typing import Any, List, Literal, Optional
+from fastapi import APIRouter, Body, HTTPException, Depends, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.db.db import get_db
-from src.schemas import ContactModel, ContactResponse
+from src.conf.config import config
+from src.db.db import get_db, get_db_session_factory
+from src.schemas import (
+    ContactBulkResponse,
+    ContactModel,
+    ContactResponse,
+    ContactUpsertResponse,
+    Principal,
+)
+from src.services.auth import get_current_principal
+from src.services.contact_export import EXPORT_MEDIA_TYPES, export_contacts
+from src.services.contact_import import IMPORT_FORMATS, import_contacts
 from src.services.contacts import ContactService
+from src.services.pagination import set_next_page_headers, set_total_count_headers
+from src.services.rate_limit import rate_limit
+from src.services.upload_stream import read_body
 
-router = APIRouter(prefix="/contacts", tags=["contacts"])
+router = APIRouter(
+    prefix="/contacts",
+    tags=["contacts"],
+    dependencies=[Depends(rate_limit("contacts", config.RATE_LIMIT_CONTACTS))],
+)
 
 
 def get_contact_service(db: AsyncSession = Depends(get_db)) -> ContactService:
@@ -40,45 +59,141 @@ def raise_not_found_error(detail: str = "Contact not found"):
 @router.get("/birthdays", response_model=List[ContactResponse])
 async def get_upcoming_birthdays(
     days: int = Query(default=7, ge=1),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1),
     contact_service: ContactService = Depends(get_contact_service),
 ):
     """
-    Get a list of contacts with upcoming birthdays.
+    Get a list of contacts with upcoming birthdays, soonest first.
 
     Args:
         days (int): Number of days to look ahead for upcoming birthdays.
+        skip (int): Number of records to skip for pagination.
+        limit (int): Maximum number of records to return, capped at `CONTACTS_MAX_PAGE_SIZE`.
         contact_service (ContactService): The contact service instance.
 
     Returns:
         List[ContactResponse]: A list of contacts with upcoming birthdays.
     """
-    return await contact_service.list_upcoming_birthdays(days)
+    return await contact_service.list_upcoming_birthdays(days, skip, limit)
+
+
+@router.get("/search", response_model=List[ContactResponse])
+async def search_contacts(
+    q: str = Query(min_length=1, max_length=200),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1),
+    contact_service: ContactService = Depends(get_contact_service),
+):
+    """
+    Search contacts by name, email, phone number and notes.
+
+    Every word of `q` has to match the beginning of a word of the contact. Results
+    are ranked by relevance, with matches in the names ranked highest.
+
+    Args:
+        q (str): The search query.
+        skip (int): Number of records to skip for pagination.
+        limit (int): Maximum number of records to return, capped at `CONTACTS_MAX_PAGE_SIZE`.
+        contact_service (ContactService): The contact service instance.
+
+    Returns:
+        List[ContactResponse]: The matching contacts, most relevant first.
+    """
+    return await contact_service.search_contacts(q, skip, limit)
 
 
 @router.get("/", response_model=List[ContactResponse])
 async def get_all_contacts(
+    request: Request,
+    response: Response,
     first_name: str = "",
     last_name: str = "",
     email: str = "",
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1),
+    sort: Literal["created_at", "last_name"] = "created_at",
+    cursor: Optional[str] = None,
+    count: Literal["none", "exact", "estimated"] = "none",
     contact_service: ContactService = Depends(get_contact_service),
 ):
     """
     Retrieve a list of all contacts with optional filters.
 
+    Contacts are ordered by `sort`, then by ID. When more contacts follow, the cursor
+    of the next page is returned in the `X-Next-Cursor` header and as a `Link` with
+    `rel="next"`; passing it back as `cursor` fetches the next page at a constant cost,
+    however deep it is. `skip` is still supported but slows down with depth.
+
+    With `count`, the number of matching contacts is returned in `X-Total-Count`, and
+    `X-Total-Count-Mode` tells whether it is `"exact"` or `"estimated"`. Exact totals
+    above `CONTACTS_EXACT_COUNT_MAX` are estimated instead.
+
     Args:
+        request (Request): The incoming HTTP request.
+        response (Response): The outgoing response, which carries the pagination headers.
         first_name (str): Filter contacts by first name (optional).
         last_name (str): Filter contacts by last name (optional).
         email (str): Filter contacts by email (optional).
         skip (int): Number of records to skip for pagination.
-        limit (int): Maximum number of records to return.
+        limit (int): Maximum number of records to return, capped at `CONTACTS_MAX_PAGE_SIZE`.
+        sort (str): Sort key, `"created_at"` or `"last_name"`.
+        cursor (Optional[str]): Cursor of the page to return, from `X-Next-Cursor`.
+        count (str): Total count to report, `"none"`, `"exact"` or `"estimated"`.
         contact_service (ContactService): The contact service instance.
 
     Returns:
         List[ContactResponse]: A list of contacts matching the filters.
+
+    Raises:
+        HTTPException: If the cursor is invalid or belongs to another sort key.
     """
-    return await contact_service.list_contacts(first_name, last_name, email, skip, limit)
+    contacts, next_cursor, total = await contact_service.list_contacts_page(
+        first_name, last_name, email, skip, limit, sort, cursor, count
+    )
+    set_next_page_headers(request, response, next_cursor)
+    set_total_count_headers(response, total)
+    return contacts
+
+
+@router.get("/export")
+async def export_contacts_stream(
+    first_name: str = "",
+    last_name: str = "",
+    email: str = "",
+    format: Literal["ndjson", "csv"] = "ndjson",
+    session_factory=Depends(get_db_session_factory),
+):
+    """
+    Stream every contact matching the filters as NDJSON or CSV.
+
+    Unlike the paginated list, the export is a single response of any size: rows are
+    read from a server-side cursor in batches of `CONTACTS_EXPORT_BATCH_SIZE` and
+    written as they arrive, ordered by creation time, then by ID.
+
+    Args:
+        first_name (str): Filter contacts by first name (optional).
+        last_name (str): Filter contacts by last name (optional).
+        email (str): Filter contacts by email (optional).
+        format (str): `"ndjson"` (one contact per line) or `"csv"` (with a header row).
+        session_factory (Callable[[], AsyncContextManager[AsyncSession]]): Opens the
+            database session of the export.
+
+    Returns:
+        StreamingResponse: The contacts.
+    """
+    return StreamingResponse(
+        export_contacts(
+            session_factory,
+            format,
+            first_name,
+            last_name,
+            email,
+            batch_size=config.CONTACTS_EXPORT_BATCH_SIZE,
+        ),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="contacts.{format}"'},
+    )
 
 
 @router.get("/{contact_id}", response_model=ContactResponse)
@@ -108,19 +223,156 @@ async def get_contact(
 @router.post("/", response_model=ContactResponse, status_code=status.HTTP_201_CREATED)
 async def create_contact(
     body: ContactModel,
+    principal: Principal = Depends(get_current_principal),
     contact_service: ContactService = Depends(get_contact_service),
 ):
     """
-    Create a new contact.
+    Create a new contact owned by the authenticated user.
 
     Args:
         body (ContactModel): The data for the new contact.
+        principal (Principal): The authenticated user, owner of the new contact.
         contact_service (ContactService): The contact service instance.
 
     Returns:
         ContactResponse: The created contact.
     """
-    return await contact_service.create_contact(body)
+    return await contact_service.create_contact(body, principal.id)
+
+
+@router.post("/bulk", response_model=ContactBulkResponse)
+async def create_contacts_bulk(
+    items: List[Any] = Body(min_length=1, max_length=config.CONTACTS_BULK_MAX_ITEMS),
+    principal: Principal = Depends(get_current_principal),
+    contact_service: ContactService = Depends(get_contact_service),
+):
+    """
+    Create many contacts owned by the authenticated user in one request.
+
+    Invalid items and items whose email or phone number is already taken are skipped
+    instead of failing the request; the outcome of every item is reported in order.
+
+    Args:
+        items (List[Any]): The contacts to create, at most `CONTACTS_BULK_MAX_ITEMS`.
+        principal (Principal): The authenticated user, owner of the new contacts.
+        contact_service (ContactService): The contact service instance.
+
+    Returns:
+        ContactBulkResponse: Counts and per-item results.
+    """
+    result = await contact_service.create_contacts_bulk(items, principal.id)
+    # Serialized directly: validating the response again would re-check every email.
+    return Response(content=result.model_dump_json(), media_type="application/json")
+
+
+@router.post("/import")
+async def import_contacts_stream(
+    request: Request,
+    format: Optional[Literal["ndjson", "csv"]] = Query(default=None),
+    principal: Principal = Depends(get_current_principal),
+    session_factory=Depends(get_db_session_factory),
+):
+    """
+    Import contacts owned by the authenticated user from an NDJSON or CSV body.
+
+    The body is spooled to a temporary file first: once a streaming response has
+    started, the request body can no longer be read. It is then parsed and written
+    in batches of `CONTACTS_IMPORT_BATCH_SIZE` rows while events are streamed back
+    as NDJSON: one `rejected` event per row that was not imported, a `progress`
+    event after every batch and a final `done` (or `error`) event.
+
+    Args:
+        request (Request): The incoming HTTP request with the file as its body.
+        format (Optional[str]): `"ndjson"` or `"csv"`. Defaults to the format of the
+            `Content-Type` header.
+        principal (Principal): The authenticated user, owner of the new contacts.
+        session_factory (Callable[[], AsyncContextManager[AsyncSession]]): Opens a
+            database session per batch.
+
+    Returns:
+        StreamingResponse: The import events, one JSON object per line.
+
+    Raises:
+        HTTPException: 415 if the format is unknown, 413 if the body exceeds
+            `CONTACTS_IMPORT_MAX_BYTES`.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = format or IMPORT_FORMATS.get(content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Expected an NDJSON or CSV body",
+        )
+    body = await read_body(
+        request, config.CONTACTS_IMPORT_MAX_BYTES, config.CONTACTS_IMPORT_SPOOL_BYTES
+    )
+
+    async def events():
+        try:
+            async for event in import_contacts(
+                body.iter_chunks(),
+                fmt,
+                principal.id,
+                session_factory,
+                batch_size=config.CONTACTS_IMPORT_BATCH_SIZE,
+                max_in_flight=config.CONTACTS_IMPORT_MAX_IN_FLIGHT,
+            ):
+                yield json.dumps(event) + "\n"
+        finally:
+            body.close()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@router.put("/by-email", response_model=ContactUpsertResponse)
+async def upsert_contacts_bulk(
+    items: List[Any] = Body(min_length=1, max_length=config.CONTACTS_BULK_MAX_ITEMS),
+    principal: Principal = Depends(get_current_principal),
+    contact_service: ContactService = Depends(get_contact_service),
+):
+    """
+    Create or update many contacts keyed by email in one request.
+
+    Pushing the same items again is safe: each chunk is written by one atomic
+    `INSERT ... ON CONFLICT (email) DO UPDATE` statement. Invalid and conflicting
+    items are skipped; the outcome of every item is reported in order.
+
+    Args:
+        items (List[Any]): The contacts to write, at most `CONTACTS_BULK_MAX_ITEMS`.
+        principal (Principal): The authenticated user, owner of the created contacts.
+        contact_service (ContactService): The contact service instance.
+
+    Returns:
+        ContactUpsertResponse: Counts and per-item results.
+    """
+    result = await contact_service.upsert_contacts_bulk(items, principal.id)
+    # Serialized directly: validating the response again would re-check every email.
+    return Response(content=result.model_dump_json(), media_type="application/json")
+
+
+@router.put("/by-email/{email}", response_model=ContactResponse)
+async def upsert_contact(
+    email: str,
+    body: ContactModel,
+    principal: Principal = Depends(get_current_principal),
+    contact_service: ContactService = Depends(get_contact_service),
+):
+    """
+    Create or update the contact with the given email in one atomic statement.
+
+    Args:
+        email (str): The email of the contact. Must match the email of the body.
+        body (ContactModel): The full data of the contact.
+        principal (Principal): The authenticated user, owner of the contact if it is created.
+        contact_service (ContactService): The contact service instance.
+
+    Returns:
+        ContactResponse: The created or updated contact.
+
+    Raises:
+        HTTPException: If the emails differ or the phone number belongs to another contact.
+    """
+    return await contact_service.upsert_contact(email, body, principal.id)
 
 
 @router.put("/{contact_id}", response_model=ContactResponse)
@@ -1,21 +1,28 @@
-from fastapi import APIRouter, Depends, Request, UploadFile, File
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.conf.config import config
 from src.db.db import get_db
-from src.schemas import User
-from src.services.auth import get_current_user, get_admin_user
-from src.services.upload_file import UploadFileService
+from src.schemas import User, Principal
+from src.services.auth import get_current_user, get_admin_principal
+from src.services.rate_limit import rate_limit
+from src.services.upload_file import upload_file_service
+from src.services.upload_stream import read_upload
 from src.services.users import UserService
 
-router = APIRouter(prefix="/users", tags=["users"])
-limiter = Limiter(key_func=get_remote_address)
+router = APIRouter(
+    prefix="/users",
+    tags=["users"],
+    dependencies=[Depends(rate_limit("users", config.RATE_LIMIT_USERS))],
+)
 
 
-@router.get("/me", response_model=User, description="No more than 10 requests per minute")
-@limiter.limit("10 per minute")
+@router.get(
+    "/me",
+    response_model=User,
+    description=f"No more than {config.RATE_LIMIT_USERS_ME} requests",
+    dependencies=[Depends(rate_limit("users_me", config.RATE_LIMIT_USERS_ME))],
+)
 async def me(request: Request, user: User = Depends(get_current_user)):
     """
     Retrieve the currently authenticated user's profile.
@@ -28,37 +35,72 @@ async def me(request: Request, user: User = Depends(get_current_user)):
         User: The profile of the currently authenticated user.
 
     Note:
-        This endpoint is rate-limited to 10 requests per minute.
+        This endpoint is rate-limited to `RATE_LIMIT_USERS_ME` requests per user.
     """
     return user
 
 
-@router.patch("/avatar", response_model=User)
+AVATAR_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "required": ["file"],
+                "properties": {"file": {"type": "string", "format": "binary"}},
+            }
+        }
+    },
+}
+
+
+@router.patch(
+    "/avatar",
+    response_model=User,
+    openapi_extra={"requestBody": AVATAR_REQUEST_BODY},
+)
 async def update_avatar_user(
-        file: UploadFile = File(),
-        user: User = Depends(get_admin_user),
+        request: Request,
+        user: Principal = Depends(get_admin_principal),
         db: AsyncSession = Depends(get_db),
 ):
     """
     Update the authenticated user's avatar.
 
-    This endpoint allows the user to upload a new avatar image, which is stored in a cloud storage
-    (e.g., Cloudinary), and updates the user's profile with the new avatar URL.
+    This endpoint allows the user to upload a new avatar image, and updates the user's profile with
+    the new avatar URL. The image is cropped and re-encoded in the image process pool, then saved
+    to the configured avatar storage (Cloudinary or the local filesystem), unless the same avatar
+    was stored before.
+
+    The `file` field of the multipart body is streamed instead of parsed by `request.form()`:
+    its size and content type are enforced while it is read, and it is only moved from memory
+    to a temporary file above `AVATAR_SPOOL_BYTES`.
 
     Args:
-        file (UploadFile): The avatar image file to upload.
-        user (User): The authenticated user, injected via the `get_current_user` dependency.
+        request (Request): The incoming HTTP request with the avatar in the `file` field.
+        user (Principal): The authenticated admin, injected via the `get_admin_principal`
+            dependency without loading the user row.
         db (AsyncSession): The database session.
 
     Returns:
         User: The updated user profile with the new avatar URL.
 
     Raises:
-        HTTPException: If an error occurs during file upload or database update.
+        HTTPException: If the file is too large or not an accepted image type, or if the
+            upload fails or times out.
+        PoolSaturatedError: If too many uploads are in progress.
     """
-    avatar_url = UploadFileService(
-        config.CLOUDINARY_NAME, config.CLOUDINARY_API_KEY, config.CLOUDINARY_API_SECRET
-    ).upload_file(file, user.username)
+    upload = await read_upload(
+        request,
+        "file",
+        max_bytes=config.AVATAR_MAX_BYTES,
+        content_types=config.AVATAR_CONTENT_TYPES,
+        spool_bytes=config.AVATAR_SPOOL_BYTES,
+    )
+    try:
+        avatar_url = await upload_file_service.upload_spooled_async(upload)
+    finally:
+        upload.close()
 
     user_service = UserService(db)
     user = await user_service.update_avatar_url(user.email, avatar_url)
@@ -3,6 +3,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
 from src.db.db import get_db
+from src.schemas import Principal
+from src.services.auth import get_admin_principal
+from src.services.cache import principal_cache, token_version_cache
+from src.services.hashing import hash_pool
+from src.services.email import mail_transport
+from src.services.outbox import outbox_stats
+from src.services.images import image_pool
+from src.services.rate_limit import limiter
+from src.services.storage import upload_pool
+from src.services.upload_file import avatar_url_cache
+from src.services.revocation import revocation_list
 
 router = APIRouter(tags=["utils"])
 
@@ -40,4 +51,30 @@ async def health(db: AsyncSession = Depends(get_db)):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error connecting to the db",
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/metrics")
+async def metrics(admin: Principal = Depends(get_admin_principal)):
+    """
+    Expose in-process performance counters of this worker to admins.
+
+    Args:
+        admin (Principal): The authenticated admin, injected via the `get_admin_principal`
+            dependency.
+
+    Returns:
+        dict: Counters grouped by subsystem.
+    """
+    return {
+        "principal_cache": principal_cache.stats(),
+        "token_version_cache": token_version_cache.stats(),
+        "hash_pool": hash_pool.stats(),
+        "upload_pool": upload_pool.stats(),
+        "image_pool": image_pool.stats(),
+        "avatar_url_cache": avatar_url_cache.stats(),
+        "rate_limiter": limiter.stats(),
+        "revocation_list": revocation_list.stats(),
+        "mail_transport": mail_transport.stats(),
+        "outbox": outbox_stats.stats(),
+    }
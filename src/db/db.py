@@ -14,6 +14,9 @@ class DatabaseSessionManager:
     This class provides a centralized way to manage database connections and sessions
     using SQLAlchemy's asynchronous engine and session maker.
 
+    Sessions do not expire objects on commit, so rows returned by `INSERT/UPDATE ... RETURNING`
+    stay usable after the commit without a refresh query.
+
     Attributes:
         _engine (AsyncEngine | None): The asynchronous SQLAlchemy engine.
         _session_maker (async_sessionmaker): The session maker bound to the engine.
@@ -31,7 +34,7 @@ class DatabaseSessionManager:
         """
         self._engine: AsyncEngine | None = create_async_engine(url)
         self._session_maker: async_sessionmaker = async_sessionmaker(
-            autoflush=False, autocommit=False, bind=self._engine
+            autoflush=False, autocommit=False, expire_on_commit=False, bind=self._engine
         )
 
     @contextlib.asynccontextmanager
@@ -83,4 +86,16 @@ async def get_db():
         AsyncSession: A database session for use within a request context.
     """
     async with sessionmanager.session() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+def get_db_session_factory():
+    """
+    Dependency for retrieving a factory of asynchronous database sessions.
+
+    Streaming endpoints use it instead of `get_db`, since the session provided by
+    `get_db` is closed before the response body is streamed.
+
+    Returns:
+        Callable[[], AsyncContextManager[AsyncSession]]: Opens a database session.
+    """
+    return sessionmanager.session
@@ -1,7 +1,10 @@
 from enum import Enum
-from datetime import datetime, date
-from sqlalchemy import Integer, String, func, Column, ForeignKey, Boolean, Enum as SqlEnum
-from sqlalchemy.orm import mapped_column, Mapped, DeclarativeBase, relationship
+from datetime import datetime, date, timezone
+from sqlalchemy import (
+    DDL, Integer, String, Text, JSON, func, Column, ForeignKey, Boolean, Index, Enum as SqlEnum,
+    column, event, table, text,
+)
+from sqlalchemy.orm import mapped_column, Mapped, DeclarativeBase, relationship, validates
 from sqlalchemy.sql.sqltypes import DateTime, Date
 
 
@@ -22,6 +25,29 @@ class Role(str, Enum):
     ADMIN = "admin"
 
 
+def birthday_mmdd(birthday: date) -> int:
+    """
+    Return the month and day of a date as one sortable number, e.g. `1231` for December 31.
+
+    Args:
+        birthday (date): The date.
+
+    Returns:
+        int: `month * 100 + day`.
+    """
+    return birthday.month * 100 + birthday.day
+
+
+def _birthday_mmdd_default(context) -> int:
+    return birthday_mmdd(context.get_current_parameters()["birthday_date"])
+
+
+def _utcnow() -> datetime:
+    # Set by the application with microseconds: SQLite's CURRENT_TIMESTAMP has whole
+    # seconds in another text format, which a keyset cursor cannot compare against.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class Contact(Base):
     """
     Model representing a contact in the database.
@@ -33,18 +59,36 @@ class Contact(Base):
         email (str): Email address of the contact. Must be unique. Required, max length 80.
         phone_number (str): Phone number of the contact. Must be unique. Required, max length 15.
         birthday_date (date): Birthday of the contact. Required.
-        created_at (datetime): Timestamp of when the contact was created. Auto-generated.
+        birthday_mmdd (int): Month and day of the birthday as `month * 100 + day`, indexed for
+            the upcoming birthdays query. Derived from `birthday_date` on every write.
+        created_at (datetime): Timestamp of when the contact was created, in UTC. Auto-generated.
         updated_at (datetime): Timestamp of the last update. Auto-generated on update.
         info (str): Additional information about the contact. Optional, max length 500.
     """
     __tablename__ = "contacts"
+    __table_args__ = (
+        Index("ix_contacts_created_at_id", "created_at", "id"),
+        Index("ix_contacts_last_name_id", "last_name", "id"),
+        *(
+            Index(
+                f"ix_contacts_{name}_trgm",
+                name,
+                postgresql_using="gin",
+                postgresql_ops={name: "gin_trgm_ops"},
+            ).ddl_if(dialect="postgresql")
+            for name in ("first_name", "last_name", "email")
+        ),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     first_name: Mapped[str] = mapped_column(String(50), nullable=False)
     last_name: Mapped[str] = mapped_column(String(50), nullable=False)
     email: Mapped[str] = mapped_column(String(80), nullable=False, unique=True)
     phone_number: Mapped[str] = mapped_column(String(15), nullable=False, unique=True)
     birthday_date: Mapped[date] = mapped_column("birthday_date", Date, nullable=False)
-    created_at: Mapped[datetime] = mapped_column("created_at", DateTime, default=func.now())
+    birthday_mmdd: Mapped[int] = mapped_column(
+        Integer, default=_birthday_mmdd_default, index=True, nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column("created_at", DateTime, default=_utcnow)
     updated_at: Mapped[datetime] = mapped_column(
         "updated_at", DateTime, default=func.now(), onupdate=func.now()
     )
@@ -54,6 +98,114 @@ class Contact(Base):
     )
     user = relationship("User", backref="contacts")
 
+    @validates("birthday_date")
+    def _sync_birthday_mmdd(self, key: str, value: date) -> date:
+        self.birthday_mmdd = birthday_mmdd(value)
+        return value
+
+
+contacts_fts = table(
+    "contacts_fts",
+    column("rowid"),
+    column("first_name"),
+    column("last_name"),
+    column("email"),
+)
+"""
+SQLite FTS5 index of the contact names and emails, kept in sync by triggers.
+
+It uses the trigram tokenizer, so `LIKE '%x%'` on its columns is answered from
+the index for terms of three or more characters. On PostgreSQL the same searches
+use the `gin_trgm_ops` indexes of the `contacts` table instead.
+"""
+
+CONTACTS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE contacts_fts USING fts5("
+    "first_name, last_name, email, content='contacts', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER contacts_fts_ai AFTER INSERT ON contacts BEGIN "
+    "INSERT INTO contacts_fts(rowid, first_name, last_name, email) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email); END",
+    "CREATE TRIGGER contacts_fts_ad AFTER DELETE ON contacts BEGIN "
+    "INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); END",
+    "CREATE TRIGGER contacts_fts_au AFTER UPDATE OF first_name, last_name, email ON contacts BEGIN "
+    "INSERT INTO contacts_fts(contacts_fts, rowid, first_name, last_name, email) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); "
+    "INSERT INTO contacts_fts(rowid, first_name, last_name, email) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email); END",
+)
+"""
+Statements creating the SQLite search index of the contacts and its sync triggers.
+"""
+
+contacts_search = table("contacts_search", column("rowid"))
+"""
+SQLite FTS5 index of the ranked contact search, kept in sync by triggers.
+
+Words are indexed whole (`unicode61`) with prefix indexes, and matches are ranked
+with `bm25`. On PostgreSQL the ranked search uses the generated `search_vector`
+column of the `contacts` table instead.
+"""
+
+CONTACTS_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE contacts_search USING fts5("
+    "first_name, last_name, email, phone_number, info, content='contacts', content_rowid='id', "
+    "tokenize='unicode61', prefix='2 3')",
+    "CREATE TRIGGER contacts_search_ai AFTER INSERT ON contacts BEGIN "
+    "INSERT INTO contacts_search(rowid, first_name, last_name, email, phone_number, info) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email, new.phone_number, new.info); END",
+    "CREATE TRIGGER contacts_search_ad AFTER DELETE ON contacts BEGIN "
+    "INSERT INTO contacts_search(contacts_search, rowid, first_name, last_name, email, phone_number, info) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.phone_number, old.info); END",
+    "CREATE TRIGGER contacts_search_au AFTER UPDATE OF first_name, last_name, email, phone_number, info "
+    "ON contacts BEGIN "
+    "INSERT INTO contacts_search(contacts_search, rowid, first_name, last_name, email, phone_number, info) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.phone_number, old.info); "
+    "INSERT INTO contacts_search(rowid, first_name, last_name, email, phone_number, info) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email, new.phone_number, new.info); END",
+)
+"""
+Statements creating the SQLite ranked search index of the contacts and its sync triggers.
+"""
+
+CONTACTS_SEARCH_VECTOR_DDL = (
+    "ALTER TABLE contacts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    + " || ".join(
+        f"setweight(to_tsvector('simple', "
+        f"regexp_replace(coalesce({column}, ''), '[\\W_]+', ' ', 'g')), '{weight}')"
+        for column, weight in (
+            ("first_name", "A"), ("last_name", "A"), ("email", "B"), ("phone_number", "B"), ("info", "C")
+        )
+    )
+    + ") STORED",
+    "CREATE INDEX ix_contacts_search_vector ON contacts USING gin (search_vector)",
+)
+"""
+Statements adding the PostgreSQL `search_vector` column of the ranked contact search.
+
+The column is not mapped, so it is never loaded with the contacts; names weigh
+more than email and phone, which weigh more than the notes. Everything but letters
+and digits is replaced by spaces first, so an email or a phone number is split into
+words the way the query and the SQLite `unicode61` tokenizer split it, instead of
+being kept whole by the default parser.
+"""
+
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+for statement in CONTACTS_FTS_DDL + CONTACTS_SEARCH_DDL:
+    event.listen(Contact.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in CONTACTS_SEARCH_VECTOR_DDL:
+    event.listen(Contact.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for fts_table in ("contacts_fts", "contacts_search"):
+    event.listen(
+        Contact.__table__,
+        "after_drop",
+        DDL(f"DROP TABLE IF EXISTS {fts_table}").execute_if(dialect="sqlite"),
+    )
+
 
 class User(Base):
     """
@@ -67,6 +219,9 @@ class User(Base):
         created_at (datetime): Timestamp of when the user was created. Auto-generated.
         avatar (str): URL of the user's avatar. Optional, max length 255.
         confirmed (bool): Status indicating whether the user's email is confirmed. Default is False.
+        role (Role): Role of the user. Default is `Role.USER`.
+        token_version (int): Version embedded in claims tokens. Bumping it revokes every
+            claims token issued before. Default is 0.
     """
     __tablename__ = "users"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -76,4 +231,103 @@ class User(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
     avatar: Mapped[str] = mapped_column(String(255), nullable=True)
     confirmed: Mapped[bool] = mapped_column(Boolean, default=False)
-    role: Mapped[Role] = mapped_column(SqlEnum(Role), default=Role.USER, nullable=False)
\ No newline at end of file
+    role: Mapped[Role] = mapped_column(SqlEnum(Role), default=Role.USER, nullable=False)
+    token_version: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+
+class RefreshToken(Base):
+    """
+    Model representing an issued refresh token.
+
+    Only an HMAC digest of the token is stored. Tokens issued by rotating one another
+    share a family, which is revoked as a whole when a rotated token is reused.
+
+    Attributes:
+        id (int): Primary key, unique identifier for each refresh token.
+        token_hash (str): Hex HMAC-SHA256 digest of the token. Unique.
+        family_id (str): Identifier shared by all tokens of one login session.
+        user_id (int): The owner of the token.
+        created_at (datetime): Timestamp of when the token was issued. Auto-generated.
+        expires_at (datetime): Timestamp after which the token is no longer accepted.
+        used_at (datetime): Timestamp of when the token was rotated. Optional.
+        revoked_at (datetime): Timestamp of when the token was revoked. Optional.
+    """
+    __tablename__ = "refresh_tokens"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    family_id: Mapped[str] = mapped_column(String(32), index=True, nullable=False)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    used_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    revoked_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    user = relationship("User")
+
+
+class RevokedToken(Base):
+    """
+    Model representing a revoked access token.
+
+    Rows are only needed until the token would have expired anyway.
+
+    Attributes:
+        jti (str): Primary key, the `jti` claim of the revoked token.
+        expires_at (datetime): Expiration timestamp of the token.
+        revoked_at (datetime): Timestamp of when the token was revoked. Auto-generated.
+    """
+    __tablename__ = "revoked_tokens"
+    jti: Mapped[str] = mapped_column(String(32), primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True, nullable=False)
+    revoked_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+
+
+class OutboxEmail(Base):
+    """
+    Model representing an email waiting in the outbox.
+
+    Rows are written in the same transaction as the change that triggers the email
+    and delivered by the outbox worker (`python -m src.services.outbox`).
+
+    Attributes:
+        id (int): Primary key, unique identifier for each email.
+        kind (str): What to send, e.g. `"email_confirmation"` or `"reset_password"`.
+        recipient (str): Email address of the recipient.
+        payload (dict): Template variables of the email.
+        dedupe_key (str): Key under which repeated requests are coalesced. Optional.
+        suppressed (int): Number of repeated requests coalesced into this email.
+        status (str): `"pending"`, `"sending"`, `"sent"` or `"failed"`.
+        attempts (int): Number of delivery attempts so far.
+        available_at (datetime): Timestamp before which the email is not picked up.
+        claimed_at (datetime): Timestamp of when a worker claimed the email. Optional.
+        sent_at (datetime): Timestamp of the delivery. Optional.
+        last_error (str): Error of the last failed attempt. Optional.
+        created_at (datetime): Timestamp of when the email was queued. Auto-generated.
+    """
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_available_at", "status", "available_at"),
+        # At most one pending email per key: repeated requests are merged into it.
+        Index(
+            "ux_email_outbox_pending_dedupe_key",
+            "dedupe_key",
+            unique=True,
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+    )
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)
+    recipient: Mapped[str] = mapped_column(String(150), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    dedupe_key: Mapped[str] = mapped_column(String(200), index=True, nullable=True)
+    suppressed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    status: Mapped[str] = mapped_column(String(16), default="pending", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    available_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), nullable=False)
+    claimed_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    sent_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
@@ -1,11 +1,43 @@
+import calendar
+import json
+import re
 from datetime import date, timedelta
-from typing import List, Optional
-from sqlalchemy import select, func, or_, and_
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import Row, delete, exists, insert, select, text, update, func, or_, case, tuple_, literal_column
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.db.models import Contact
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from src.db.models import Contact, birthday_mmdd, contacts_fts, contacts_search
 from src.schemas import ContactModel
 
 
+CONTACT_SORT_KEYS = {
+    "created_at": Contact.created_at,
+    "last_name": Contact.last_name,
+}
+"""
+Columns the contacts list can be sorted by. Each is backed by an index on
+`(column, id)`, so a keyset page is an index range scan wherever it starts.
+"""
+
+
+class _Explain(Executable, ClauseElement):
+    """
+    `EXPLAIN (FORMAT JSON)` of a statement, keeping its bound parameters.
+    """
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
 class ContactRepository:
     """
     Repository class for managing contacts in the database.
@@ -26,30 +58,255 @@ class ContactRepository:
         """
         self._db_session = session
 
+    def _search_filters(self, first_name: str, last_name: str, email: str) -> list:
+        """
+        Build the substring filters of the contacts list for the session's dialect.
+
+        Empty filters are left out. On SQLite the search runs against the FTS5
+        trigram index `contacts_fts`; elsewhere it is a plain `LIKE`, which
+        PostgreSQL answers from the `gin_trgm_ops` indexes.
+
+        Args:
+            first_name (str): Substring of the first name.
+            last_name (str): Substring of the last name.
+            email (str): Substring of the email.
+
+        Returns:
+            list: The filter expressions.
+        """
+        terms = {"first_name": first_name, "last_name": last_name, "email": email}
+        terms = {name: value for name, value in terms.items() if value}
+        if not terms:
+            return []
+        if self._db_session.bind.dialect.name == "sqlite":
+            matches = select(contacts_fts.c.rowid).where(
+                *(contacts_fts.c[name].contains(value) for name, value in terms.items())
+            )
+            return [Contact.id.in_(matches)]
+        return [getattr(Contact, name).contains(value) for name, value in terms.items()]
+
     async def get_contacts(
-        self, first_name: str, last_name: str, email: str, skip: int, limit: int
+        self,
+        first_name: str,
+        last_name: str,
+        email: str,
+        skip: int,
+        limit: int,
+        sort: str = "created_at",
+        after: Optional[Tuple[Any, int]] = None,
     ) -> List[Contact]:
         """
         Retrieve a list of contacts based on search criteria.
 
+        Contacts are ordered by `sort`, then by ID, so the order is total and stable.
+        With `after`, the page starts right behind the given row (keyset pagination),
+        which costs the same on every page; `skip` is still applied on top of it.
+
         Args:
             first_name (str): Filter by first name (substring match).
             last_name (str): Filter by last name (substring match).
             email (str): Filter by email (substring match).
             skip (int): Number of records to skip for pagination.
             limit (int): Maximum number of records to retrieve.
+            sort (str): Sort key, one of `CONTACT_SORT_KEYS`. Default is `"created_at"`.
+            after (Optional[Tuple[Any, int]]): Sort key and ID of the last row of the previous page.
 
         Returns:
             List[Contact]: A list of contacts matching the search criteria.
         """
+        filters = self._search_filters(first_name, last_name, email)
+        query = self._page_query(filters, skip, limit, sort, after)
+        result = await self._db_session.execute(query)
+        return list(result.scalars().all())
+
+    def _page_query(
+        self, filters: list, skip: int, limit: int, sort: str, after: Optional[Tuple[Any, int]]
+    ):
+        sort_column = CONTACT_SORT_KEYS[sort]
+        query = select(Contact).where(*filters).order_by(sort_column, Contact.id)
+        if after is not None:
+            query = query.where(tuple_(sort_column, Contact.id) > tuple_(*after))
+        return query.offset(skip).limit(limit)
+
+    def _count_query(self, filters: list, cap: Optional[int]):
+        matching = select(Contact.id).where(*filters)
+        if cap is not None:
+            matching = matching.limit(cap + 1)
+        return select(func.count()).select_from(matching.subquery())
+
+    async def get_contacts_with_total(
+        self,
+        first_name: str,
+        last_name: str,
+        email: str,
+        skip: int,
+        limit: int,
+        sort: str = "created_at",
+        after: Optional[Tuple[Any, int]] = None,
+        count_cap: Optional[int] = None,
+    ) -> Tuple[List[Contact], int]:
+        """
+        Retrieve a page of contacts like `get_contacts`, and count every matching contact.
+
+        The count is an uncorrelated scalar subquery of the page query, so the database
+        evaluates it once and both come back in one round trip. It ignores `skip` and
+        `after`, so every page reports the same total. With `count_cap`, counting stops
+        after `count_cap + 1` contacts, which bounds its cost. Only an empty page needs
+        a second query for the count.
+
+        A `count(*) OVER ()` column is not used: the window sees the rows left after
+        the keyset condition of `after`, so it would count the remaining contacts
+        instead of all of them. It also cannot stop at a cap, since it is computed over
+        every matching row.
+
+        Args:
+            first_name (str): Filter by first name (substring match).
+            last_name (str): Filter by last name (substring match).
+            email (str): Filter by email (substring match).
+            skip (int): Number of records to skip for pagination.
+            limit (int): Maximum number of records to retrieve.
+            sort (str): Sort key, one of `CONTACT_SORT_KEYS`. Default is `"created_at"`.
+            after (Optional[Tuple[Any, int]]): Sort key and ID of the last row of the previous page.
+            count_cap (Optional[int]): Largest total to count exactly. Default is no limit.
+
+        Returns:
+            Tuple[List[Contact], int]: The contacts and the number of matching contacts,
+                `count_cap + 1` if there are more than `count_cap`.
+        """
+        filters = self._search_filters(first_name, last_name, email)
+        total = self._count_query(filters, count_cap).scalar_subquery()
+        query = self._page_query(filters, skip, limit, sort, after).add_columns(total)
+        rows = (await self._db_session.execute(query)).all()
+        if rows:
+            return [contact for contact, _ in rows], rows[0][1]
+        return [], await self._db_session.scalar(self._count_query(filters, count_cap))
+
+    async def estimate_contacts(
+        self, first_name: str, last_name: str, email: str, at_least: Optional[int] = None
+    ) -> Tuple[int, bool]:
+        """
+        Estimate the number of contacts matching the filters without counting them.
+
+        On PostgreSQL the estimate is `pg_class.reltuples` of the table when nothing is
+        filtered, otherwise the row estimate of the planner for the filtered query.
+        SQLite keeps no row estimates: the largest contact ID stands in for the size of
+        the table, and filtered contacts are counted exactly through the FTS5 index,
+        unless `at_least` is known, which is then returned as the estimate.
+
+        Args:
+            first_name (str): Filter by first name (substring match).
+            last_name (str): Filter by last name (substring match).
+            email (str): Filter by email (substring match).
+            at_least (Optional[int]): A known lower bound of the number, e.g. from a
+                capped count, returned instead of counting the contacts. Default is None.
+
+        Returns:
+            Tuple[int, bool]: The number of matching contacts, and whether it was counted
+                exactly rather than estimated.
+        """
+        filters = self._search_filters(first_name, last_name, email)
+        if self._db_session.bind.dialect.name != "postgresql":
+            if filters and at_least is not None:
+                return at_least, False
+            if filters:
+                return await self._db_session.scalar(self._count_query(filters, None)), True
+            max_id = await self._db_session.scalar(select(func.coalesce(func.max(Contact.id), 0)))
+            return max_id, False
+        if not filters:
+            reltuples = await self._db_session.scalar(
+                text("SELECT reltuples FROM pg_class WHERE oid = 'contacts'::regclass")
+            )
+            # -1 until the table is first vacuumed or analyzed.
+            if reltuples is not None and reltuples >= 0:
+                return int(reltuples), False
+        plan = await self._db_session.scalar(_Explain(select(Contact.id).where(*filters)))
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        return int(plan[0]["Plan"]["Plan Rows"]), False
+
+    async def stream_contacts(
+        self,
+        first_name: str,
+        last_name: str,
+        email: str,
+        columns: Sequence[str],
+        batch_size: int,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Stream every contact matching the filters as plain rows, in batches.
+
+        The query runs on a server-side cursor and fetches `batch_size` rows at a time,
+        so neither the driver nor the session holds more than one batch. Rows are Core
+        tuples of `columns`; no ORM objects are built. Contacts are ordered by creation
+        time, then by ID.
+
+        Args:
+            first_name (str): Filter by first name (substring match).
+            last_name (str): Filter by last name (substring match).
+            email (str): Filter by email (substring match).
+            columns (Sequence[str]): Names of the `contacts` columns to fetch.
+            batch_size (int): Rows fetched per round trip.
+
+        Yields:
+            Sequence[Row]: The next batch of rows.
+        """
         query = (
-            select(Contact)
-            .where(Contact.first_name.contains(first_name))
-            .where(Contact.last_name.contains(last_name))
-            .where(Contact.email.contains(email))
-            .offset(skip)
-            .limit(limit)
+            select(*(Contact.__table__.c[name] for name in columns))
+            .where(*self._search_filters(first_name, last_name, email))
+            .order_by(Contact.created_at, Contact.id)
+            .execution_options(yield_per=batch_size)
         )
+        result = await self._db_session.stream(query)
+        async for batch in result.partitions():
+            yield batch
+
+    async def search_contacts(self, q: str, skip: int, limit: int) -> List[Contact]:
+        """
+        Search contacts by words of their names, email, phone number and notes.
+
+        Every word of `q` must match the start of a word of the contact. Words are runs
+        of letters and digits on both sides, so `john.doe@mail` finds the email
+        `john.doe@mail.com` and `380671` the phone number `+380671110001`. Matches are
+        ranked by relevance, names first, then by ID. The search and the ranking run
+        in the database: on PostgreSQL against the `search_vector` column, on SQLite
+        against the `contacts_search` FTS5 index.
+
+        Args:
+            q (str): The search query.
+            skip (int): Number of records to skip for pagination.
+            limit (int): Maximum number of records to retrieve.
+
+        Returns:
+            List[Contact]: The matching contacts, most relevant first.
+        """
+        terms = re.findall(r"[^\W_]+", q.lower())
+        if not terms:
+            return []
+        if self._db_session.bind.dialect.name == "sqlite":
+            fts = literal_column("contacts_search")
+            hits = (
+                select(
+                    contacts_search.c.rowid.label("id"),
+                    func.bm25(fts, 10.0, 10.0, 5.0, 5.0, 1.0).label("rank"),
+                )
+                .where(fts.op("MATCH")(" ".join(f'"{term}"*' for term in terms)))
+                .subquery()
+            )
+            query = (
+                select(Contact)
+                .join(hits, Contact.id == hits.c.id)
+                .order_by(hits.c.rank, Contact.id)
+            )
+        else:
+            vector = literal_column("contacts.search_vector")
+            tsquery = func.to_tsquery(
+                literal_column("'simple'::regconfig"), " & ".join(f"{term}:*" for term in terms)
+            )
+            query = (
+                select(Contact)
+                .where(vector.op("@@")(tsquery))
+                .order_by(func.ts_rank_cd(vector, tsquery).desc(), Contact.id)
+            )
+        query = query.offset(skip).limit(limit)
         result = await self._db_session.execute(query)
         return list(result.scalars().all())
 
@@ -67,57 +324,200 @@ class ContactRepository:
         result = await self._db_session.execute(query)
         return result.scalar_one_or_none()
 
-    async def create_contact(self, body: ContactModel) -> Contact:
+    async def create_contact(self, body: ContactModel, user_id: int) -> Contact:
         """
         Create a new contact.
 
+        The row is inserted with `INSERT ... RETURNING` and committed, without a
+        separate refresh query.
+
         Args:
             body (ContactModel): The contact data to create.
+            user_id (int): The owner of the new contact.
 
         Returns:
             Contact: The newly created contact.
+
+        Raises:
+            IntegrityError: If the email or phone number is already taken. The session is
+                rolled back before the error is re-raised.
+        """
+        stmt = (
+            insert(Contact)
+            .values(**body.model_dump(exclude_unset=True), user_id=user_id)
+            .returning(Contact)
+        )
+        try:
+            result = await self._db_session.execute(stmt)
+            contact = result.scalar_one()
+            await self._db_session.commit()
+        except IntegrityError:
+            await self._db_session.rollback()
+            raise
+        return contact
+
+    async def find_taken(
+        self, emails: Iterable[str], phone_numbers: Iterable[str]
+    ) -> Tuple[Set[str], Set[str]]:
+        """
+        Find which of the given emails and phone numbers already belong to a contact.
+
+        Args:
+            emails (Iterable[str]): The emails to check.
+            phone_numbers (Iterable[str]): The phone numbers to check.
+
+        Returns:
+            Tuple[Set[str], Set[str]]: The taken emails and the taken phone numbers.
         """
-        new_contact = Contact(**body.model_dump(exclude_unset=True))
-        self._db_session.add(new_contact)
+        emails, phone_numbers = list(emails), list(phone_numbers)
+        query = select(Contact.email, Contact.phone_number).where(
+            or_(Contact.email.in_(emails), Contact.phone_number.in_(phone_numbers))
+        )
+        result = await self._db_session.execute(query)
+        rows = result.all()
+        wanted_emails, wanted_phones = set(emails), set(phone_numbers)
+        return (
+            {email for email, _ in rows if email in wanted_emails},
+            {phone for _, phone in rows if phone in wanted_phones},
+        )
+
+    async def create_contacts(self, rows: List[dict]) -> List[Contact]:
+        """
+        Insert contacts with multi-row `INSERT ... RETURNING` statements and commit.
+
+        Args:
+            rows (List[dict]): Column values of the contacts, including `user_id`.
+
+        Returns:
+            List[Contact]: The created contacts, in no particular order. Requiring the
+                order of `rows` would make SQLite fall back to one INSERT per row.
+        """
+        stmt = insert(Contact).returning(Contact)
+        result = await self._db_session.scalars(stmt, rows)
+        contacts = list(result.all())
         await self._db_session.commit()
-        await self._db_session.refresh(new_contact)
-        return new_contact
+        return contacts
+
+    async def find_phone_owners(self, phone_numbers: Iterable[str]) -> Dict[str, str]:
+        """
+        Find the emails of the contacts that own the given phone numbers.
+
+        Args:
+            phone_numbers (Iterable[str]): The phone numbers to look up.
+
+        Returns:
+            Dict[str, str]: The email of the owner of every taken phone number.
+        """
+        query = select(Contact.phone_number, Contact.email).where(
+            Contact.phone_number.in_(list(phone_numbers))
+        )
+        result = await self._db_session.execute(query)
+        return dict(result.tuples().all())
+
+    async def upsert_contacts(self, rows: List[dict]) -> List[Contact]:
+        """
+        Create or update contacts keyed by email, in one statement, and commit.
+
+        Rows are written with `INSERT ... ON CONFLICT (email) DO UPDATE ... RETURNING`,
+        available on PostgreSQL and SQLite alike, so there is no window between a
+        check and the write. An existing contact gets the fields of its row and a new
+        `updated_at`; its owner is kept. A row whose email belongs to a contact of
+        another user is skipped by the `WHERE` of the update and is not returned.
+
+        Args:
+            rows (List[dict]): Column values of the contacts, including `user_id`. Every
+                row has the same keys and a distinct email.
+
+        Returns:
+            List[Contact]: The created or updated contacts, in no particular order,
+                without the skipped rows.
+
+        Raises:
+            IntegrityError: If a phone number belongs to a contact with another email.
+                The session is rolled back before the error is re-raised.
+        """
+        rows = [{**row, "birthday_mmdd": birthday_mmdd(row["birthday_date"])} for row in rows]
+        dialect = postgresql if self._db_session.bind.dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(Contact)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Contact.email],
+            set_={
+                **{name: stmt.excluded[name] for name in rows[0] if name not in ("email", "user_id")},
+                "updated_at": func.now(),
+            },
+            where=Contact.user_id == stmt.excluded.user_id,
+        ).returning(Contact)
+        try:
+            result = await self._db_session.scalars(
+                stmt, rows, execution_options={"populate_existing": True}
+            )
+            contacts = list(result.all())
+            await self._db_session.commit()
+        except IntegrityError:
+            await self._db_session.rollback()
+            raise
+        return contacts
+
+    async def rollback(self) -> None:
+        """
+        Roll back the current transaction.
+        """
+        await self._db_session.rollback()
 
     async def update_contact(self, contact_id: int, body: ContactModel) -> Optional[Contact]:
         """
         Update an existing contact.
 
+        The row is updated with `UPDATE ... RETURNING` and committed: a missing contact
+        is told apart by the empty result instead of a lookup beforehand.
+
         Args:
             contact_id (int): The ID of the contact to update.
             body (ContactModel): The updated contact data.
 
         Returns:
             Optional[Contact]: The updated contact if it exists, or `None` if not found.
+
+        Raises:
+            IntegrityError: If the new email or phone number is already taken. The session
+                is rolled back before the error is re-raised.
         """
-        contact = await self.get_contact_by_id(contact_id)
-        if not contact:
-            return None
-        update_data = body.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(contact, field, value)
-        await self._db_session.commit()
-        await self._db_session.refresh(contact)
+        values = body.model_dump(exclude_unset=True)
+        if "birthday_date" in values:
+            values["birthday_mmdd"] = birthday_mmdd(values["birthday_date"])
+        stmt = (
+            update(Contact)
+            .where(Contact.id == contact_id)
+            .values(**values)
+            .returning(Contact)
+            .execution_options(populate_existing=True)
+        )
+        try:
+            result = await self._db_session.execute(stmt)
+            contact = result.scalar_one_or_none()
+            await self._db_session.commit()
+        except IntegrityError:
+            await self._db_session.rollback()
+            raise
         return contact
 
     async def remove_contact(self, contact_id: int) -> Optional[Contact]:
         """
         Remove a contact by its ID.
 
+        The row is deleted with `DELETE ... RETURNING` and committed, so the deleted
+        contact is returned without a lookup beforehand.
+
         Args:
             contact_id (int): The ID of the contact to delete.
 
         Returns:
             Optional[Contact]: The deleted contact if it exists, or `None` if not found.
         """
-        contact = await self.get_contact_by_id(contact_id)
-        if contact:
-            await self._db_session.delete(contact)
-            await self._db_session.commit()
+        stmt = delete(Contact).where(Contact.id == contact_id).returning(Contact)
+        result = await self._db_session.execute(stmt)
+        contact = result.scalar_one_or_none()
+        await self._db_session.commit()
         return contact
 
     async def does_contact_exist(self, email: str, phone_number: str) -> bool:
@@ -131,43 +531,47 @@ class ContactRepository:
         Returns:
             bool: `True` if the contact exists, otherwise `False`.
         """
-        query = select(Contact).where(
-            or_(Contact.email == email, Contact.phone_number == phone_number)
+        query = select(
+            exists().where(or_(Contact.email == email, Contact.phone_number == phone_number))
         )
-        result = await self._db_session.execute(query)
-        return result.scalars().first() is not None
+        return bool(await self._db_session.scalar(query))
 
-    async def get_upcoming_birthdays(self, days: int) -> List[Contact]:
+    async def get_upcoming_birthdays(
+        self, days: int, skip: int = 0, limit: int = 100, today: Optional[date] = None
+    ) -> List[Contact]:
         """
         Retrieve contacts with upcoming birthdays within a specified number of days.
 
+        The window is matched on the indexed `birthday_mmdd` column: one range scan, or
+        two when the window wraps from December into January. In common years, birthdays
+        on February 29 are due on February 28. Contacts are ordered by the date of their
+        next birthday, then by ID.
+
         Args:
-            days (int): The number of days to look ahead for upcoming birthdays.
+            days (int): The number of days to look ahead for upcoming birthdays, today included.
+            skip (int): Number of records to skip for pagination. Default is 0.
+            limit (int): Maximum number of records to retrieve. Default is 100.
+            today (Optional[date]): The first day of the window. Defaults to the current date.
 
         Returns:
             List[Contact]: A list of contacts with upcoming birthdays.
         """
-        today = date.today()
-        end_date = today + timedelta(days=days)
-
-        query = (
-            select(Contact)
-            .where(
-                or_(
-                    func.date_part("day", Contact.birthday_date).between(
-                        func.date_part("day", today), func.date_part("day", end_date)
-                    ),
-                    and_(
-                        func.date_part("day", end_date) < func.date_part("day", today),
-                        or_(
-                            func.date_part("day", Contact.birthday_date) >= func.date_part("day", today),
-                            func.date_part("day", Contact.birthday_date) <= func.date_part("day", end_date),
-                        ),
-                    ),
+        today = today or date.today()
+        start = birthday_mmdd(today)
+        query = select(Contact)
+        if days < 365:
+            end_date = today + timedelta(days=days)
+            end = birthday_mmdd(end_date)
+            if end == 228 and not calendar.isleap(end_date.year):
+                end = 229
+            if start <= end:
+                query = query.where(Contact.birthday_mmdd.between(start, end))
+            else:
+                query = query.where(
+                    or_(Contact.birthday_mmdd >= start, Contact.birthday_mmdd <= end)
                 )
-            )
-            .order_by(func.date_part("day", Contact.birthday_date).asc())
-        )
+        next_year_first = case((Contact.birthday_mmdd < start, 1), else_=0)
+        query = query.order_by(next_year_first, Contact.birthday_mmdd, Contact.id)
 
-        result = await self._db_session.execute(query)
-        return list(result.scalars().all())
\ No newline at end of file
+        result = await self._db_session.execute(query.offset(skip).limit(limit))
+        return list(result.scalars().all())
@@ -0,0 +1,245 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import exists, select, update, or_, and_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from src.db.models import OutboxEmail
+
+
+class OutboxRepository:
+    """
+    Repository class for the email outbox.
+
+    Attributes:
+        db (AsyncSession): The database session used for executing queries.
+    """
+
+    def __init__(self, session: AsyncSession):
+        """
+        Initialize the OutboxRepository with a database session.
+
+        Args:
+            session (AsyncSession): The asynchronous database session.
+        """
+        self.db = session
+
+    async def stage_pending(
+        self, kind: str, recipient: str, payload: dict, now: datetime, dedupe_key: str
+    ) -> bool:
+        """
+        Queue an email, or merge it into the pending email with the same key, atomically.
+
+        The row is written with `INSERT ... ON CONFLICT (dedupe_key) WHERE status = 'pending'
+        DO UPDATE`, backed by the partial unique index `ux_email_outbox_pending_dedupe_key`:
+        a pending email takes over the payload and counts the request as suppressed,
+        otherwise a new email is queued. Concurrent requests cannot both queue one.
+        Emails being sent or already sent are left alone.
+
+        Args:
+            kind (str): What to send.
+            recipient (str): Email address of the recipient.
+            payload (dict): Template variables of the email.
+            now (datetime): The current time (naive UTC).
+            dedupe_key (str): Key under which repeated requests are merged.
+
+        Returns:
+            bool: `True` if a new email was queued, `False` if it was merged.
+        """
+        dialect = postgresql if self.db.bind.dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(OutboxEmail).values(
+            kind=kind,
+            recipient=recipient,
+            payload=payload,
+            dedupe_key=dedupe_key,
+            suppressed=0,
+            status="pending",
+            attempts=0,
+            available_at=now,
+            created_at=now,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OutboxEmail.dedupe_key],
+            index_where=OutboxEmail.status == "pending",
+            set_={"payload": stmt.excluded.payload, "suppressed": OutboxEmail.suppressed + 1},
+        ).returning(OutboxEmail.suppressed)
+        result = await self.db.execute(stmt)
+        return result.scalar_one() == 0
+
+    async def get_recent(self, dedupe_key: str, since: datetime) -> Optional[OutboxEmail]:
+        """
+        Retrieve the latest email queued under a key since a given time, unless it failed.
+
+        Args:
+            dedupe_key (str): The coalescing key.
+            since (datetime): Start of the coalescing window (naive UTC).
+
+        Returns:
+            Optional[OutboxEmail]: The email, or None.
+        """
+        stmt = (
+            select(OutboxEmail)
+            .where(
+                OutboxEmail.dedupe_key == dedupe_key,
+                OutboxEmail.created_at >= since,
+                OutboxEmail.status != "failed",
+            )
+            .order_by(OutboxEmail.id.desc())
+            .limit(1)
+        )
+        result = await self.db.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def coalesce(self, email_id: int) -> None:
+        """
+        Count a repeated request against an email.
+
+        Args:
+            email_id (int): The ID of the email.
+        """
+        await self.db.execute(
+            update(OutboxEmail)
+            .where(OutboxEmail.id == email_id)
+            .values(suppressed=OutboxEmail.suppressed + 1)
+        )
+
+    async def claim_batch(self, limit: int, now: datetime, lease_seconds: int) -> List[OutboxEmail]:
+        """
+        Claim due emails for delivery and commit the claim.
+
+        Emails that are pending and due are claimed, as well as emails claimed more
+        than `lease_seconds` ago, whose worker is assumed to have crashed. On
+        PostgreSQL rows locked by another worker are skipped (`FOR UPDATE SKIP LOCKED`),
+        so concurrent workers claim disjoint batches without waiting on each other.
+        SQLite has no row locks; its single writer lock serializes the claiming
+        statements instead.
+
+        Args:
+            limit (int): Maximum number of emails to claim.
+            now (datetime): The current time (naive UTC).
+            lease_seconds (int): How long a claim stays valid.
+
+        Returns:
+            List[OutboxEmail]: The claimed emails, detached from the session.
+        """
+        due = (
+            select(OutboxEmail.id)
+            .where(
+                or_(
+                    and_(OutboxEmail.status == "pending", OutboxEmail.available_at <= now),
+                    and_(
+                        OutboxEmail.status == "sending",
+                        OutboxEmail.claimed_at <= now - timedelta(seconds=lease_seconds),
+                    ),
+                )
+            )
+            .order_by(OutboxEmail.available_at, OutboxEmail.id)
+            .limit(limit)
+        )
+        if self.db.bind.dialect.name == "postgresql":
+            due = due.with_for_update(skip_locked=True)
+        stmt = (
+            update(OutboxEmail)
+            .where(OutboxEmail.id.in_(due.scalar_subquery()))
+            .values(status="sending", claimed_at=now, attempts=OutboxEmail.attempts + 1)
+            .returning(OutboxEmail)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(stmt)
+        emails = list(result.scalars().all())
+        await self.db.commit()
+        # Outcomes are written by ID; detached, the emails survive a rolled back outcome.
+        self.db.expunge_all()
+        return emails
+
+    async def mark_sent(self, email_id: int, now: datetime) -> None:
+        """
+        Record a delivered email.
+
+        Args:
+            email_id (int): The ID of the email.
+            now (datetime): The delivery time (naive UTC).
+        """
+        await self.db.execute(
+            update(OutboxEmail)
+            .where(OutboxEmail.id == email_id)
+            .values(status="sent", sent_at=now, last_error=None)
+        )
+
+    async def mark_retry(self, email_id: int, error: str, available_at: datetime) -> bool:
+        """
+        Put a failed email back in the queue, or fold it into a newer pending email.
+
+        While the email was being sent, a new request may have queued another pending
+        email under the same key. Only one pending email per key is allowed, so the
+        failed email is then marked as superseded, and the pending one, which carries
+        the newer payload, counts it and its own merged requests as suppressed. The
+        email goes back to pending with a guarded `UPDATE ... WHERE NOT EXISTS`, so it
+        never violates `ux_email_outbox_pending_dedupe_key`.
+
+        Args:
+            email_id (int): The ID of the email.
+            error (str): The delivery error.
+            available_at (datetime): When the next attempt is due (naive UTC).
+
+        Returns:
+            bool: `True` if the email was queued again, `False` if it was folded into a
+                pending email.
+        """
+        pending = aliased(OutboxEmail)
+        requeue = (
+            update(OutboxEmail)
+            .where(
+                OutboxEmail.id == email_id,
+                ~exists().where(
+                    pending.dedupe_key == OutboxEmail.dedupe_key, pending.status == "pending"
+                ),
+            )
+            .values(status="pending", available_at=available_at, last_error=error)
+        )
+        if (await self.db.execute(requeue)).rowcount:
+            return True
+
+        failed = aliased(OutboxEmail)
+        key = select(failed.dedupe_key).where(failed.id == email_id).scalar_subquery()
+        merged = select(failed.suppressed + 1).where(failed.id == email_id).scalar_subquery()
+        await self.db.execute(
+            update(OutboxEmail)
+            .where(OutboxEmail.status == "pending", OutboxEmail.dedupe_key == key)
+            .values(suppressed=OutboxEmail.suppressed + merged)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.execute(
+            update(OutboxEmail)
+            .where(OutboxEmail.id == email_id)
+            .values(status="failed", last_error=f"Superseded by a newer request after: {error}")
+        )
+        return False
+
+    async def rollback(self) -> None:
+        """
+        Roll back the current transaction.
+        """
+        await self.db.rollback()
+
+    async def mark_failed(self, email_id: int, error: str) -> None:
+        """
+        Give up on an email.
+
+        Args:
+            email_id (int): The ID of the email.
+            error (str): The last delivery error.
+        """
+        await self.db.execute(
+            update(OutboxEmail)
+            .where(OutboxEmail.id == email_id)
+            .values(status="failed", last_error=error)
+        )
+
+    async def commit(self) -> None:
+        """
+        Commit the current transaction.
+        """
+        await self.db.commit()
@@ -0,0 +1,124 @@
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import RefreshToken, User
+
+
+class RefreshTokenRepository:
+    """
+    Repository class for managing refresh tokens in the database.
+
+    Attributes:
+        db (AsyncSession): The database session used for executing queries.
+    """
+
+    def __init__(self, session: AsyncSession):
+        """
+        Initialize the RefreshTokenRepository with a database session.
+
+        Args:
+            session (AsyncSession): The asynchronous database session.
+        """
+        self.db = session
+
+    def add(
+        self, user_id: int, token_hash: str, family_id: str, expires_at: datetime
+    ) -> RefreshToken:
+        """
+        Store a new refresh token without committing.
+
+        Args:
+            user_id (int): The owner of the token.
+            token_hash (str): The HMAC digest of the token.
+            family_id (str): The token family.
+            expires_at (datetime): Expiration timestamp (naive UTC).
+
+        Returns:
+            RefreshToken: The pending refresh token row.
+        """
+        token = RefreshToken(
+            user_id=user_id,
+            token_hash=token_hash,
+            family_id=family_id,
+            expires_at=expires_at,
+        )
+        self.db.add(token)
+        return token
+
+    async def get_with_user(
+        self, token_hash: str
+    ) -> Optional[Tuple[RefreshToken, User]]:
+        """
+        Retrieve a refresh token and its owner in one indexed lookup.
+
+        Args:
+            token_hash (str): The HMAC digest of the token.
+
+        Returns:
+            Optional[Tuple[RefreshToken, User]]: The token and its user, or `None` if unknown.
+        """
+        stmt = (
+            select(RefreshToken, User)
+            .join(User, RefreshToken.user_id == User.id)
+            .where(RefreshToken.token_hash == token_hash)
+        )
+        result = await self.db.execute(stmt)
+        return result.tuples().one_or_none()
+
+    async def mark_used(self, token_id: int, used_at: datetime) -> bool:
+        """
+        Mark a refresh token as rotated, unless it already was.
+
+        Args:
+            token_id (int): The ID of the token.
+            used_at (datetime): Rotation timestamp (naive UTC).
+
+        Returns:
+            bool: `True` if this call rotated the token, `False` if it had already been used.
+        """
+        stmt = (
+            update(RefreshToken)
+            .where(RefreshToken.id == token_id, RefreshToken.used_at.is_(None))
+            .values(used_at=used_at)
+        )
+        result = await self.db.execute(stmt)
+        return result.rowcount == 1
+
+    async def revoke_family(self, family_id: str, revoked_at: datetime) -> None:
+        """
+        Revoke every token of a family.
+
+        Args:
+            family_id (str): The token family.
+            revoked_at (datetime): Revocation timestamp (naive UTC).
+        """
+        stmt = (
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=revoked_at)
+        )
+        await self.db.execute(stmt)
+
+    async def revoke_user(self, user_id: int, revoked_at: datetime) -> None:
+        """
+        Revoke every token of a user.
+
+        Args:
+            user_id (int): The owner of the tokens.
+            revoked_at (datetime): Revocation timestamp (naive UTC).
+        """
+        stmt = (
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=revoked_at)
+        )
+        await self.db.execute(stmt)
+
+    async def commit(self) -> None:
+        """
+        Commit the pending changes.
+        """
+        await self.db.commit()
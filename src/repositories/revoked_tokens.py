@@ -0,0 +1,77 @@
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import select, delete, exists
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import RevokedToken
+
+
+class RevokedTokenRepository:
+    """
+    Repository class for the access token denylist.
+
+    Attributes:
+        db (AsyncSession): The database session used for executing queries.
+    """
+
+    def __init__(self, session: AsyncSession):
+        """
+        Initialize the RevokedTokenRepository with a database session.
+
+        Args:
+            session (AsyncSession): The asynchronous database session.
+        """
+        self.db = session
+
+    async def add(self, jti: str, expires_at: datetime) -> None:
+        """
+        Revoke a token. Revoking a token twice is a no-op.
+
+        Args:
+            jti (str): The `jti` claim of the token.
+            expires_at (datetime): Expiration timestamp of the token (naive UTC).
+        """
+        self.db.add(RevokedToken(jti=jti, expires_at=expires_at))
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+
+    async def is_revoked(self, jti: str) -> bool:
+        """
+        Check the denylist with a primary key lookup.
+
+        Args:
+            jti (str): The `jti` claim of the token.
+
+        Returns:
+            bool: `True` if the token is revoked.
+        """
+        result = await self.db.execute(select(exists().where(RevokedToken.jti == jti)))
+        return result.scalar()
+
+    async def get_active_jtis(self, now: datetime) -> List[str]:
+        """
+        Retrieve the IDs of revoked tokens that have not expired yet.
+
+        Args:
+            now (datetime): The current time (naive UTC).
+
+        Returns:
+            List[str]: The `jti` claims.
+        """
+        stmt = select(RevokedToken.jti).where(RevokedToken.expires_at > now)
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def delete_expired(self, now: datetime) -> None:
+        """
+        Drop denylist entries of tokens that have expired anyway.
+
+        Args:
+            now (datetime): The current time (naive UTC).
+        """
+        await self.db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        await self.db.commit()
@@ -1,4 +1,5 @@
-from sqlalchemy import select
+from sqlalchemy import select, update, insert, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.db.models import User
 from src.schemas import UserCreate
@@ -37,6 +38,20 @@ class UserRepository:
         user = await self.db.execute(stmt)
         return user.scalar_one_or_none()
 
+    async def get_token_version(self, user_id: int) -> int | None:
+        """
+        Retrieve only the token version of a user.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            int | None: The current token version, or `None` if no user exists with the given ID.
+        """
+        stmt = select(User.token_version).filter_by(id=user_id)
+        version = await self.db.execute(stmt)
+        return version.scalar_one_or_none()
+
     async def get_user_by_username(self, username: str) -> User | None:
         """
         Retrieve a user by their username.
@@ -69,24 +84,62 @@ class UserRepository:
         """
         Create a new user.
 
+        The row is inserted with `INSERT ... RETURNING` and committed, without a
+        separate refresh query.
+
         Args:
             body (UserCreate): The data for the new user.
             avatar (str, optional): The URL of the user's avatar. Defaults to `None`.
 
         Returns:
             User: The newly created user object.
+
+        Raises:
+            IntegrityError: If the email or username is already taken. The session is
+                rolled back before the error is re-raised.
         """
-        user = User(
-            **body.model_dump(exclude_unset=True, exclude={"password"}),
-            hashed_password=body.password,
-            avatar=avatar
+        stmt = (
+            insert(User)
+            .values(
+                **body.model_dump(exclude_unset=True, exclude={"password"}),
+                hashed_password=body.password,
+                avatar=avatar,
+            )
+            .returning(User)
         )
-        self.db.add(user)
-        await self.db.commit()
-        await self.db.refresh(user)
+        try:
+            result = await self.db.execute(stmt)
+            user = result.scalar_one()
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise
         return user
 
-    async def confirm_email(self, email: str) -> None:
+    async def find_conflict(self, email: str, username: str) -> str | None:
+        """
+        Find out which unique field of a new user is already taken, in one query.
+
+        Args:
+            email (str): The email address of the new user.
+            username (str): The username of the new user.
+
+        Returns:
+            str | None: `"email"` or `"username"` (email wins if both are taken),
+            or `None` if neither is taken.
+        """
+        stmt = select(User.email == email, User.username == username).where(
+            or_(User.email == email, User.username == username)
+        )
+        result = await self.db.execute(stmt)
+        rows = result.all()
+        if any(email_taken for email_taken, _ in rows):
+            return "email"
+        if rows:
+            return "username"
+        return None
+
+    async def confirm_email(self, email: str) -> User:
         """
         Confirm a user's email address.
 
@@ -94,11 +147,12 @@ class UserRepository:
             email (str): The email address to confirm.
 
         Returns:
-            None
+            User: The confirmed user.
         """
         user = await self.get_user_by_email(email)
         user.confirmed = True
         await self.db.commit()
+        return user
 
     async def update_avatar_url(self, email: str, url: str) -> User:
         """
@@ -115,4 +169,42 @@ class UserRepository:
         user.avatar = url
         await self.db.commit()
         await self.db.refresh(user)
-        return user
\ No newline at end of file
+        return user
+
+    async def reset_password(self, user_id: int, hashed_password: str) -> User | None:
+        """
+        Replace the password hash of a user.
+
+        The token version is bumped so every claims token issued before is rejected.
+
+        Args:
+            user_id (int): The ID of the user.
+            hashed_password (str): The new password hash.
+
+        Returns:
+            User | None: The updated user object, or `None` if no user exists with the given ID.
+        """
+        user = await self.get_user_by_id(user_id)
+        if user is None:
+            return None
+        user.hashed_password = hashed_password
+        user.token_version += 1
+        await self.db.commit()
+        return user
+
+    async def update_password_hash(self, user_id: int, hashed_password: str) -> None:
+        """
+        Replace the password hash of a user without revoking their tokens.
+
+        Used to upgrade the hash of an unchanged password to the current bcrypt cost.
+
+        Args:
+            user_id (int): The ID of the user.
+            hashed_password (str): The new hash of the same password.
+
+        Returns:
+            None
+        """
+        stmt = update(User).where(User.id == user_id).values(hashed_password=hashed_password)
+        await self.db.execute(stmt)
+        await self.db.commit()
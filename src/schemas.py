@@ -1,7 +1,9 @@
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
 
+from src.db.models import Role
+
 class ContactModel(BaseModel):
     """
     Represents the base model for a contact.
@@ -36,6 +38,53 @@ class ContactResponse(ContactModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class ContactBulkResult(BaseModel):
+    """
+    Represents the outcome for one item of a bulk contact creation.
+
+    Attributes:
+        index (int): Position of the item in the request.
+        status (str): `"created"`, `"upserted"` (created or updated by an upsert),
+            `"conflict"` if the email or phone number is taken by an existing contact
+            or an earlier item, or `"invalid"`.
+        contact (Optional[ContactResponse]): The created contact. Default is None.
+        error (Optional[str]): Why the item was not written. Default is None.
+    """
+    index: int
+    status: Literal["created", "upserted", "conflict", "invalid"]
+    contact: Optional[ContactResponse] = None
+    error: Optional[str] = None
+
+class ContactBulkResponse(BaseModel):
+    """
+    Represents the response of a bulk contact creation.
+
+    Attributes:
+        created (int): Number of created contacts.
+        conflicts (int): Number of items skipped because of a conflict.
+        invalid (int): Number of items that failed validation.
+        results (List[ContactBulkResult]): One result per item, in request order.
+    """
+    created: int
+    conflicts: int
+    invalid: int
+    results: List[ContactBulkResult]
+
+class ContactUpsertResponse(BaseModel):
+    """
+    Represents the response of a bulk contact upsert.
+
+    Attributes:
+        upserted (int): Number of created or updated contacts.
+        conflicts (int): Number of items skipped because of a conflict.
+        invalid (int): Number of items that failed validation.
+        results (List[ContactBulkResult]): One result per item, in request order.
+    """
+    upserted: int
+    conflicts: int
+    invalid: int
+    results: List[ContactBulkResult]
+
 class User(BaseModel):
     """
     Represents the user model for API responses.
@@ -53,6 +102,23 @@ class User(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class Principal(BaseModel):
+    """
+    Represents the authenticated caller as carried by the access token claims.
+
+    Attributes:
+        id (int): The unique identifier of the user.
+        username (str): The username of the user.
+        email (str): The email address of the user.
+        role (Role): The role of the user.
+    """
+    id: int
+    username: str
+    email: str
+    role: Role
+
+    model_config = ConfigDict(from_attributes=True)
+
 class UserCreate(BaseModel):
     """
     Represents the model for creating a new user.
@@ -73,9 +139,20 @@ class Token(BaseModel):
     Attributes:
         access_token (str): The access token for the user.
         token_type (str): The type of the token (e.g., "bearer").
+        refresh_token (Optional[str]): The refresh token used to renew the access token.
     """
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshTokenRequest(BaseModel):
+    """
+    Represents a request to renew an access token.
+
+    Attributes:
+        refresh_token (str): The refresh token issued by login or a previous refresh.
+    """
+    refresh_token: str
 
 class RequestEmail(BaseModel):
     """
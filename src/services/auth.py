@@ -1,24 +1,33 @@
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
-from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
+from sqlalchemy import inspect
 
 from src.db.db import get_db
 from src.conf.config import config
+from src.services.cache import principal_cache, token_version_cache
+from src.services.revocation import revocation_list
+from src.services import hashing
 from src.services.users import UserService
 from src.db.models import User, Role
+from src.schemas import Principal
 
 
 class Hash:
     """
     A utility class for hashing and verifying passwords using bcrypt.
+
+    The `*_async` methods run bcrypt in the bounded hashing pool so request
+    handlers never block the event loop; the synchronous methods remain for
+    scripts and tests.
     """
 
-    _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    _pwd_context = hashing.pwd_context
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """
@@ -57,6 +66,51 @@ class Hash:
         """
         return self._pwd_context.hash(password)
 
+    def needs_update(self, hashed_password: str) -> bool:
+        """
+        Check whether a hash uses another cost than `BCRYPT_ROUNDS`.
+
+        Args:
+            hashed_password (str): The hashed password.
+
+        Returns:
+            bool: True if the hash should be recomputed.
+        """
+        return hashing.needs_rehash(hashed_password)
+
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verify a plain-text password in the hashing pool.
+
+        Args:
+            plain_password (str): The plain-text password.
+            hashed_password (str): The hashed password.
+
+        Returns:
+            bool: True if the password matches, False otherwise.
+
+        Raises:
+            PoolSaturatedError: If the hashing pool is saturated.
+        """
+        return await hashing.hash_pool.run(
+            hashing.verify_password, plain_password, hashed_password
+        )
+
+    async def get_pwd_hash_async(self, password: str) -> str:
+        """
+        Hash a plain-text password in the hashing pool.
+
+        Args:
+            password (str): The plain-text password to hash.
+
+        Returns:
+            str: The hashed password.
+
+        Raises:
+            PoolSaturatedError: If the hashing pool is saturated.
+        """
+        return await hashing.hash_pool.run(hashing.hash_password, password)
+
 
 # OAuth2 configuration for token validation
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
@@ -66,6 +120,8 @@ async def create_access_token(data: dict, expires_delta: Optional[int] = None) -
     """
     Create a new JWT access token.
 
+    Every token gets a unique `jti` claim so it can be revoked individually.
+
     Args:
         data (dict): The data to encode into the token.
         expires_delta (Optional[int]): Optional expiration time in seconds. Defaults to the value from configuration.
@@ -80,15 +136,121 @@ async def create_access_token(data: dict, expires_delta: Optional[int] = None) -
         else timedelta(seconds=config.JWT_EXPIRATION_SECONDS)
     )
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     return jwt.encode(to_encode, config.JWT_SECRET, algorithm=config.JWT_ALGO)
 
 
+def build_access_claims(user: User) -> dict:
+    """
+    Build the claims of an access token for a user.
+
+    With `JWT_CLAIMS_TOKENS` enabled the token also carries the user ID, email,
+    role and token version, so `get_current_principal` can authorize from the
+    claims alone. Otherwise only the username is included.
+
+    Args:
+        user (User): The authenticated user.
+
+    Returns:
+        dict: The claims to pass to `create_access_token`.
+    """
+    if not config.JWT_CLAIMS_TOKENS:
+        return {"sub": user.username}
+    return {
+        "sub": user.username,
+        "uid": user.id,
+        "email": user.email,
+        "role": Role(user.role).value,
+        "ver": user.token_version,
+    }
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Unable to validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _decode_access_token(token: str) -> dict:
+    try:
+        payload = jwt.decode(token, config.JWT_SECRET, algorithms=[config.JWT_ALGO])
+    except JWTError:
+        raise _credentials_exception()
+    if not payload.get("sub"):
+        raise _credentials_exception()
+    return payload
+
+
+async def _authenticate_token(token: str, db: AsyncSession) -> dict:
+    payload = _decode_access_token(token)
+    jti = payload.get("jti")
+    if jti and await revocation_list.is_revoked(jti, db):
+        raise _credentials_exception()
+    return payload
+
+
+async def revoke_access_token(token: str, db: AsyncSession) -> None:
+    """
+    Revoke a valid access token until it expires.
+
+    Args:
+        token (str): The JWT access token.
+        db (AsyncSession): The database session.
+
+    Raises:
+        HTTPException: If the token is invalid, already revoked or has no `jti` claim.
+    """
+    payload = await _authenticate_token(token, db)
+    if not payload.get("jti"):
+        raise _credentials_exception()
+    expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc).replace(tzinfo=None)
+    await revocation_list.revoke(payload["jti"], expires_at, db)
+
+
+async def get_cached_user(username: str) -> Optional[User]:
+    """
+    Look up a user in the principal cache.
+
+    Args:
+        username (str): The username of the user.
+
+    Returns:
+        Optional[User]: A detached user object rebuilt from the cache, or `None` on a miss.
+    """
+    data = await principal_cache.get(username)
+    if data is None:
+        return None
+    return User(**data)
+
+
+async def cache_user(user: User) -> None:
+    """
+    Store a snapshot of the user in the principal cache.
+
+    The password hash is never cached.
+
+    Args:
+        user (User): The user loaded from the database.
+    """
+    data = {
+        attr.key: getattr(user, attr.key)
+        for attr in inspect(User).column_attrs
+        if attr.key != "hashed_password"
+    }
+    await principal_cache.set(user.username, data)
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
 ):
     """
     Retrieve the currently authenticated user from the access token.
 
+    The user is served from the principal cache when possible, so most requests
+    do not query the database. Revoked tokens are rejected.
+
     Args:
         token (str): The JWT token provided via OAuth2 scheme.
         db (AsyncSession): The database session.
@@ -99,25 +261,60 @@ async def get_current_user(
     Raises:
         HTTPException: If the token is invalid or the user cannot be authenticated.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Unable to validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    payload = await _authenticate_token(token, db)
+    username = payload["sub"]
+
+    user = await get_cached_user(username)
+    if user is None:
+        user_service = UserService(db)
+        user = await user_service.get_user_by_username(username)
+        if not user:
+            raise _credentials_exception()
+        await cache_user(user)
+
+    if "ver" in payload and payload["ver"] != user.token_version:
+        raise _credentials_exception()
+    return user
 
-    try:
-        payload = jwt.decode(token, config.JWT_SECRET, algorithms=[config.JWT_ALGO])
-        username = payload.get("sub")
-        if not username:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
 
-    user_service = UserService(db)
-    user = await user_service.get_user_by_username(username)
-    if not user:
-        raise credentials_exception
-    return user
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """
+    Retrieve the authenticated caller from the access token claims.
+
+    Claims tokens are authorized without loading the user: only the token version
+    is compared with the cached one, and the database is queried when that cache
+    entry is missing. Tokens without claims fall back to `get_current_user`.
+
+    Args:
+        token (str): The JWT token provided via OAuth2 scheme.
+        db (AsyncSession): The database session.
+
+    Returns:
+        Principal: The authenticated caller.
+
+    Raises:
+        HTTPException: If the token is invalid or has been superseded.
+    """
+    payload = await _authenticate_token(token, db)
+    if not {"uid", "email", "role", "ver"} <= payload.keys():
+        user = await get_current_user(token, db)
+        return Principal.model_validate(user)
+
+    user_id = payload["uid"]
+    version = await token_version_cache.get(str(user_id))
+    if version is None:
+        version = await UserService(db).get_token_version(user_id)
+        if version is None:
+            raise _credentials_exception()
+        await token_version_cache.set(str(user_id), version)
+
+    if payload["ver"] != version:
+        raise _credentials_exception()
+    return Principal(
+        id=user_id, username=payload["sub"], email=payload["email"], role=payload["role"]
+    )
 
 
 def create_email_token(data: dict) -> str:
@@ -176,7 +373,7 @@ async def get_password_from_token(token: str) -> str:
     """
     try:
         payload = jwt.decode(
-            token, config.JWT_SECRET, algorithms=[config.JWT_ALGORITHM]
+            token, config.JWT_SECRET, algorithms=[config.JWT_ALGO]
         )
         password = payload["password"]
         return password
@@ -199,4 +396,24 @@ def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
     """
     if current_user.role != Role.ADMIN:
         raise HTTPException(status_code=403, detail="Access denied")
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def get_admin_principal(
+    principal: Principal = Depends(get_current_principal),
+) -> Principal:
+    """
+    Get current admin caller without loading the user
+
+    Args:
+        principal (Principal, optional): Current caller. Defaults to Depends(get_current_principal).
+
+    Returns:
+        Principal: Admin caller
+
+    Raises:
+        HTTPException: If the caller is not an admin.
+    """
+    if principal.role != Role.ADMIN:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return principal
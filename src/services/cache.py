@@ -1,13 +1,205 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
 from aiocache import caches
 
+from src.conf.config import config
+
+logger = logging.getLogger(__name__)
+
 caches.set_config({
     "default": {
         "cache": "aiocache.RedisCache",
-        "endpoint": "localhost",
-        "port": 6379,
+        "endpoint": config.REDIS_HOST,
+        "port": config.REDIS_PORT,
         "timeout": 10,
         "serializer": {
             "class": "aiocache.serializers.PickleSerializer"
         },
     }
 })
+
+
+class TwoTierCache:
+    """
+    A two-tier cache: an in-process TTL/LRU layer in front of the shared Redis cache.
+
+    Lookups hit the local layer first, then Redis, and only report a miss when both
+    are empty. Redis errors never propagate: the cache logs them, backs off for
+    `REDIS_RETRY_SECONDS` and keeps serving from the local layer.
+
+    Local entries are not invalidated in other worker processes, so the local TTL
+    should be kept short; the Redis TTL bounds the staleness across workers.
+
+    Attributes:
+        namespace (str): Prefix for all keys stored by this cache.
+        ttl (int): Time to live of Redis entries, in seconds.
+        local_ttl (int): Time to live of in-process entries, in seconds.
+        max_size (int): Maximum number of in-process entries before LRU eviction.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: int,
+        local_ttl: int,
+        max_size: int,
+        backend: Any = None,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            namespace (str): Prefix for all keys stored by this cache.
+            ttl (int): Time to live of Redis entries, in seconds.
+            local_ttl (int): Time to live of in-process entries, in seconds.
+            max_size (int): Maximum number of in-process entries.
+            backend (Any, optional): aiocache backend to use instead of the configured
+                `default` Redis cache. Mostly useful for tests.
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.max_size = max_size
+        self._backend = backend
+        self._local: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._redis_down_until = 0.0
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+
+    def _redis(self):
+        """
+        Return the Redis backend, or `None` if it is disabled or backing off.
+        """
+        if self._backend is not None:
+            return self._backend
+        if not config.REDIS_CACHE_ENABLED or time.monotonic() < self._redis_down_until:
+            return None
+        return caches.get("default")
+
+    def _redis_failed(self, err: Exception) -> None:
+        self.redis_errors += 1
+        self._redis_down_until = time.monotonic() + config.REDIS_RETRY_SECONDS
+        logger.warning("Redis cache '%s' is unavailable: %s", self.namespace, err)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _set_local(self, key: str, value: Any) -> None:
+        self._local[key] = (time.monotonic() + self.local_ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a value in the local layer, then in Redis.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[Any]: The cached value, or `None` on a miss.
+        """
+        entry = self._local.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(key)
+                self.local_hits += 1
+                return value
+            del self._local[key]
+
+        redis = self._redis()
+        if redis is not None:
+            try:
+                value = await redis.get(self._key(key))
+            except Exception as err:
+                self._redis_failed(err)
+            else:
+                if value is not None:
+                    self.redis_hits += 1
+                    self._set_local(key, value)
+                    return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        """
+        Store a value in both layers.
+
+        Args:
+            key (str): The cache key.
+            value (Any): A picklable value.
+        """
+        self._set_local(key, value)
+        redis = self._redis()
+        if redis is not None:
+            try:
+                await redis.set(self._key(key), value, ttl=self.ttl)
+            except Exception as err:
+                self._redis_failed(err)
+
+    async def delete(self, key: str) -> None:
+        """
+        Remove a value from both layers.
+
+        Args:
+            key (str): The cache key.
+        """
+        self._local.pop(key, None)
+        redis = self._redis()
+        if redis is not None:
+            try:
+                await redis.delete(self._key(key))
+            except Exception as err:
+                self._redis_failed(err)
+
+    def clear_local(self) -> None:
+        """
+        Drop every in-process entry.
+        """
+        self._local.clear()
+
+    def stats(self) -> dict:
+        """
+        Return hit/miss counters for this cache.
+
+        Returns:
+            dict: Counters and the current size of the local layer.
+        """
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "redis_errors": self.redis_errors,
+            "hit_ratio": round((lookups - self.misses) / lookups, 4) if lookups else 0.0,
+            "local_size": len(self._local),
+        }
+
+
+principal_cache = TwoTierCache(
+    "principal",
+    ttl=config.PRINCIPAL_CACHE_TTL_SECONDS,
+    local_ttl=config.PRINCIPAL_CACHE_LOCAL_TTL_SECONDS,
+    max_size=config.PRINCIPAL_CACHE_MAX_SIZE,
+)
+"""
+Cache of authenticated users keyed by username, used by `get_current_user`.
+"""
+
+token_version_cache = TwoTierCache(
+    "token_version",
+    ttl=config.PRINCIPAL_CACHE_TTL_SECONDS,
+    local_ttl=config.PRINCIPAL_CACHE_LOCAL_TTL_SECONDS,
+    max_size=config.PRINCIPAL_CACHE_MAX_SIZE,
+)
+"""
+Cache of the current token version keyed by user ID, used by `get_current_principal`.
+"""
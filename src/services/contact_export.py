@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import Any, AsyncContextManager, AsyncIterator, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.repositories.contacts import ContactRepository
+from src.schemas import ContactResponse
+
+EXPORT_COLUMNS = list(ContactResponse.model_fields)
+"""
+Columns of an exported contact, the fields of `ContactResponse` in order.
+"""
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+"""
+Content type of every export format.
+"""
+
+
+def _value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def _ndjson(rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, map(_value, row)))) + "\n" for row in rows
+    )
+
+
+def _csv(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(
+        [_value(value) for value in row] for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def export_contacts(
+    session_factory: Callable[[], AsyncContextManager[AsyncSession]],
+    fmt: str,
+    first_name: str = "",
+    last_name: str = "",
+    email: str = "",
+    batch_size: int = 1000,
+) -> AsyncIterator[str]:
+    """
+    Serialize the contacts matching the filters as NDJSON or CSV, one batch at a time.
+
+    Rows come from `ContactRepository.stream_contacts` and are written straight from
+    the fetched tuples, without ORM objects or response models, so memory use depends
+    on `batch_size` only. The session is opened here and stays open for as long as
+    the export is consumed. The CSV output starts with a header row, and can be fed
+    back to the contact import.
+
+    Args:
+        session_factory (Callable[[], AsyncContextManager[AsyncSession]]): Opens a
+            database session, e.g. `sessionmanager.session`.
+        fmt (str): `"ndjson"` or `"csv"`.
+        first_name (str): Filter by first name (substring match).
+        last_name (str): Filter by last name (substring match).
+        email (str): Filter by email (substring match).
+        batch_size (int): Rows fetched and serialized together.
+
+    Yields:
+        str: The next piece of the document.
+    """
+    serialize = _csv if fmt == "csv" else _ndjson
+    if fmt == "csv":
+        yield _csv([EXPORT_COLUMNS])
+    async with session_factory() as session:
+        batches = ContactRepository(session).stream_contacts(
+            first_name, last_name, email, EXPORT_COLUMNS, batch_size
+        )
+        async for batch in batches:
+            yield serialize(batch)
@@ -0,0 +1,252 @@
+import argparse
+import asyncio
+import codecs
+import csv
+import json
+import logging
+import sys
+from typing import AsyncContextManager, AsyncIterator, Callable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf.config import config
+from src.db.db import sessionmanager
+from src.services.contacts import ContactService
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json": "ndjson",
+    "text/csv": "csv",
+}
+"""
+Import format of every accepted content type.
+"""
+
+MAX_RECORD_CHARS = 64 * 1024
+"""
+Longest accepted record. Bounds the memory a single malformed line can take.
+"""
+
+READ_CHUNK_BYTES = 64 * 1024
+
+Record = Tuple[int, Optional[dict], Optional[str]]
+"""
+A parsed row: its line number, and either its fields or why it could not be parsed.
+"""
+
+
+class ImportFormatError(ValueError):
+    """
+    Raised when an import stream cannot be parsed any further.
+    """
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending, line_no = "", 0
+    async for chunk in chunks:
+        try:
+            pending += decoder.decode(chunk)
+        except UnicodeDecodeError as err:
+            raise ImportFormatError(f"Line {line_no + 1}: not valid UTF-8 ({err.reason})")
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, line.rstrip("\r")
+        if len(pending) > MAX_RECORD_CHARS:
+            raise ImportFormatError(f"Line {line_no + 1}: longer than {MAX_RECORD_CHARS} characters")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield line_no + 1, pending.rstrip("\r")
+
+
+async def _parse_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    async for line_no, line in _iter_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as err:
+            yield line_no, None, f"Invalid JSON: {err}"
+            continue
+        if isinstance(row, dict):
+            yield line_no, row, None
+        else:
+            yield line_no, None, "Expected a JSON object"
+
+
+async def _parse_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    header: Optional[List[str]] = None
+    record, start = "", 0
+    async for line_no, line in _iter_lines(chunks):
+        # A record continues on the next line while one of its quoted fields is open.
+        record, start = (f"{record}\n{line}", start) if record else (line, line_no)
+        if record.count('"') % 2:
+            if len(record) > MAX_RECORD_CHARS:
+                raise ImportFormatError(f"Line {start}: unterminated quoted field")
+            continue
+        fields, record = next(csv.reader([record])) if record.strip() else [], ""
+        if not fields:
+            continue
+        if header is None:
+            header = [name.strip().lower() for name in fields]
+            continue
+        if len(fields) != len(header):
+            yield start, None, f"Expected {len(header)} fields, got {len(fields)}"
+            continue
+        yield start, {name: value or None for name, value in zip(header, fields)}, None
+    if record:
+        raise ImportFormatError(f"Line {start}: unterminated quoted field")
+
+
+PARSERS = {"ndjson": _parse_ndjson, "csv": _parse_csv}
+"""
+Incremental record parser of every import format.
+"""
+
+
+async def _produce_batches(records: AsyncIterator[Record], batches: asyncio.Queue, batch_size: int):
+    try:
+        batch: List[Record] = []
+        async for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                await batches.put(batch)
+                batch = []
+        if batch:
+            await batches.put(batch)
+        await batches.put(None)
+    except Exception as err:
+        await batches.put(err)
+
+
+async def import_contacts(
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    user_id: int,
+    session_factory: Callable[[], AsyncContextManager[AsyncSession]],
+    batch_size: int = 1000,
+    max_in_flight: int = 2,
+) -> AsyncIterator[dict]:
+    """
+    Import contacts from an NDJSON or CSV byte stream, reporting progress as it goes.
+
+    The stream is parsed incrementally and cut into batches of `batch_size` rows,
+    each validated and written by `ContactService.create_contacts_bulk` in its own
+    session and transactions. Parsing runs ahead of the writes by at most
+    `max_in_flight` batches and then waits, so memory use does not depend on the
+    size of the stream.
+
+    CSV streams start with a header row naming the `ContactModel` fields. NDJSON
+    streams hold one JSON object per line.
+
+    A batch that cannot be written, e.g. because its rows keep colliding with
+    concurrent writes, is reported with its line range and counted as failed, and the
+    import goes on with the next batch. Only a batch larger than
+    `CONTACTS_BULK_CHUNK_SIZE` can be left partly written, by its earlier chunks.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The raw stream.
+        fmt (str): `"ndjson"` or `"csv"`.
+        user_id (int): The owner of the imported contacts.
+        session_factory (Callable[[], AsyncContextManager[AsyncSession]]): Opens a
+            database session, e.g. `sessionmanager.session`.
+        batch_size (int): Rows per batch.
+        max_in_flight (int): Parsed batches allowed to wait for the writer.
+
+    Yields:
+        dict: Events. `{"event": "rejected", "line", "status", "error"}` for every row
+            that was not imported, `{"event": "progress", ...counts}` after every batch,
+            `{"event": "error", "error", "first_line", "last_line", ...counts}` for every
+            batch that could not be written, then `{"event": "done", ...counts}`, or
+            `{"event": "error", "error", ...counts}` if the stream could not be parsed
+            to the end.
+    """
+    counts = {"rows": 0, "created": 0, "conflicts": 0, "invalid": 0, "failed": 0}
+    batches: asyncio.Queue = asyncio.Queue(maxsize=max_in_flight)
+    producer = asyncio.create_task(
+        _produce_batches(PARSERS[fmt](chunks), batches, batch_size)
+    )
+    try:
+        while True:
+            batch = await batches.get()
+            if batch is None:
+                break
+            if isinstance(batch, Exception):
+                logger.warning("Contact import stopped: %s", batch)
+                yield {"event": "error", "error": str(batch), **counts}
+                return
+
+            lines = [line_no for line_no, row, _ in batch if row is not None]
+            try:
+                async with session_factory() as session:
+                    result = await ContactService(session).create_contacts_bulk(
+                        [row for _, row, _ in batch if row is not None], user_id
+                    )
+            except (IntegrityError, HTTPException) as err:
+                error = err.detail if isinstance(err, HTTPException) else "Conflicting concurrent writes"
+                first_line, last_line = batch[0][0], batch[-1][0]
+                logger.warning("Contact import lines %d-%d failed: %s", first_line, last_line, err)
+                counts["rows"] += len(batch)
+                counts["failed"] += len(batch)
+                yield {
+                    "event": "error",
+                    "error": error,
+                    "first_line": first_line,
+                    "last_line": last_line,
+                    **counts,
+                }
+                continue
+            counts["rows"] += len(batch)
+            counts["created"] += result.created
+            counts["conflicts"] += result.conflicts
+            counts["invalid"] += result.invalid + len(batch) - len(lines)
+            for line_no, row, error in batch:
+                if row is None:
+                    yield {"event": "rejected", "line": line_no, "status": "invalid", "error": error}
+            for item in result.results:
+                if item.status != "created":
+                    yield {
+                        "event": "rejected",
+                        "line": lines[item.index],
+                        "status": item.status,
+                        "error": item.error,
+                    }
+            yield {"event": "progress", **counts}
+        yield {"event": "done", **counts}
+    finally:
+        producer.cancel()
+
+
+async def _read_file(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") if path != "-" else sys.stdin.buffer as file:
+        while chunk := await asyncio.to_thread(file.read, READ_CHUNK_BYTES):
+            yield chunk
+
+
+async def main(path: str, fmt: str, user_id: int) -> None:
+    async for event in import_contacts(
+        _read_file(path),
+        fmt,
+        user_id,
+        sessionmanager.session,
+        batch_size=config.CONTACTS_IMPORT_BATCH_SIZE,
+        max_in_flight=config.CONTACTS_IMPORT_MAX_IN_FLIGHT,
+    ):
+        print(json.dumps(event), flush=True)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Import contacts from an NDJSON or CSV file.")
+    parser.add_argument("path", help="the file to import, or - for standard input")
+    parser.add_argument("--user-id", type=int, required=True, help="owner of the contacts")
+    parser.add_argument("--format", choices=sorted(PARSERS), help="defaults to the file extension")
+    args = parser.parse_args()
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    asyncio.run(main(args.path, fmt, args.user_id))
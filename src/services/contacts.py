@@ -1,8 +1,49 @@
+from typing import Any, Dict, List, Optional
+
 from fastapi import HTTPException, status
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.conf.config import config
 from src.repositories.contacts import ContactRepository
-from src.schemas import ContactModel
+from src.schemas import (
+    ContactBulkResponse,
+    ContactBulkResult,
+    ContactModel,
+    ContactResponse,
+    ContactUpsertResponse,
+)
+from src.services.pagination import decode_cursor, encode_cursor
+
+CONTACT_LIST_ADAPTER = TypeAdapter(List[ContactModel])
+"""
+Validator of the items of a bulk contact creation, built once.
+"""
+
+
+def _validate_contacts(items: List[Any]):
+    """
+    Validate a list of contacts in one pass, collecting the errors of every item.
+
+    Only when some items are invalid are the remaining ones validated a second time.
+
+    Args:
+        items (List[Any]): The raw items.
+
+    Returns:
+        Tuple[Dict[int, ContactModel], Dict[int, str]]: Valid contacts and errors, by index.
+    """
+    try:
+        return dict(enumerate(CONTACT_LIST_ADAPTER.validate_python(items))), {}
+    except ValidationError as err:
+        errors: Dict[int, str] = {}
+        for error in err.errors(include_url=False):
+            index, *field = error["loc"]
+            errors.setdefault(index, f"{'.'.join(map(str, field)) or 'item'}: {error['msg']}")
+    rest = [index for index in range(len(items)) if index not in errors]
+    valid = CONTACT_LIST_ADAPTER.validate_python([items[index] for index in rest])
+    return dict(zip(rest, valid)), errors
 
 
 class ContactService:
@@ -25,12 +66,16 @@ class ContactService:
         """
         self._repository = ContactRepository(db)
 
-    async def create_contact(self, data: ContactModel):
+    async def create_contact(self, data: ContactModel, user_id: int):
         """
         Create a new contact.
 
+        Uniqueness is enforced by the database: the contact is inserted directly, and a
+        violated unique constraint is reported as a conflict.
+
         Args:
             data (ContactModel): The contact data to create.
+            user_id (int): The owner of the new contact.
 
         Returns:
             Contact: The created contact.
@@ -38,13 +83,246 @@ class ContactService:
         Raises:
             HTTPException: If a contact with the same email or phone number already exists.
         """
-        existing_contact = await self._repository.does_contact_exist(data.email, data.phone_number)
-        if existing_contact:
+        try:
+            return await self._repository.create_contact(data, user_id)
+        except IntegrityError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Contact with email '{data.email}' or phone '{data.phone_number}' already exists."
             )
-        return await self._repository.create_contact(data)
+
+    async def create_contacts_bulk(self, items: List[Any], user_id: int) -> ContactBulkResponse:
+        """
+        Create many contacts at once, reporting the outcome of every item.
+
+        Items are validated together, then handled in chunks of `CONTACTS_BULK_CHUNK_SIZE`:
+        one query finds the emails and phone numbers of the chunk that are already taken,
+        and one multi-row `INSERT ... RETURNING` creates the rest in a single transaction.
+        An item conflicts if its email or phone number belongs to an existing contact or
+        to an earlier item of the request. If a concurrent request takes an email or phone
+        number between the check and the insert, the chunk is checked and inserted again.
+        The created contacts come from the database and are not validated a second time.
+
+        Args:
+            items (List[Any]): The contacts to create, as sent by the client.
+            user_id (int): The owner of the new contacts.
+
+        Returns:
+            ContactBulkResponse: Counts of created, conflicting and invalid items, and one
+                `ContactBulkResult` per item in request order.
+        """
+        valid, errors = _validate_contacts(items)
+        results: Dict[int, ContactBulkResult] = {
+            index: ContactBulkResult(index=index, status="invalid", error=error)
+            for index, error in errors.items()
+        }
+        seen_emails, seen_phones = set(), set()
+        indexes = sorted(valid)
+        chunk_size = config.CONTACTS_BULK_CHUNK_SIZE
+        for start in range(0, len(indexes), chunk_size):
+            chunk = indexes[start:start + chunk_size]
+            for attempt in range(2):
+                taken_emails, taken_phones = await self._repository.find_taken(
+                    (valid[index].email for index in chunk),
+                    (valid[index].phone_number for index in chunk),
+                )
+                batch_emails, batch_phones = set(seen_emails), set(seen_phones)
+                rows, row_indexes = [], {}
+                for index in chunk:
+                    contact = valid[index]
+                    if contact.email in taken_emails or contact.email in batch_emails:
+                        error = f"Contact with email '{contact.email}' already exists."
+                    elif contact.phone_number in taken_phones or contact.phone_number in batch_phones:
+                        error = f"Contact with phone '{contact.phone_number}' already exists."
+                    else:
+                        error = None
+                    batch_emails.add(contact.email)
+                    batch_phones.add(contact.phone_number)
+                    if error:
+                        results[index] = ContactBulkResult(index=index, status="conflict", error=error)
+                    else:
+                        rows.append({**contact.model_dump(), "user_id": user_id})
+                        row_indexes[contact.email] = index
+                try:
+                    created = await self._repository.create_contacts(rows) if rows else []
+                    break
+                except IntegrityError:
+                    await self._repository.rollback()
+                    if attempt:
+                        raise
+            seen_emails, seen_phones = batch_emails, batch_phones
+            for contact in created:
+                index = row_indexes[contact.email]
+                fields = {name: getattr(contact, name) for name in ContactResponse.model_fields}
+                results[index] = ContactBulkResult.model_construct(
+                    index=index,
+                    status="created",
+                    contact=ContactResponse.model_construct(**fields),
+                    error=None,
+                )
+
+        ordered = [results[index] for index in range(len(items))]
+        counts = {"created": 0, "conflict": 0, "invalid": 0}
+        for result in ordered:
+            counts[result.status] += 1
+        return ContactBulkResponse.model_construct(
+            created=counts["created"],
+            conflicts=counts["conflict"],
+            invalid=counts["invalid"],
+            results=ordered,
+        )
+
+    async def upsert_contact(self, email: str, data: ContactModel, user_id: int):
+        """
+        Create or update the contact with the given email in one atomic statement.
+
+        Args:
+            email (str): The email of the contact, from the path.
+            data (ContactModel): The full contact data. Its email must match `email`.
+            user_id (int): The owner of the contact if it is created.
+
+        Returns:
+            Contact: The created or updated contact.
+
+        Raises:
+            HTTPException: 400 if the emails differ, or if the phone number belongs to a
+                contact with another email, and 409 if the email belongs to a contact of
+                another user.
+        """
+        if data.email.lower() != email.lower():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The email in the path and in the body differ.",
+            )
+        try:
+            contacts = await self._repository.upsert_contacts(
+                [{**data.model_dump(), "user_id": user_id}]
+            )
+        except IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Contact with phone '{data.phone_number}' already exists.",
+            )
+        if not contacts:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Contact with email '{data.email}' belongs to another user.",
+            )
+        return contacts[0]
+
+    async def upsert_contacts_bulk(self, items: List[Any], user_id: int) -> ContactUpsertResponse:
+        """
+        Create or update many contacts keyed by email, reporting the outcome of every item.
+
+        Items are validated together, then written in chunks of `CONTACTS_BULK_CHUNK_SIZE`
+        with one `INSERT ... ON CONFLICT (email) DO UPDATE ... RETURNING` each. When several
+        items share an email, the last one wins and the others are reported as conflicts.
+        An item also conflicts if its phone number belongs to a contact with another email,
+        in the database or earlier in the request, or if its email belongs to a contact
+        of another user. If a concurrent request takes a phone number between the check
+        and the write, the chunk is checked and written again.
+
+        Args:
+            items (List[Any]): The contacts to write, as sent by the client.
+            user_id (int): The owner of the contacts that get created.
+
+        Returns:
+            ContactUpsertResponse: Counts of upserted, conflicting and invalid items, and
+                one `ContactBulkResult` per item in request order.
+
+        Raises:
+            HTTPException: 409 naming the item whose phone number was taken again by a
+                concurrent request during the retry. Earlier chunks stay written.
+        """
+        valid, errors = _validate_contacts(items)
+        results: Dict[int, ContactBulkResult] = {
+            index: ContactBulkResult(index=index, status="invalid", error=error)
+            for index, error in errors.items()
+        }
+        last = {contact.email: index for index, contact in sorted(valid.items())}
+        indexes = []
+        for index, contact in sorted(valid.items()):
+            if last[contact.email] == index:
+                indexes.append(index)
+            else:
+                error = f"Superseded by item {last[contact.email]} with the same email."
+                results[index] = ContactBulkResult(index=index, status="conflict", error=error)
+
+        phone_emails: Dict[str, str] = {}
+        chunk_size = config.CONTACTS_BULK_CHUNK_SIZE
+        for start in range(0, len(indexes), chunk_size):
+            chunk = indexes[start:start + chunk_size]
+            for attempt in range(2):
+                owners = await self._repository.find_phone_owners(
+                    valid[index].phone_number for index in chunk
+                )
+                claimed = dict(phone_emails)
+                rows, row_indexes = [], {}
+                for index in chunk:
+                    contact = valid[index]
+                    owner = claimed.get(contact.phone_number, owners.get(contact.phone_number))
+                    if owner is not None and owner != contact.email:
+                        error = f"Contact with phone '{contact.phone_number}' already exists."
+                        results[index] = ContactBulkResult(index=index, status="conflict", error=error)
+                        continue
+                    claimed[contact.phone_number] = contact.email
+                    rows.append({**contact.model_dump(), "user_id": user_id})
+                    row_indexes[contact.email] = index
+                try:
+                    upserted = await self._repository.upsert_contacts(rows) if rows else []
+                    break
+                except IntegrityError:
+                    if attempt:
+                        raise await self._phone_race_conflict(rows, row_indexes)
+            phone_emails = claimed
+            for contact in upserted:
+                index = row_indexes.pop(contact.email)
+                fields = {name: getattr(contact, name) for name in ContactResponse.model_fields}
+                results[index] = ContactBulkResult.model_construct(
+                    index=index,
+                    status="upserted",
+                    contact=ContactResponse.model_construct(**fields),
+                    error=None,
+                )
+            for email, index in row_indexes.items():
+                error = f"Contact with email '{email}' belongs to another user."
+                results[index] = ContactBulkResult(index=index, status="conflict", error=error)
+
+        ordered = [results[index] for index in range(len(items))]
+        counts = {"upserted": 0, "conflict": 0, "invalid": 0}
+        for result in ordered:
+            counts[result.status] += 1
+        return ContactUpsertResponse.model_construct(
+            upserted=counts["upserted"],
+            conflicts=counts["conflict"],
+            invalid=counts["invalid"],
+            results=ordered,
+        )
+
+    async def _phone_race_conflict(self, rows: List[dict], row_indexes: Dict[str, int]) -> HTTPException:
+        """
+        Build the error of a chunk that still violates a phone number after its retry.
+
+        Args:
+            rows (List[dict]): The rows of the failed write.
+            row_indexes (Dict[str, int]): Item index of every row, by email.
+
+        Returns:
+            HTTPException: 409 naming the first item whose phone number now belongs to a
+                contact with another email, or the whole chunk if none is found.
+        """
+        owners = await self._repository.find_phone_owners(row["phone_number"] for row in rows)
+        for row in rows:
+            owner = owners.get(row["phone_number"])
+            if owner is not None and owner != row["email"]:
+                detail = (
+                    f"Item {row_indexes[row['email']]}: contact with phone "
+                    f"'{row['phone_number']}' was created by a concurrent request."
+                )
+                break
+        else:
+            detail = f"Items {sorted(row_indexes.values())} conflict with a concurrent request."
+        return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
 
     async def list_contacts(
         self, first_name: str = "", last_name: str = "", email: str = "", skip: int = 0, limit: int = 100
@@ -65,6 +343,92 @@ class ContactService:
         filters = {"first_name": first_name, "last_name": last_name, "email": email}
         return await self._repository.get_contacts(**filters, skip=skip, limit=limit)
 
+    async def list_contacts_page(
+        self,
+        first_name: str = "",
+        last_name: str = "",
+        email: str = "",
+        skip: int = 0,
+        limit: int = 100,
+        sort: str = "created_at",
+        cursor: Optional[str] = None,
+        count: str = "none",
+    ):
+        """
+        Retrieve one page of contacts, the cursor of the next one and optionally a total.
+
+        `limit` is capped at `CONTACTS_MAX_PAGE_SIZE`. One row more than requested is
+        fetched to tell whether a next page exists.
+
+        With `count="exact"` the matching contacts are counted by the page query itself.
+        Counting stops above `CONTACTS_EXACT_COUNT_MAX`, and larger totals are estimated
+        instead, never below the capped count and without counting again. With `count="estimated"` the total comes from the statistics of the
+        database, which is cheap whatever the filters. Where the database has no
+        statistics for the filters and the contacts are counted after all, the total
+        is reported as `"exact"`.
+
+        Args:
+            first_name (str): Filter by first name (substring match). Default is "".
+            last_name (str): Filter by last name (substring match). Default is "".
+            email (str): Filter by email (substring match). Default is "".
+            skip (int): Number of records to skip. Default is 0.
+            limit (int): Maximum number of records to return. Default is 100.
+            sort (str): Sort key, `"created_at"` or `"last_name"`. Default is `"created_at"`.
+            cursor (Optional[str]): Cursor returned with the previous page.
+            count (str): `"none"`, `"exact"` or `"estimated"`. Default is `"none"`.
+
+        Returns:
+            Tuple[List[Contact], Optional[str], Optional[Tuple[int, str]]]: The contacts, the
+                cursor of the next page or `None` on the last page, and the total with how it
+                was obtained (`"exact"` or `"estimated"`), or `None` if not requested.
+
+        Raises:
+            HTTPException: If the cursor is invalid.
+        """
+        after = decode_cursor(cursor, sort) if cursor else None
+        limit = min(limit, config.CONTACTS_MAX_PAGE_SIZE)
+        page = {"skip": skip, "limit": limit + 1, "sort": sort, "after": after}
+        total = None
+        if count == "exact":
+            cap = config.CONTACTS_EXACT_COUNT_MAX
+            contacts, exact = await self._repository.get_contacts_with_total(
+                first_name, last_name, email, **page, count_cap=cap
+            )
+            if exact <= cap:
+                total = (exact, "exact")
+            else:
+                estimate, _ = await self._repository.estimate_contacts(
+                    first_name, last_name, email, at_least=exact
+                )
+                total = (max(estimate, exact), "estimated")
+        else:
+            contacts = await self._repository.get_contacts(first_name, last_name, email, **page)
+            if count == "estimated":
+                estimate, counted = await self._repository.estimate_contacts(first_name, last_name, email)
+                total = (estimate, "exact" if counted else "estimated")
+        if len(contacts) <= limit:
+            return contacts, None, total
+        contacts = contacts[:limit]
+        last = contacts[-1]
+        return contacts, encode_cursor(sort, getattr(last, sort), last.id), total
+
+    async def search_contacts(self, q: str, skip: int = 0, limit: int = 20):
+        """
+        Search contacts across names, email, phone number and notes, most relevant first.
+
+        `limit` is capped at `CONTACTS_MAX_PAGE_SIZE`.
+
+        Args:
+            q (str): The search query.
+            skip (int): Number of records to skip. Default is 0.
+            limit (int): Maximum number of records to return. Default is 20.
+
+        Returns:
+            List[Contact]: The matching contacts.
+        """
+        limit = min(limit, config.CONTACTS_MAX_PAGE_SIZE)
+        return await self._repository.search_contacts(q, skip=skip, limit=limit)
+
     async def retrieve_contact(self, contact_id: int):
         """
         Retrieve a contact by its ID.
@@ -98,9 +462,16 @@ class ContactService:
             Contact: The updated contact.
 
         Raises:
-            HTTPException: If the contact does not exist or cannot be updated.
+            HTTPException: 404 if the contact does not exist, and 400 if another contact
+                already has the new email or phone number.
         """
-        updated_contact = await self._repository.update_contact(contact_id, data)
+        try:
+            updated_contact = await self._repository.update_contact(contact_id, data)
+        except IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Contact with email '{data.email}' or phone '{data.phone_number}' already exists."
+            )
         if not updated_contact:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -129,14 +500,19 @@ class ContactService:
             )
         return deleted_contact
 
-    async def list_upcoming_birthdays(self, days: int):
+    async def list_upcoming_birthdays(self, days: int, skip: int = 0, limit: int = 100):
         """
         Retrieve a list of contacts with upcoming birthdays within a specified number of days.
 
+        `limit` is capped at `CONTACTS_MAX_PAGE_SIZE`.
+
         Args:
             days (int): The number of days to look ahead for upcoming birthdays.
+            skip (int): Number of records to skip. Default is 0.
+            limit (int): Maximum number of records to return. Default is 100.
 
         Returns:
-            List[Contact]: A list of contacts with upcoming birthdays.
+            List[Contact]: A list of contacts with upcoming birthdays, soonest first.
         """
-        return await self._repository.get_upcoming_birthdays(days)
\ No newline at end of file
+        limit = min(limit, config.CONTACTS_MAX_PAGE_SIZE)
+        return await self._repository.get_upcoming_birthdays(days, skip=skip, limit=limit)
\ No newline at end of file
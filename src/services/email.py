@@ -1,11 +1,11 @@
 import logging
 from pathlib import Path
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
+from fastapi_mail import ConnectionConfig
 from pydantic import EmailStr
 
 from src.services.auth import create_email_token
+from src.services.mail_transport import SMTPTransport
 from src.conf.config import config
 
 # Configure logging
@@ -36,6 +36,17 @@ This configuration is used to send emails with the specified settings, such as
 email server, port, authentication, and template folder.
 """
 
+mail_transport = SMTPTransport(
+    conf,
+    pool_size=config.MAIL_POOL_SIZE,
+    batch_size=config.MAIL_BATCH_SIZE,
+    idle_seconds=config.MAIL_IDLE_SECONDS,
+    max_queue=config.MAIL_MAX_QUEUE,
+)
+"""
+Global mail transport sharing pooled SMTP connections between all emails of this worker.
+"""
+
 
 async def send_reset_password_email(
     to_email: EmailStr, username: str, host: str, reset_token: str
@@ -53,22 +64,18 @@ async def send_reset_password_email(
         None
 
     Raises:
-        ConnectionErrors: If there is an error sending the email.
+        ConnectionErrors: If there is an error connecting to the email server.
+        SMTPException: If the email server rejects the email.
     """
-    try:
-        reset_link = f"{host}api/auth/confirm_reset_password/{reset_token}"
-
-        message = MessageSchema(
-            subject="Important: Update your account information",
-            recipients=[to_email],
-            template_body={"reset_link": reset_link, "username": username},
-            subtype=MessageType.html,
-        )
+    reset_link = f"{host}api/auth/confirm_reset_password/{reset_token}"
 
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="reset_password.html")
-    except ConnectionErrors as err:
-        logger.error("A connection error occurred: %s", err)
+    html = mail_transport.render(
+        "reset_password.html", {"reset_link": reset_link, "username": username}
+    )
+    message = mail_transport.build_message(
+        "Important: Update your account information", [to_email], html
+    )
+    await mail_transport.send(message)
 
 
 async def send_email_confirmation(email: EmailStr, username: str, host: str) -> None:
@@ -88,24 +95,15 @@ async def send_email_confirmation(email: EmailStr, username: str, host: str) ->
 
     Raises:
         ConnectionErrors: If there is an error connecting to the email server.
+        SMTPException: If the email server rejects the email.
     """
-    try:
-        # Generate the email verification token
-        token_verification = create_email_token({"sub": email})
-
-        # Define the email message
-        message = MessageSchema(
-            subject="Confirm your email",
-            recipients=[email],
-            template_body={
-                "host": host,
-                "username": username,
-                "token": token_verification,
-            },
-            subtype=MessageType.html,
-        )
-
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="verify_email.html")
-    except ConnectionErrors as err:
-        logger.error("A connection error occurred: %s", err)
\ No newline at end of file
+    # Generate the email verification token
+    token_verification = create_email_token({"sub": email})
+
+    # Define the email message
+    html = mail_transport.render(
+        "email-confirmation.html",
+        {"host": host, "username": username, "token": token_verification},
+    )
+    message = mail_transport.build_message("Confirm your email", [email], html)
+    await mail_transport.send(message)
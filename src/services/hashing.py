@@ -0,0 +1,138 @@
+import argparse
+import time
+
+from passlib.context import CryptContext
+
+from src.conf.config import config
+from src.services.pools import BoundedPool
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=config.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=config.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=config.BCRYPT_ROUNDS,
+)
+"""
+Password hashing context shared by the request handlers and the hashing pool workers.
+
+Hashes created with any other cost than `BCRYPT_ROUNDS` are reported by `needs_rehash`.
+"""
+
+hash_pool = BoundedPool(
+    "hash",
+    kind=config.HASH_POOL_KIND,
+    size=config.HASH_POOL_SIZE,
+    max_queue=config.HASH_POOL_MAX_QUEUE,
+)
+"""
+Bounded worker pool that runs bcrypt off the event loop.
+"""
+
+
+def hash_password(password: str) -> str:
+    """
+    Hash a plain-text password. Runs inside the hashing pool.
+
+    Args:
+        password (str): The plain-text password.
+
+    Returns:
+        str: The bcrypt hash.
+    """
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a plain-text password against a hash. Runs inside the hashing pool.
+
+    Args:
+        plain_password (str): The plain-text password.
+        hashed_password (str): The stored hash.
+
+    Returns:
+        bool: True if the password matches, False otherwise.
+    """
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Check whether a stored hash uses a different cost than the configured one.
+
+    Args:
+        hashed_password (str): The stored hash.
+
+    Returns:
+        bool: True if the hash should be replaced on the next successful login.
+    """
+    return pwd_context.needs_update(hashed_password)
+
+
+def measure_rounds(rounds: int, samples: int = 3) -> float:
+    """
+    Measure how long one bcrypt verification takes at a given cost on this host.
+
+    Args:
+        rounds (int): The bcrypt cost factor (log2 of the iteration count).
+        samples (int): Number of verifications to take the median of.
+
+    Returns:
+        float: The median verification time, in milliseconds.
+    """
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    hashed = context.hash("calibration-password")
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.verify("calibration-password", hashed)
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+
+def calibrate(
+    target_ms: float, min_rounds: int, max_rounds: int, samples: int = 3
+) -> tuple[int, dict[int, float]]:
+    """
+    Pick the highest bcrypt cost whose verification fits the latency budget.
+
+    Candidates are measured from `min_rounds` upwards; since every extra round
+    doubles the cost, measuring stops at the first candidate over budget.
+
+    Args:
+        target_ms (float): The latency budget of one verification, in milliseconds.
+        min_rounds (int): The lowest acceptable cost, returned even if over budget.
+        max_rounds (int): The highest cost to consider.
+        samples (int): Number of verifications measured per candidate.
+
+    Returns:
+        tuple[int, dict[int, float]]: The chosen cost and the measured timings per cost.
+    """
+    timings: dict[int, float] = {}
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        timings[rounds] = measure_rounds(rounds, samples)
+        if timings[rounds] > target_ms:
+            break
+        chosen = rounds
+    return chosen, timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark bcrypt cost factors on this host and pick BCRYPT_ROUNDS."
+    )
+    parser.add_argument("--target-ms", type=float, default=config.BCRYPT_CALIBRATION_TARGET_MS)
+    parser.add_argument("--min-rounds", type=int, default=config.BCRYPT_CALIBRATION_MIN_ROUNDS)
+    parser.add_argument("--max-rounds", type=int, default=config.BCRYPT_CALIBRATION_MAX_ROUNDS)
+    parser.add_argument("--samples", type=int, default=3)
+    args = parser.parse_args()
+
+    chosen, timings = calibrate(args.target_ms, args.min_rounds, args.max_rounds, args.samples)
+    for rounds, elapsed in timings.items():
+        marker = "<-" if rounds == chosen else ""
+        print(f"rounds={rounds:>2} verify={elapsed:>8.1f} ms {marker}")
+    if timings[chosen] > args.target_ms:
+        print(f"Even the minimum cost exceeds the {args.target_ms:.0f} ms budget.")
+    print(f"BCRYPT_ROUNDS={chosen}")
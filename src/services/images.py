@@ -0,0 +1,68 @@
+import hashlib
+import io
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from src.conf.config import config
+from src.services.pools import BoundedPool
+
+image_pool = BoundedPool(
+    "image",
+    kind="process",
+    size=config.IMAGE_POOL_SIZE,
+    max_queue=config.IMAGE_POOL_MAX_QUEUE,
+)
+"""
+Bounded process pool that decodes and resizes uploaded images.
+"""
+
+
+class InvalidImageError(ValueError):
+    """
+    Raised when an uploaded file is not a decodable image.
+    """
+
+
+def preprocess_avatar(
+    data: bytes | str, width: int, height: int, quality: int
+) -> tuple[bytes, str]:
+    """
+    Crop and resize an image to the avatar size and re-encode it as JPEG.
+
+    JPEG sources are decoded at a reduced scale when they are much larger than
+    the target, which makes phone photos several times cheaper to decode. The
+    image is rotated according to its EXIF orientation, and transparency is
+    flattened onto white. Runs in `image_pool`, so it must stay picklable; large
+    uploads are passed as a path so their content is not pickled to the worker.
+
+    Args:
+        data (bytes | str): The uploaded file, or its path.
+        width (int): Target width in pixels.
+        height (int): Target height in pixels.
+        quality (int): JPEG quality of the result.
+
+    Returns:
+        tuple[bytes, str]: The encoded avatar and its hex SHA-256 digest.
+
+    Raises:
+        InvalidImageError: If the data is not an image Pillow can decode.
+    """
+    try:
+        with Image.open(io.BytesIO(data) if isinstance(data, bytes) else data) as source:
+            source.draft("RGB", (width * 2, height * 2))
+            image = ImageOps.exif_transpose(source)
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, "white")
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            else:
+                image = image.convert("RGB")
+            avatar = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as err:
+        raise InvalidImageError(f"Cannot decode image: {err}") from None
+
+    output = io.BytesIO()
+    avatar.save(output, format="JPEG", quality=quality, optimize=True)
+    encoded = output.getvalue()
+    return encoded, hashlib.sha256(encoded).hexdigest()
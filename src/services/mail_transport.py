@@ -0,0 +1,230 @@
+import asyncio
+import logging
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import List, Optional
+
+import aiosmtplib
+from fastapi_mail import ConnectionConfig
+from fastapi_mail.errors import ConnectionErrors
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPTransport:
+    """
+    Mail transport keeping a small pool of authenticated SMTP connections.
+
+    Messages are put on a queue and picked up by `pool_size` workers. Each worker
+    owns one connection, opened on first use and kept open until it has been idle
+    for `idle_seconds`, and drains up to `batch_size` queued messages per wake-up,
+    so a burst of emails costs one TLS handshake and login per worker instead of
+    one per message. Templates are compiled once and cached by the Jinja
+    environment.
+
+    Attributes:
+        settings (ConnectionConfig): The FastMail connection settings.
+        templates (Environment): Jinja environment over `TEMPLATE_FOLDER`.
+        sent (int): Number of messages delivered.
+        failed (int): Number of messages that could not be delivered.
+        batches (int): Number of batches taken from the queue.
+        connections_opened (int): Number of SMTP connections opened.
+    """
+
+    def __init__(
+        self,
+        settings: ConnectionConfig,
+        pool_size: int = 2,
+        batch_size: int = 20,
+        idle_seconds: float = 60,
+        max_queue: int = 1000,
+    ):
+        """
+        Initialize the transport. Workers are started on the first message.
+
+        Args:
+            settings (ConnectionConfig): The FastMail connection settings.
+            pool_size (int): Number of SMTP connections, one per worker.
+            batch_size (int): Maximum number of messages a worker sends per wake-up.
+            idle_seconds (float): Seconds after which an unused connection is closed.
+            max_queue (int): Maximum number of queued messages; senders wait beyond it.
+        """
+        self.settings = settings
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.idle_seconds = idle_seconds
+        self.max_queue = max_queue
+        self.templates = Environment(
+            loader=FileSystemLoader(settings.TEMPLATE_FOLDER),
+            autoescape=select_autoescape(["html"]),
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+        self.connections_opened = 0
+
+    def render(self, template_name: str, context: dict) -> str:
+        """
+        Render a template of the template folder.
+
+        Args:
+            template_name (str): File name of the template.
+            context (dict): Template variables.
+
+        Returns:
+            str: The rendered template.
+        """
+        return self.templates.get_template(template_name).render(**context)
+
+    def build_message(self, subject: str, recipients: List[str], html: str) -> EmailMessage:
+        """
+        Build an HTML message from the configured sender.
+
+        Args:
+            subject (str): The subject.
+            recipients (List[str]): Recipient addresses.
+            html (str): The HTML body.
+
+        Returns:
+            EmailMessage: The message.
+        """
+        message = EmailMessage()
+        message["Subject"] = subject
+        message["From"] = formataddr((self.settings.MAIL_FROM_NAME, self.settings.MAIL_FROM))
+        message["To"] = ", ".join(recipients)
+        message.set_content(html, subtype="html")
+        return message
+
+    async def send(self, message: EmailMessage) -> None:
+        """
+        Queue a message and wait until a worker has delivered it.
+
+        Args:
+            message (EmailMessage): The message.
+
+        Raises:
+            ConnectionErrors: If no connection to the SMTP server could be opened.
+            aiosmtplib.SMTPException: If the server rejected the message.
+        """
+        if self.settings.SUPPRESS_SEND:
+            self.sent += 1
+            return
+        self._ensure_started()
+        delivered = self._loop.create_future()
+        await self._queue.put((message, delivered))
+        await delivered
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # The transport is bound to the loop that sent the first message; workers
+        # of a previous, closed loop are dropped together with their queue.
+        self._loop = loop
+        self._queue = asyncio.Queue(self.max_queue)
+        self._workers = [loop.create_task(self._worker()) for _ in range(self.pool_size)]
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.settings.MAIL_SERVER,
+            port=self.settings.MAIL_PORT,
+            timeout=self.settings.TIMEOUT,
+            use_tls=self.settings.MAIL_SSL_TLS,
+            start_tls=self.settings.MAIL_STARTTLS,
+            validate_certs=self.settings.VALIDATE_CERTS,
+            local_hostname=self.settings.LOCAL_HOSTNAME,
+            cert_bundle=self.settings.CERT_BUNDLE,
+        )
+        try:
+            await smtp.connect()
+            if self.settings.USE_CREDENTIALS:
+                await smtp.login(
+                    self.settings.MAIL_USERNAME,
+                    self.settings.MAIL_PASSWORD.get_secret_value(),
+                )
+        except Exception as err:
+            smtp.close()
+            raise ConnectionErrors(f"Could not connect to the SMTP server: {err}")
+        self.connections_opened += 1
+        return smtp
+
+    async def _deliver(self, smtp: Optional[aiosmtplib.SMTP], message: EmailMessage) -> aiosmtplib.SMTP:
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.send_message(message)
+                return smtp
+            except aiosmtplib.SMTPServerDisconnected:
+                # The server dropped the idle connection; retry once on a new one.
+                smtp.close()
+        smtp = await self._connect()
+        try:
+            await smtp.send_message(message)
+        except Exception:
+            smtp.close()
+            raise
+        return smtp
+
+    async def _worker(self) -> None:
+        smtp: Optional[aiosmtplib.SMTP] = None
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), self.idle_seconds)
+                except asyncio.TimeoutError:
+                    if smtp is not None:
+                        smtp.close()
+                        smtp = None
+                    continue
+                batch = [item]
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                self.batches += 1
+
+                for message, delivered in batch:
+                    try:
+                        smtp = await self._deliver(smtp, message)
+                    except Exception as err:
+                        self.failed += 1
+                        if smtp is not None and not smtp.is_connected:
+                            smtp.close()
+                            smtp = None
+                        if not delivered.done():
+                            delivered.set_exception(err)
+                    else:
+                        self.sent += 1
+                        if not delivered.done():
+                            delivered.set_result(None)
+        finally:
+            if smtp is not None:
+                smtp.close()
+
+    async def close(self) -> None:
+        """
+        Stop the workers and close their connections.
+        """
+        for worker in self._workers:
+            worker.cancel()
+        if self._workers and self._loop is asyncio.get_running_loop():
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._loop = None
+        self._queue = None
+
+    def stats(self) -> dict:
+        """
+        Return counters of the transport.
+
+        Returns:
+            dict: Delivered and failed messages, batches, opened connections and queue length.
+        """
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "batches": self.batches,
+            "connections_opened": self.connections_opened,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
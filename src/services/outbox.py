@@ -0,0 +1,368 @@
+import argparse
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import AsyncContextManager, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf.config import config
+from src.db.db import sessionmanager
+from src.db.models import OutboxEmail
+from src.repositories.outbox import OutboxRepository
+from src.services.auth import Hash, create_access_token
+from src.services.email import mail_transport, send_email_confirmation, send_reset_password_email
+
+logger = logging.getLogger(__name__)
+
+EMAIL_CONFIRMATION = "email_confirmation"
+RESET_PASSWORD = "reset_password"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def _send_email_confirmation(email: OutboxEmail) -> None:
+    await send_email_confirmation(email.recipient, email.payload["username"], email.payload["host"])
+
+
+async def _send_reset_password_email(email: OutboxEmail) -> None:
+    # The token is only signed when the email goes out, once per coalesced request burst.
+    reset_token = await create_access_token(
+        data={"sub": email.recipient, "password": email.payload["hashed_password"]}
+    )
+    await send_reset_password_email(
+        to_email=email.recipient,
+        username=email.payload["username"],
+        host=email.payload["host"],
+        reset_token=reset_token,
+    )
+
+
+SENDERS: Dict[str, Callable[[OutboxEmail], Awaitable[None]]] = {
+    EMAIL_CONFIRMATION: _send_email_confirmation,
+    RESET_PASSWORD: _send_reset_password_email,
+}
+"""
+Delivery function of every outbox email kind.
+"""
+
+
+class OutboxStats:
+    """
+    Counters of the emails queued by this API worker.
+
+    Attributes:
+        queued (int): Number of emails staged in the outbox.
+        suppressed (int): Number of requests coalesced into an already queued email.
+    """
+
+    def __init__(self):
+        self.queued = 0
+        self.suppressed = 0
+
+    def stats(self) -> dict:
+        """
+        Return the counters.
+
+        Returns:
+            dict: Queued and suppressed emails.
+        """
+        return {"queued": self.queued, "suppressed": self.suppressed}
+
+
+outbox_stats = OutboxStats()
+"""
+Global outbox counters of this worker, exposed by the metrics endpoint.
+"""
+
+
+class OutboxService:
+    """
+    Service class for queueing emails in the outbox.
+
+    Emails are written in the transaction of the change that triggers them: they are
+    committed with it, or dropped if it is rolled back.
+
+    Repeated requests for the same email and recipient are merged into the email
+    still pending for them, if any, which takes over the variables of the latest
+    request. The merge is a single atomic statement, so concurrent requests cannot
+    queue two emails. A confirmation email that has gone out already is not sent
+    again within `OUTBOX_COALESCE_SECONDS`; a reset password email always is, since
+    it carries the new password.
+
+    Attributes:
+        repository (OutboxRepository): Repository for outbox rows.
+        coalesce_seconds (int): Length of the coalescing window.
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize the OutboxService with a database session.
+
+        Args:
+            db (AsyncSession): The asynchronous database session.
+        """
+        self.repository = OutboxRepository(db)
+        self.coalesce_seconds = config.OUTBOX_COALESCE_SECONDS
+
+    async def _find_recent(self, dedupe_key: str) -> Optional[OutboxEmail]:
+        since = _utcnow() - timedelta(seconds=self.coalesce_seconds)
+        return await self.repository.get_recent(dedupe_key, since)
+
+    async def email_confirmation(
+        self, email: str, username: str, host: str, coalesce: bool = True
+    ) -> bool:
+        """
+        Stage an email confirmation message.
+
+        Args:
+            email (str): The recipient's email address.
+            username (str): The recipient's username.
+            host (str): The host URL for generating the verification link.
+            coalesce (bool): Whether to coalesce with a recent request. Disabled for
+                new users, who cannot have one.
+
+        Returns:
+            bool: `True` if a new email was queued, `False` if the request was coalesced.
+        """
+        payload = {"username": username, "host": host}
+        dedupe_key = f"{EMAIL_CONFIRMATION}:{email.lower()}"
+        if coalesce:
+            recent = await self._find_recent(dedupe_key)
+            if recent is not None and recent.status != "pending":
+                await self.repository.coalesce(recent.id)
+                outbox_stats.suppressed += 1
+                return False
+        return self._count(
+            await self.repository.stage_pending(
+                EMAIL_CONFIRMATION, email, payload, _utcnow(), dedupe_key
+            )
+        )
+
+    async def reset_password_email(
+        self, email: str, username: str, host: str, password: str
+    ) -> bool:
+        """
+        Stage a reset password message.
+
+        A pending reset email of the recipient takes over the new password. Otherwise,
+        even if a reset email went out a moment ago, a new one is queued: the password
+        just submitted must not be dropped. The reset token is signed by the outbox
+        worker when the email goes out.
+
+        Args:
+            email (str): The recipient's email address.
+            username (str): The recipient's username.
+            host (str): The host URL for generating the confirmation link.
+            password (str): The new password in plain text.
+
+        Returns:
+            bool: `True` if a new email was queued, `False` if the request was coalesced.
+        """
+        payload = {
+            "username": username,
+            "host": host,
+            "hashed_password": await Hash().get_pwd_hash_async(password),
+        }
+        dedupe_key = f"{RESET_PASSWORD}:{email.lower()}"
+        return self._count(
+            await self.repository.stage_pending(RESET_PASSWORD, email, payload, _utcnow(), dedupe_key)
+        )
+
+    @staticmethod
+    def _count(queued: bool) -> bool:
+        if queued:
+            outbox_stats.queued += 1
+        else:
+            outbox_stats.suppressed += 1
+        return queued
+
+    async def commit(self) -> None:
+        """
+        Commit the staged emails.
+        """
+        await self.repository.commit()
+
+
+class OutboxWorker:
+    """
+    Delivers outbox emails, outside of the API workers.
+
+    Each round claims a batch of due emails, sends them concurrently over the
+    pooled mail transport and records the outcome. Failed emails are retried with
+    exponential backoff until `max_attempts` is reached.
+
+    Attributes:
+        sent (int): Number of delivered emails.
+        suppressed (int): Number of requests coalesced into the delivered emails.
+        retried (int): Number of failed attempts scheduled for a retry.
+        failed (int): Number of emails given up on.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncContextManager[AsyncSession]],
+        batch_size: int = 50,
+        max_attempts: int = 5,
+        backoff_seconds: float = 5,
+        backoff_max_seconds: float = 600,
+        lease_seconds: int = 300,
+        latency_window: int = 1000,
+    ):
+        """
+        Initialize the worker.
+
+        Args:
+            session_factory (Callable[[], AsyncContextManager[AsyncSession]]): Opens a
+                database session, e.g. `sessionmanager.session`.
+            batch_size (int): Maximum number of emails claimed per round.
+            max_attempts (int): Attempts after which an email is marked as failed.
+            backoff_seconds (float): Delay before the first retry; doubled on each attempt.
+            backoff_max_seconds (float): Upper bound of the retry delay.
+            lease_seconds (int): How long a claim is valid before another worker may retry it.
+            latency_window (int): Number of recent deliveries kept for latency statistics.
+        """
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.lease_seconds = lease_seconds
+        self._latencies = deque(maxlen=latency_window)
+        self.sent = 0
+        self.suppressed = 0
+        self.retried = 0
+        self.failed = 0
+
+    def _backoff(self, attempts: int) -> timedelta:
+        return timedelta(
+            seconds=min(self.backoff_max_seconds, self.backoff_seconds * 2 ** (attempts - 1))
+        )
+
+    async def _deliver(self, email: OutboxEmail) -> None:
+        sender = SENDERS.get(email.kind)
+        if sender is None:
+            raise ValueError(f"Unknown outbox email kind: {email.kind!r}")
+        await sender(email)
+
+    async def run_once(self) -> int:
+        """
+        Claim and deliver one batch of emails.
+
+        Returns:
+            int: Number of emails claimed.
+        """
+        async with self.session_factory() as session:
+            repository = OutboxRepository(session)
+            emails = await repository.claim_batch(self.batch_size, _utcnow(), self.lease_seconds)
+            if not emails:
+                return 0
+
+            results = await asyncio.gather(
+                *(self._deliver(email) for email in emails), return_exceptions=True
+            )
+            now = _utcnow()
+            for email, error in zip(emails, results):
+                # Every outcome is committed on its own, so one that cannot be recorded
+                # does not undo the others; its email is claimed again after the lease.
+                try:
+                    await self._record(repository, email, error, now)
+                    await repository.commit()
+                except Exception as err:
+                    logger.error("Could not record the outcome of outbox email %s: %s", email.id, err)
+                    await repository.rollback()
+            return len(emails)
+
+    async def _record(
+        self, repository: OutboxRepository, email: OutboxEmail, error: Optional[BaseException], now: datetime
+    ) -> None:
+        if error is None:
+            await repository.mark_sent(email.id, now)
+            self.sent += 1
+            self.suppressed += email.suppressed
+            self._latencies.append((now - email.created_at).total_seconds())
+        elif email.attempts >= self.max_attempts:
+            logger.error("Giving up on outbox email %s: %s", email.id, error)
+            await repository.mark_failed(email.id, str(error))
+            self.failed += 1
+        elif await repository.mark_retry(email.id, str(error), now + self._backoff(email.attempts)):
+            logger.warning("Outbox email %s failed, retrying: %s", email.id, error)
+            self.retried += 1
+        else:
+            logger.warning("Outbox email %s failed, folded into a newer pending email: %s", email.id, error)
+            self.retried += 1
+
+    async def run_forever(self, poll_seconds: float) -> None:
+        """
+        Deliver emails until cancelled, sleeping `poll_seconds` whenever the outbox is empty.
+
+        Args:
+            poll_seconds (float): Seconds between polls of an empty outbox.
+        """
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception as err:
+                logger.error("Outbox round failed: %s", err)
+                claimed = 0
+            if claimed:
+                logger.info("Outbox stats: %s", self.stats())
+            if claimed < self.batch_size:
+                await asyncio.sleep(poll_seconds)
+
+    def stats(self) -> dict:
+        """
+        Return counters and delivery latency of the worker.
+
+        Latency is measured from queueing to delivery over the most recent deliveries.
+
+        Returns:
+            dict: Delivered, suppressed, retried and failed emails, and latency percentiles
+                in seconds.
+        """
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "sent": self.sent,
+            "suppressed": self.suppressed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "latency_max": latencies[-1] if latencies else 0.0,
+        }
+
+
+async def main(once: bool) -> None:
+    worker = OutboxWorker(
+        sessionmanager.session,
+        batch_size=config.OUTBOX_BATCH_SIZE,
+        max_attempts=config.OUTBOX_MAX_ATTEMPTS,
+        backoff_seconds=config.OUTBOX_BACKOFF_SECONDS,
+        backoff_max_seconds=config.OUTBOX_BACKOFF_MAX_SECONDS,
+        lease_seconds=config.OUTBOX_LEASE_SECONDS,
+    )
+    try:
+        if once:
+            await worker.run_once()
+            logger.info("Outbox stats: %s", worker.stats())
+        else:
+            await worker.run_forever(config.OUTBOX_POLL_SECONDS)
+    finally:
+        await mail_transport.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Deliver emails queued in the outbox.")
+    parser.add_argument("--once", action="store_true", help="deliver one batch and exit")
+    args = parser.parse_args()
+    asyncio.run(main(args.once))
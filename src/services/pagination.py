@@ -0,0 +1,90 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+
+
+def encode_cursor(sort: str, key: Any, id: int) -> str:
+    """
+    Encode the position after a row as an opaque cursor.
+
+    Args:
+        sort (str): Name of the sort key the position refers to.
+        key (Any): The sort key of the row. Datetimes are kept as ISO strings.
+        id (int): The ID of the row, which breaks ties between equal sort keys.
+
+    Returns:
+        str: A URL-safe cursor.
+    """
+    if isinstance(key, datetime):
+        key = {"dt": key.isoformat()}
+    raw = json.dumps([sort, key, id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor sent by the client.
+        sort (str): The sort key of the request.
+
+    Returns:
+        Tuple[Any, int]: The sort key and the ID of the last row of the previous page.
+
+    Raises:
+        HTTPException: If the cursor is malformed or was issued for another sort key.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, key, id = json.loads(raw)
+        if isinstance(key, dict):
+            key = datetime.fromisoformat(key["dt"])
+        if cursor_sort != sort or not isinstance(id, int):
+            raise ValueError(cursor_sort)
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    return key, id
+
+
+def set_next_page_headers(request: Request, response: Response, next_cursor: Optional[str]) -> None:
+    """
+    Advertise the next page in the `X-Next-Cursor` and `Link` headers.
+
+    The `Link` URL repeats the query of the current request with `cursor` replaced
+    and `skip` dropped, so a client that started with an offset continues by keyset.
+
+    Args:
+        request (Request): The incoming HTTP request.
+        response (Response): The response to add the headers to.
+        next_cursor (Optional[str]): Cursor of the next page, or `None` on the last page.
+    """
+    if next_cursor is None:
+        return
+    url = request.url.remove_query_params("skip").include_query_params(cursor=next_cursor)
+    response.headers["X-Next-Cursor"] = next_cursor
+    response.headers["Link"] = f'<{url}>; rel="next"'
+
+
+def set_total_count_headers(response: Response, total: Optional[Tuple[int, str]]) -> None:
+    """
+    Report the number of matching items in the `X-Total-Count` header.
+
+    `X-Total-Count-Mode` tells whether the number is `"exact"` or `"estimated"`.
+
+    Args:
+        response (Response): The response to add the headers to.
+        total (Optional[Tuple[int, str]]): The number and how it was obtained, or `None`
+            if it was not requested.
+    """
+    if total is None:
+        return
+    response.headers["X-Total-Count"] = str(total[0])
+    response.headers["X-Total-Count-Mode"] = total[1]
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturatedError(Exception):
+    """
+    Raised when a bounded pool has no free worker and its queue is full.
+
+    Attributes:
+        pool_name (str): The name of the saturated pool.
+    """
+
+    def __init__(self, pool_name: str):
+        super().__init__(f"Worker pool '{pool_name}' is saturated")
+        self.pool_name = pool_name
+
+
+class BoundedPool:
+    """
+    A thread or process pool for running blocking calls off the event loop.
+
+    The number of calls that may be running or waiting is capped at
+    `size + max_queue`; further calls fail immediately with `PoolSaturatedError`
+    instead of piling up behind the executor. A call counts until its function
+    returns, even when the caller stops waiting for it, since a running worker
+    cannot be stopped.
+
+    Attributes:
+        name (str): The pool name used in logs and metrics.
+        kind (str): Either `"thread"` or `"process"`.
+        size (int): Number of worker threads or processes.
+        max_queue (int): Number of calls allowed to wait for a free worker.
+    """
+
+    def __init__(self, name: str, kind: str, size: int, max_queue: int):
+        """
+        Initialize the pool. The executor itself is created on first use.
+
+        Args:
+            name (str): The pool name.
+            kind (str): Either `"thread"` or `"process"`.
+            size (int): Number of workers.
+            max_queue (int): Number of calls allowed to wait for a free worker.
+
+        Raises:
+            ValueError: If `kind` is not supported.
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unsupported pool kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.size = size
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.size)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.size, thread_name_prefix=self.name
+                )
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a blocking function in the pool.
+
+        Args:
+            fn (Callable): The function to call. Must be picklable for process pools.
+            *args: Positional arguments for `fn`.
+
+        Returns:
+            Any: The return value of `fn`.
+
+        Raises:
+            PoolSaturatedError: If all workers are busy and the queue is full.
+        """
+        if self._in_flight >= self.size + self.max_queue:
+            self.rejected += 1
+            raise PoolSaturatedError(self.name)
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        # Released by the worker, not by the caller, which may be cancelled first.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future: Optional[Future]) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+
+    def shutdown(self) -> None:
+        """
+        Stop the executor, waiting for running calls to finish.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        """
+        Return usage counters for this pool.
+
+        Returns:
+            dict: Pool configuration, current load and counters.
+        """
+        return {
+            "kind": self.kind,
+            "size": self.size,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
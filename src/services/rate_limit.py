@@ -0,0 +1,359 @@
+import logging
+import math
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from fastapi import Request
+from jose import JWTError, jwt
+from redis import asyncio as aioredis
+from redis.asyncio.retry import Retry
+from redis.backoff import NoBackoff
+
+from src.conf.config import config
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# GCRA over a stored "theoretical arrival time". Grants up to ARGV[4] tokens at once
+# and returns {granted, retry_after}; numbers are returned as strings because Redis
+# truncates Lua numbers to integers.
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local emission = tonumber(ARGV[2])
+local period = tonumber(ARGV[3])
+local quantity = tonumber(ARGV[4])
+local tat = tonumber(redis.call('GET', KEYS[1]) or ARGV[1])
+if tat < now then tat = now end
+local available = math.floor((now + period - tat) / emission + 1e-9)
+local granted = math.min(quantity, available)
+if granted <= 0 then
+  return {'0', tostring(tat - period + emission - now)}
+end
+local new_tat = tat + granted * emission
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {tostring(granted), '0'}
+"""
+
+
+@dataclass(frozen=True)
+class Rate:
+    """
+    A rate limit such as "10/minute".
+
+    Attributes:
+        limit (int): Number of requests allowed per period.
+        period (int): Length of the period, in seconds.
+    """
+    limit: int
+    period: int
+
+    @classmethod
+    def parse(cls, value: str) -> "Rate":
+        """
+        Parse a rate written as `"<n>/<unit>"` or `"<n> per <unit>"`.
+
+        Args:
+            value (str): The rate, e.g. `"10 per minute"` or `"100/hour"`.
+
+        Returns:
+            Rate: The parsed rate.
+
+        Raises:
+            ValueError: If the rate cannot be parsed.
+        """
+        match = re.fullmatch(r"\s*(\d+)\s*(?:/|per)\s*(second|minute|hour|day)s?\s*", value)
+        if not match:
+            raise ValueError(f"Invalid rate limit: {value!r}")
+        return cls(int(match.group(1)), _PERIODS[match.group(2)])
+
+    @property
+    def emission_interval(self) -> float:
+        return self.period / self.limit
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a caller exceeds a rate limit.
+
+    Attributes:
+        scope (str): The limited scope, e.g. the router name.
+        retry_after (float): Seconds until the next request may be allowed.
+    """
+
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"Rate limit of '{scope}' exceeded")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class MemoryGCRAStore:
+    """
+    Per-process GCRA store with the same semantics as the Redis script.
+
+    Used when `RATE_LIMIT_STORAGE` is `"memory"` and as a fallback while Redis is down.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self._tat: OrderedDict[str, float] = OrderedDict()
+        self.max_keys = max_keys
+
+    async def acquire(self, key: str, rate: Rate, quantity: int, now: float) -> tuple[int, float]:
+        tat = max(self._tat.get(key, now), now)
+        emission = rate.emission_interval
+        available = math.floor((now + rate.period - tat) / emission + 1e-9)
+        granted = min(quantity, available)
+        if granted <= 0:
+            return 0, tat - rate.period + emission - now
+        self._tat[key] = tat + granted * emission
+        self._tat.move_to_end(key)
+        while len(self._tat) > self.max_keys:
+            self._tat.popitem(last=False)
+        return granted, 0.0
+
+    def reset(self) -> None:
+        self._tat.clear()
+
+
+class RedisGCRAStore:
+    """
+    GCRA store shared by all workers, evaluated atomically by a Lua script in Redis.
+    """
+
+    def __init__(self, redis: aioredis.Redis):
+        self.redis = redis
+        self._script = redis.register_script(GCRA_SCRIPT)
+
+    async def acquire(self, key: str, rate: Rate, quantity: int, now: float) -> tuple[int, float]:
+        granted, retry_after = await self._script(
+            keys=[f"ratelimit:{key}"],
+            args=[repr(now), repr(rate.emission_interval), rate.period, quantity],
+        )
+        return int(granted), float(retry_after)
+
+
+@dataclass
+class _LocalBucket:
+    tokens: float
+    updated_at: float
+    leased: int = 0
+    lease_expires_at: float = 0.0
+
+
+class RateLimiter:
+    """
+    Rate limiter shared across workers through Redis, with a per-process pre-check.
+
+    Each key first goes through a local token bucket holding the full limit: a
+    process that alone exceeds the limit rejects without touching Redis. Admitted
+    requests then spend tokens leased from the shared GCRA store; a lease holds up
+    to `RATE_LIMIT_LEASE_FRACTION` of the limit, so most requests are served from
+    the local lease and only one in every lease goes to Redis.
+
+    Attributes:
+        lease_fraction (float): Share of the limit leased from Redis at once.
+        redis_round_trips (int): Number of calls made to the shared store.
+        local_rejections (int): Requests rejected by the local pre-check.
+        rejections (int): Requests rejected by the shared store.
+    """
+
+    def __init__(
+        self,
+        store: Optional[object] = None,
+        lease_fraction: float = 0.1,
+        max_keys: int = 100_000,
+    ):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            store (Optional[object]): The shared GCRA store. Defaults to Redis or memory,
+                depending on `RATE_LIMIT_STORAGE`.
+            lease_fraction (float): Share of the limit leased from the store at once.
+            max_keys (int): Maximum number of local buckets kept before LRU eviction.
+        """
+        self._store = store
+        self._memory = MemoryGCRAStore(max_keys)
+        self.lease_fraction = lease_fraction
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, _LocalBucket] = OrderedDict()
+        self._redis_down_until = 0.0
+        self.redis_round_trips = 0
+        self.local_rejections = 0
+        self.rejections = 0
+
+    def _shared_store(self):
+        if self._store is None:
+            if config.RATE_LIMIT_STORAGE == "redis":
+                # No client-side retries: on errors the limiter falls back to memory.
+                self._store = RedisGCRAStore(
+                    aioredis.Redis(
+                        host=config.REDIS_HOST,
+                        port=config.REDIS_PORT,
+                        retry=Retry(NoBackoff(), 0),
+                    )
+                )
+            else:
+                self._store = self._memory
+        if time.time() < self._redis_down_until:
+            return self._memory
+        return self._store
+
+    def _bucket(self, key: str, rate: Rate, now: float) -> _LocalBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = _LocalBucket(tokens=rate.limit, updated_at=now)
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            elapsed = now - bucket.updated_at
+            bucket.tokens = min(rate.limit, bucket.tokens + elapsed / rate.emission_interval)
+            bucket.updated_at = now
+            self._buckets.move_to_end(key)
+        return bucket
+
+    async def _acquire(self, key: str, rate: Rate, quantity: int, now: float) -> tuple[int, float]:
+        store = self._shared_store()
+        self.redis_round_trips += 1
+        try:
+            return await store.acquire(key, rate, quantity, now)
+        except Exception as err:
+            if store is self._memory:
+                raise
+            self._redis_down_until = time.time() + config.REDIS_RETRY_SECONDS
+            logger.warning("Rate limit store is unavailable, limiting per process: %s", err)
+            return await self._memory.acquire(key, rate, quantity, now)
+
+    async def hit(self, scope: str, identity: str, rate: Rate) -> None:
+        """
+        Count one request of a caller against a limit.
+
+        Args:
+            scope (str): The limited scope, e.g. the router name.
+            identity (str): The caller, e.g. `"user:alice"` or `"ip:10.0.0.1"`.
+            rate (Rate): The limit of the scope.
+
+        Raises:
+            RateLimitExceeded: If the caller is over the limit.
+        """
+        key = f"{scope}:{identity}"
+        now = time.time()
+        bucket = self._bucket(key, rate, now)
+        if bucket.tokens < 1:
+            self.local_rejections += 1
+            raise RateLimitExceeded(scope, (1 - bucket.tokens) * rate.emission_interval)
+        bucket.tokens -= 1
+
+        if bucket.leased > 0 and now < bucket.lease_expires_at:
+            bucket.leased -= 1
+            return
+
+        lease = max(1, int(rate.limit * self.lease_fraction))
+        granted, retry_after = await self._acquire(key, rate, lease, now)
+        if granted == 0:
+            self.rejections += 1
+            raise RateLimitExceeded(scope, retry_after)
+        bucket.leased = granted - 1
+        bucket.lease_expires_at = now + rate.period
+
+    def reset(self) -> None:
+        """
+        Forget every local bucket and the in-memory store.
+        """
+        self._buckets.clear()
+        self._memory.reset()
+
+    async def close(self) -> None:
+        """
+        Close the Redis connection, if one was opened.
+        """
+        if isinstance(self._store, RedisGCRAStore):
+            await self._store.redis.aclose()
+
+    def stats(self) -> dict:
+        """
+        Return counters of this limiter.
+
+        Returns:
+            dict: Store round trips, rejections and the number of local buckets.
+        """
+        return {
+            "store_round_trips": self.redis_round_trips,
+            "local_rejections": self.local_rejections,
+            "rejections": self.rejections,
+            "local_buckets": len(self._buckets),
+        }
+
+
+limiter = RateLimiter(lease_fraction=config.RATE_LIMIT_LEASE_FRACTION)
+"""
+Global rate limiter shared by all routers of this worker.
+"""
+
+
+def key_by_ip(request: Request) -> str:
+    """
+    Identify the caller by client IP address.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        str: The rate limit identity.
+    """
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def key_by_user(request: Request) -> str:
+    """
+    Identify the caller by the username of the bearer token, falling back to the IP.
+
+    Only the token signature is checked; no database lookup is made.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        str: The rate limit identity.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            payload = jwt.decode(token, config.JWT_SECRET, algorithms=[config.JWT_ALGO])
+        except JWTError:
+            payload = {}
+        if payload.get("sub"):
+            return f"user:{payload['sub']}"
+    return key_by_ip(request)
+
+
+_KEY_FUNCS = {"ip": key_by_ip, "user": key_by_user}
+
+
+def rate_limit(scope: str, rate: str, key: str = "user") -> Callable:
+    """
+    Build a dependency enforcing a rate limit, for a router or a single route.
+
+    Args:
+        scope (str): The limited scope. Routes sharing a scope share the budget.
+        rate (str): The limit, e.g. `"10 per minute"`.
+        key (str): How callers are identified, `"user"` or `"ip"`.
+
+    Returns:
+        Callable: The FastAPI dependency.
+
+    Example:
+        >>> router = APIRouter(dependencies=[Depends(rate_limit("contacts", "100/minute"))])
+    """
+    parsed = Rate.parse(rate)
+    key_func = _KEY_FUNCS[key]
+
+    async def dependency(request: Request) -> None:
+        if config.RATE_LIMIT_ENABLED:
+            await limiter.hit(scope, key_func(request), parsed)
+
+    return dependency
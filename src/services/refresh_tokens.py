@@ -0,0 +1,144 @@
+import hashlib
+import hmac
+import logging
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf.config import config
+from src.db.models import User
+from src.repositories.refresh_tokens import RefreshTokenRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def hash_refresh_token(token: str) -> str:
+    """
+    Compute the digest under which a refresh token is stored.
+
+    Args:
+        token (str): The opaque refresh token.
+
+    Returns:
+        str: Hex HMAC-SHA256 digest keyed with `JWT_SECRET`.
+    """
+    return hmac.new(
+        config.JWT_SECRET.encode(), token.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+class RefreshTokenService:
+    """
+    Service class for issuing and rotating refresh tokens.
+
+    Refresh tokens are opaque random strings; the database only stores their HMAC
+    digest. Every refresh rotates the token, and presenting an already rotated
+    token revokes its whole family, since it means the token was stolen.
+
+    Attributes:
+        repository (RefreshTokenRepository): Repository for refresh token rows.
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initialize the RefreshTokenService with a database session.
+
+        Args:
+            db (AsyncSession): The asynchronous database session.
+        """
+        self.repository = RefreshTokenRepository(db)
+
+    def _add(self, user_id: int, family_id: Optional[str] = None) -> str:
+        token = secrets.token_urlsafe(32)
+        self.repository.add(
+            user_id=user_id,
+            token_hash=hash_refresh_token(token),
+            family_id=family_id or secrets.token_hex(16),
+            expires_at=_utcnow() + timedelta(seconds=config.REFRESH_TOKEN_EXPIRATION_SECONDS),
+        )
+        return token
+
+    async def issue(self, user: User) -> str:
+        """
+        Issue a refresh token starting a new family.
+
+        Args:
+            user (User): The authenticated user.
+
+        Returns:
+            str: The opaque refresh token.
+        """
+        token = self._add(user.id)
+        await self.repository.commit()
+        return token
+
+    async def rotate(self, token: str) -> tuple[User, str]:
+        """
+        Exchange a refresh token for a new one of the same family.
+
+        Args:
+            token (str): The refresh token presented by the client.
+
+        Returns:
+            tuple[User, str]: The owner of the token and the new refresh token.
+
+        Raises:
+            HTTPException: If the token is unknown, expired, revoked or reused.
+        """
+        invalid_token = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        now = _utcnow()
+        row = await self.repository.get_with_user(hash_refresh_token(token))
+        if row is None:
+            raise invalid_token
+        refresh_token, user = row
+        if refresh_token.revoked_at is not None or refresh_token.expires_at <= now:
+            raise invalid_token
+
+        if not await self.repository.mark_used(refresh_token.id, now):
+            logger.warning(
+                "Refresh token reuse detected for user %s, revoking family %s",
+                user.id,
+                refresh_token.family_id,
+            )
+            await self.repository.revoke_family(refresh_token.family_id, now)
+            await self.repository.commit()
+            raise invalid_token
+
+        new_token = self._add(user.id, refresh_token.family_id)
+        await self.repository.commit()
+        return user, new_token
+
+    async def revoke(self, token: str) -> None:
+        """
+        Revoke the family of a refresh token. Unknown tokens are ignored.
+
+        Args:
+            token (str): The refresh token presented by the client.
+        """
+        row = await self.repository.get_with_user(hash_refresh_token(token))
+        if row is None:
+            return
+        refresh_token, _ = row
+        await self.repository.revoke_family(refresh_token.family_id, _utcnow())
+        await self.repository.commit()
+
+    async def revoke_all(self, user_id: int) -> None:
+        """
+        Revoke every refresh token of a user.
+
+        Args:
+            user_id (int): The ID of the user.
+        """
+        await self.repository.revoke_user(user_id, _utcnow())
+        await self.repository.commit()
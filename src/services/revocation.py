@@ -0,0 +1,199 @@
+import asyncio
+import hashlib
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf.config import config
+from src.db.db import sessionmanager
+from src.repositories.revoked_tokens import RevokedTokenRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class BloomFilter:
+    """
+    A fixed-size Bloom filter over strings.
+
+    Membership tests never give false negatives; false positives happen at
+    roughly `error_rate` once `capacity` items have been added.
+
+    Attributes:
+        size (int): Number of bits.
+        hash_count (int): Number of bit positions per item.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        Initialize an empty filter sized for the given load.
+
+        Args:
+            capacity (int): Expected number of items.
+            error_rate (float): Acceptable false positive rate at that load.
+        """
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        """
+        Add an item to the filter.
+
+        Args:
+            item (str): The item.
+        """
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+
+class RevocationList:
+    """
+    Denylist of access tokens with a zero-I/O fast path.
+
+    Revoked `jti` claims are stored in the database. Every worker keeps a Bloom
+    filter of the ones that have not expired, rebuilt every
+    `REVOCATION_FILTER_REFRESH_SECONDS`. A token absent from the filter is known
+    not to be revoked without any I/O; only possible hits are looked up in the
+    database. Revocations made by this worker are added to its filter at once,
+    and to the one being rebuilt if any; other workers see them after their next
+    rebuild.
+
+    Attributes:
+        checks (int): Number of tokens checked.
+        lookups (int): Number of possible hits looked up in the database.
+        false_positives (int): Lookups that found the token not revoked.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        Initialize the revocation list with an empty filter.
+
+        Args:
+            capacity (int): Minimum number of revoked tokens the filter is sized for.
+            error_rate (float): Acceptable false positive rate of the filter.
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._filter = BloomFilter(capacity, error_rate)
+        self._filter_items = 0
+        self._revoked_during_rebuild: Optional[Set[str]] = None
+        self.checks = 0
+        self.lookups = 0
+        self.false_positives = 0
+
+    async def is_revoked(self, jti: str, db: AsyncSession) -> bool:
+        """
+        Check whether a token has been revoked.
+
+        Args:
+            jti (str): The `jti` claim of the token.
+            db (AsyncSession): Session used only when the filter reports a possible hit.
+
+        Returns:
+            bool: `True` if the token is revoked.
+        """
+        self.checks += 1
+        if jti not in self._filter:
+            return False
+        self.lookups += 1
+        revoked = await RevokedTokenRepository(db).is_revoked(jti)
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+
+    async def revoke(self, jti: str, expires_at: datetime, db: AsyncSession) -> None:
+        """
+        Revoke a token until it expires.
+
+        Args:
+            jti (str): The `jti` claim of the token.
+            expires_at (datetime): Expiration timestamp of the token (naive UTC).
+            db (AsyncSession): The database session.
+        """
+        await RevokedTokenRepository(db).add(jti, expires_at)
+        self._filter.add(jti)
+        self._filter_items += 1
+        if self._revoked_during_rebuild is not None:
+            self._revoked_during_rebuild.add(jti)
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        """
+        Rebuild the filter from the database, dropping expired entries.
+
+        Tokens revoked by this worker while the rebuild runs may be missing from the
+        snapshot it reads, so they are added to the new filter before it replaces the
+        old one.
+
+        Args:
+            db (AsyncSession): The database session.
+        """
+        repository = RevokedTokenRepository(db)
+        revoked = self._revoked_during_rebuild = set()
+        try:
+            now = _utcnow()
+            await repository.delete_expired(now)
+            jtis = set(await repository.get_active_jtis(now)) | revoked
+            bloom = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+            for jti in jtis:
+                bloom.add(jti)
+            self._filter = bloom
+            self._filter_items = len(jtis)
+        finally:
+            if self._revoked_during_rebuild is revoked:
+                self._revoked_during_rebuild = None
+
+    async def run_refresher(self, interval: float) -> None:
+        """
+        Rebuild the filter forever, every `interval` seconds.
+
+        Args:
+            interval (float): Seconds between rebuilds.
+        """
+        while True:
+            try:
+                async with sessionmanager.session() as session:
+                    await self.rebuild(session)
+            except Exception as err:
+                logger.error("Revocation filter rebuild failed: %s", err)
+            await asyncio.sleep(interval)
+
+    def stats(self) -> dict:
+        """
+        Return counters of the revocation list.
+
+        Returns:
+            dict: Checks, database lookups, false positives and the filter load.
+        """
+        return {
+            "checks": self.checks,
+            "lookups": self.lookups,
+            "false_positives": self.false_positives,
+            "filter_items": self._filter_items,
+            "filter_bits": self._filter.size,
+        }
+
+
+revocation_list = RevocationList(
+    capacity=config.REVOCATION_FILTER_CAPACITY,
+    error_rate=config.REVOCATION_FILTER_ERROR_RATE,
+)
+"""
+Global revocation list checked by the authentication dependencies.
+"""
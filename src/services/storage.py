@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+
+import cloudinary
+import cloudinary.exceptions
+import cloudinary.uploader
+import urllib3
+from fastapi import HTTPException, status
+
+from src.conf.config import config
+from src.services.pools import BoundedPool
+
+logger = logging.getLogger(__name__)
+
+upload_pool = BoundedPool(
+    "upload",
+    kind="thread",
+    size=config.UPLOAD_POOL_SIZE,
+    max_queue=config.UPLOAD_POOL_MAX_QUEUE,
+)
+"""
+Bounded thread pool that runs the blocking Cloudinary SDK off the event loop.
+
+Its size caps the number of concurrent uploads of this worker.
+"""
+
+_DIGEST_RE = re.compile(r"[0-9a-f]{64}")
+
+
+def _size_upload_connections(size: int) -> None:
+    """
+    Let every thread of the upload pool keep its own connection to Cloudinary.
+
+    The SDK sends its requests through one urllib3 `PoolManager`, created at import
+    time and kept in `cloudinary.uploader._http`. That module attribute is the only
+    SDK internal relied on here, and its use is tested with the cloudinary releases
+    allowed by `pyproject.toml`. The manager's proxy and certificate settings are
+    kept. Only the public `connection_pool_kw` gets a larger `maxsize`, since by
+    default every pool keeps a single connection per host. A manager that does not
+    have the expected shape is left alone.
+
+    Args:
+        size (int): Connections kept per host.
+    """
+    http = getattr(cloudinary.uploader, "_http", None)
+    if not isinstance(http, urllib3.PoolManager):
+        logger.warning("Cloudinary %s: upload connections keep the SDK defaults", cloudinary.VERSION)
+        return
+    http.connection_pool_kw["maxsize"] = size
+    # Pools already opened keep their size; they are reopened with the new one.
+    http.clear()
+
+
+class AvatarStorage(ABC):
+    """
+    Interface of the stores avatars are saved to.
+
+    Avatars are addressed by the SHA-256 digest of their content, so saving the
+    same avatar twice is a no-op and a stored avatar never changes.
+    """
+
+    @abstractmethod
+    async def save(self, data: bytes, digest: str) -> str:
+        """
+        Store an encoded avatar.
+
+        Args:
+            data (bytes): The JPEG avatar.
+            digest (str): The hex SHA-256 digest of `data`.
+
+        Returns:
+            str: The URL the avatar is served from.
+
+        Raises:
+            HTTPException: If the avatar cannot be stored.
+        """
+
+
+class CloudinaryStorage(AvatarStorage):
+    """
+    Avatar storage on Cloudinary.
+
+    Cloudinary is configured once, and uploads run in `upload_pool` since the SDK
+    is blocking. An upload that times out keeps its worker until the SDK gives up
+    on the request too, so the pool never runs more uploads than it has workers.
+
+    Attributes:
+        pool (BoundedPool): The pool uploads run in.
+        timeout (float): Upload timeout in seconds, including the wait for a free worker.
+    """
+
+    def __init__(
+        self,
+        cloud_name: str,
+        api_key: str,
+        api_secret: str,
+        upload_prefix: Optional[str] = None,
+        pool: BoundedPool = upload_pool,
+        timeout: float = 30,
+    ):
+        """
+        Initialize the storage with Cloudinary configuration.
+
+        Args:
+            cloud_name (str): The Cloudinary cloud name.
+            api_key (str): The Cloudinary API key.
+            api_secret (str): The Cloudinary API secret.
+            upload_prefix (Optional[str]): Base URL of the upload API, e.g. a local stand-in.
+                Defaults to the Cloudinary API.
+            pool (BoundedPool): The pool uploads run in.
+            timeout (float): Upload timeout in seconds.
+
+        Example:
+            >>> storage = CloudinaryStorage("my_cloud_name", "my_api_key", "my_api_secret")
+        """
+        self.pool = pool
+        self.timeout = timeout
+        cloudinary.config(
+            cloud_name=cloud_name,
+            api_key=api_key,
+            api_secret=api_secret,
+            secure=True,
+        )
+        if upload_prefix:
+            cloudinary.config(upload_prefix=upload_prefix)
+        _size_upload_connections(pool.size)
+
+    @staticmethod
+    def upload(data: bytes, digest: str, timeout: Optional[float] = None) -> str:
+        """
+        Upload an avatar under its digest. Blocks; an existing avatar is not overwritten.
+
+        Args:
+            data (bytes): The JPEG avatar.
+            digest (str): The hex SHA-256 digest of `data`.
+            timeout (Optional[float]): Timeout of the HTTP request in seconds.
+
+        Returns:
+            str: The URL of the avatar.
+        """
+        public_id = f"RestApp/avatars/{digest}"
+        r = cloudinary.uploader.upload(
+            data, public_id=public_id, overwrite=False, timeout=timeout
+        )
+        return cloudinary.CloudinaryImage(public_id).build_url(version=r.get("version"))
+
+    async def save(self, data: bytes, digest: str) -> str:
+        try:
+            return await asyncio.wait_for(
+                self.pool.run(self.upload, data, digest, self.timeout), self.timeout
+            )
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Avatar upload timed out",
+            )
+        except cloudinary.exceptions.Error as err:
+            logger.error("Avatar upload of %s failed: %s", digest, err)
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Avatar upload failed",
+            )
+
+
+class LocalStorage(AvatarStorage):
+    """
+    Avatar storage on the local filesystem, served by `GET /api/avatars/{name}`.
+
+    Files are written to `<root>/<first two digest characters>/<digest>.jpg`
+    atomically, so a reader never sees a partial avatar.
+
+    Attributes:
+        root (Path): The avatar directory.
+        base_url (str): URL prefix avatars are served under.
+    """
+
+    def __init__(self, root: str, base_url: str):
+        """
+        Initialize the storage.
+
+        Args:
+            root (str): The avatar directory. Created on first save.
+            base_url (str): URL prefix avatars are served under, e.g. `"/api/avatars"`.
+        """
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def path_for(self, digest: str) -> Optional[Path]:
+        """
+        Return the file of an avatar.
+
+        Args:
+            digest (str): The hex SHA-256 digest of the avatar.
+
+        Returns:
+            Optional[Path]: The path, or `None` if `digest` is not a valid digest.
+        """
+        if not _DIGEST_RE.fullmatch(digest):
+            return None
+        return self.root / digest[:2] / f"{digest}.jpg"
+
+    def _write(self, path: Path, data: bytes) -> None:
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    async def save(self, data: bytes, digest: str) -> str:
+        path = self.path_for(digest)
+        if path is None:
+            raise ValueError(f"Invalid avatar digest: {digest!r}")
+        await asyncio.to_thread(self._write, path, data)
+        return f"{self.base_url}/{digest}.jpg"
+
+
+def build_storage() -> AvatarStorage:
+    """
+    Create the avatar storage selected by `AVATAR_STORAGE`.
+
+    Returns:
+        AvatarStorage: The storage.
+
+    Raises:
+        ValueError: If `AVATAR_STORAGE` is not `"cloudinary"` or `"local"`.
+    """
+    if config.AVATAR_STORAGE == "cloudinary":
+        return CloudinaryStorage(
+            config.CLOUDINARY_NAME,
+            config.CLOUDINARY_API_KEY,
+            config.CLOUDINARY_API_SECRET,
+            upload_prefix=config.CLOUDINARY_UPLOAD_PREFIX,
+            timeout=config.UPLOAD_TIMEOUT_SECONDS,
+        )
+    if config.AVATAR_STORAGE == "local":
+        return LocalStorage(config.AVATAR_LOCAL_DIR, config.AVATAR_LOCAL_URL)
+    raise ValueError(f"Unsupported avatar storage: {config.AVATAR_STORAGE}")
+
+
+avatar_storage = build_storage()
+"""
+Global avatar storage of this worker.
+"""
@@ -1,69 +1,112 @@
-import cloudinary
-import cloudinary.uploader
+from fastapi import HTTPException, status
+
+from src.conf.config import config
+from src.services.cache import TwoTierCache
+from src.services.images import InvalidImageError, image_pool, preprocess_avatar
+from src.services.storage import AvatarStorage, avatar_storage
+from src.services.upload_stream import SpooledUpload
+
+avatar_url_cache = TwoTierCache(
+    "avatar_url",
+    ttl=config.AVATAR_CACHE_TTL_SECONDS,
+    local_ttl=config.AVATAR_CACHE_TTL_SECONDS,
+    max_size=config.AVATAR_CACHE_MAX_SIZE,
+)
+"""
+Cache of stored avatar URLs keyed by the digest of the preprocessed image, and
+by the digest of the raw upload prefixed with `raw:`.
+
+Entries never go stale since avatars are stored under their digest.
+"""
+
 
 class UploadFileService:
     """
-    A service class for uploading files to Cloudinary.
+    A service class for uploading avatars.
 
-    This class provides methods for configuring Cloudinary and uploading files, 
-    with default settings for resizing avatars.
+    Avatars are cropped, resized and re-encoded locally in `image_pool`, then
+    saved to an `AvatarStorage` under the digest of the result, so uploading an
+    identical avatar again skips the storage entirely. The digest of the raw file
+    is cached as well, so the same file sent twice is not even decoded again.
 
     Attributes:
         DEFAULT_AVATAR_HEIGHT (int): Default height for avatar images. Default is 250 pixels.
         DEFAULT_AVATAR_WIDTH (int): Default width for avatar images. Default is 250 pixels.
+        storage (AvatarStorage): Where avatars are saved.
+        cache (TwoTierCache): Avatar URLs by image digest.
+        deduplicated (int): Number of avatars whose upload was skipped.
     """
 
     DEFAULT_AVATAR_HEIGHT: int = 250
     DEFAULT_AVATAR_WIDTH: int = 250
 
-    def __init__(self, cloud_name: str, api_key: str, api_secret: str):
+    def __init__(self, storage: AvatarStorage, cache: TwoTierCache = avatar_url_cache):
         """
-        Initialize the UploadFileService with Cloudinary configuration.
+        Initialize the UploadFileService.
 
         Args:
-            cloud_name (str): The Cloudinary cloud name.
-            api_key (str): The Cloudinary API key.
-            api_secret (str): The Cloudinary API secret.
+            storage (AvatarStorage): Where avatars are saved.
+            cache (TwoTierCache): Avatar URLs by image digest.
 
         Example:
-            >>> service = UploadFileService("my_cloud_name", "my_api_key", "my_api_secret")
+            >>> service = UploadFileService(LocalStorage("media/avatars", "/api/avatars"))
         """
-        self.cloud_name = cloud_name
-        self.api_key = api_key
-        self.api_secret = api_secret
-        cloudinary.config(
-            cloud_name=self.cloud_name,
-            api_key=self.api_key,
-            api_secret=self.api_secret,
-            secure=True,
-        )
-
-    @staticmethod
-    def upload_file(file, username: str) -> str:
+        self.storage = storage
+        self.cache = cache
+        self.deduplicated = 0
+
+    async def upload_spooled_async(self, upload: SpooledUpload) -> str:
         """
-        Upload a file to Cloudinary and generate a resized URL.
+        Preprocess and store a streamed avatar upload.
 
-        The uploaded file is stored with a public ID that includes the username. The
-        resulting image URL is resized to the default avatar dimensions (250x250 pixels)
-        and cropped to fill the specified size.
+        The digest of the upload was computed while it was received, and an upload
+        rolled over to disk is read by the image worker from its file, so the API
+        process never holds a large upload in memory.
 
         Args:
-            file: The file to upload. This should be a file-like object with a `.file` attribute.
-            username (str): The username to use for the public ID in Cloudinary.
+            upload (SpooledUpload): The received image.
 
         Returns:
-            str: The URL of the uploaded and resized file.
+            str: The URL of the avatar.
 
-        Example:
-            >>> file_url = UploadFileService.upload_file(my_file, "username123")
-            >>> print(file_url)
+        Raises:
+            PoolSaturatedError: If too many images are being processed or uploaded.
+            HTTPException: If the file is not an image, or it cannot be stored.
         """
-        public_id = f"RestApp/{username}"
-        r = cloudinary.uploader.upload(file.file, public_id=public_id, overwrite=True)
-        src_url = cloudinary.CloudinaryImage(public_id).build_url(
-            width=UploadFileService.DEFAULT_AVATAR_WIDTH,
-            height=UploadFileService.DEFAULT_AVATAR_HEIGHT,
-            crop="fill",
-            version=r.get("version"),
-        )
-        return src_url
\ No newline at end of file
+        return await self._store(upload.source, upload.sha256)
+
+    async def _store(self, source: bytes | str, raw_digest: str) -> str:
+        raw_key = f"raw:{raw_digest}"
+        avatar_url = await self.cache.get(raw_key)
+        if avatar_url is not None:
+            self.deduplicated += 1
+            return avatar_url
+
+        try:
+            data, digest = await image_pool.run(
+                preprocess_avatar,
+                source,
+                self.DEFAULT_AVATAR_WIDTH,
+                self.DEFAULT_AVATAR_HEIGHT,
+                config.AVATAR_JPEG_QUALITY,
+            )
+        except InvalidImageError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The avatar must be an image",
+            )
+
+        avatar_url = await self.cache.get(digest)
+        if avatar_url is not None:
+            self.deduplicated += 1
+        else:
+            avatar_url = await self.storage.save(data, digest)
+            await self.cache.set(digest, avatar_url)
+        await self.cache.set(raw_key, avatar_url)
+        return avatar_url
+
+
+upload_file_service = UploadFileService(avatar_storage)
+"""
+Global upload service, configured once per worker.
+"""
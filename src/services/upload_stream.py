@@ -0,0 +1,325 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import AsyncIterator, Iterable, List, Optional
+
+from fastapi import HTTPException, Request, status
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+"""
+Allowance for the multipart envelope (boundaries, part headers, small form fields)
+on top of the file size limit when checking the size of the whole body.
+"""
+
+
+class SpooledUpload:
+    """
+    An uploaded file kept in memory until it outgrows `spool_bytes`, then on disk.
+
+    Unlike `SpooledTemporaryFile`, the file rolled to disk is a named file, so a
+    worker process can open it itself instead of receiving the content. The SHA-256
+    digest is computed while the chunks arrive.
+
+    Attributes:
+        filename (Optional[str]): The file name sent by the client.
+        content_type (Optional[str]): The content type sent by the client.
+        size (int): Number of bytes received.
+        path (Optional[str]): The file on disk, once the upload has been rolled over.
+    """
+
+    def __init__(self, spool_bytes: int, tmp_dir: Optional[str] = None):
+        """
+        Initialize an empty upload.
+
+        Args:
+            spool_bytes (int): Size above which the upload is moved to disk.
+            tmp_dir (Optional[str]): Directory of the rolled over file. Defaults to the
+                system temporary directory.
+        """
+        self.spool_bytes = spool_bytes
+        self.tmp_dir = tmp_dir
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.size = 0
+        self.path: Optional[str] = None
+        self._buffer = bytearray()
+        self._file = None
+        self._hash = hashlib.sha256()
+
+    @property
+    def sha256(self) -> str:
+        """
+        str: The hex SHA-256 digest of the bytes received so far.
+        """
+        return self._hash.hexdigest()
+
+    @property
+    def source(self) -> bytes | str:
+        """
+        bytes | str: The content if it is held in memory, otherwise the path of the file.
+        """
+        return self.path if self.path is not None else bytes(self._buffer)
+
+    def _roll(self, chunk: bytes) -> None:
+        fd, self.path = tempfile.mkstemp(dir=self.tmp_dir, suffix=".upload")
+        self._file = os.fdopen(fd, "wb")
+        self._file.write(self._buffer)
+        self._file.write(chunk)
+        self._buffer = bytearray()
+
+    async def write(self, chunk: bytes) -> None:
+        """
+        Append a chunk. Disk writes run in a thread.
+
+        Args:
+            chunk (bytes): The received bytes.
+        """
+        self.size += len(chunk)
+        self._hash.update(chunk)
+        if self._file is not None:
+            await asyncio.to_thread(self._file.write, chunk)
+        elif self.size > self.spool_bytes:
+            await asyncio.to_thread(self._roll, chunk)
+        else:
+            self._buffer += chunk
+
+    async def finish(self) -> None:
+        """
+        Flush the file on disk, if any, so other processes can read it.
+        """
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+
+    async def iter_chunks(self, chunk_bytes: int = 65536) -> AsyncIterator[bytes]:
+        """
+        Read the received bytes back after `finish()`. File reads run in a thread.
+
+        Args:
+            chunk_bytes (int): Size of the yielded chunks.
+
+        Yields:
+            bytes: The content, in order.
+        """
+        if self.path is None:
+            for start in range(0, len(self._buffer), chunk_bytes):
+                yield bytes(self._buffer[start:start + chunk_bytes])
+            return
+        with open(self.path, "rb") as file:
+            while chunk := await asyncio.to_thread(file.read, chunk_bytes):
+                yield chunk
+
+    def close(self) -> None:
+        """
+        Release the buffer and delete the file on disk, if any.
+        """
+        self._buffer = bytearray()
+        if self._file is not None:
+            self._file.close()
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class _AvatarPartParser:
+    """
+    Multipart callbacks that route the data of one file field into a `SpooledUpload`.
+
+    The callbacks of `MultipartParser` are synchronous, so they only record data
+    and errors; `read_upload` acts on them after every chunk.
+    """
+
+    def __init__(self, field: str, upload: SpooledUpload, content_types: Iterable[str]):
+        self.field = field
+        self.upload = upload
+        self.content_types = set(content_types)
+        self.found = False
+        self.chunks: List[bytes] = []
+        self.error: Optional[HTTPException] = None
+        self._in_field = False
+        self._header_name = b""
+        self._header_value = b""
+        self._headers = {}
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+        self._in_field = False
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition"))
+        if options.get(b"name", b"").decode("latin-1") != self.field or self.found:
+            return
+        self.found = True
+        self._in_field = True
+        content_type = self._headers.get(b"content-type", b"").decode("latin-1").strip().lower()
+        self.upload.content_type = content_type
+        filename = options.get(b"filename")
+        self.upload.filename = filename.decode("utf-8", "replace") if filename else None
+        if content_type not in self.content_types:
+            self.error = HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Unsupported avatar type: {content_type or 'unknown'}",
+            )
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_field and self.error is None:
+            self.chunks.append(data[start:end])
+
+    def on_part_end(self) -> None:
+        self._in_field = False
+
+
+async def read_upload(
+    request: Request,
+    field: str,
+    max_bytes: int,
+    content_types: Iterable[str],
+    spool_bytes: int,
+    tmp_dir: Optional[str] = None,
+) -> SpooledUpload:
+    """
+    Stream a file field of a `multipart/form-data` request into a `SpooledUpload`.
+
+    The body is parsed as it arrives instead of being buffered by `request.form()`.
+    A `Content-Length` over the limit is rejected before anything is read, and a
+    body without one is cut off as soon as the file exceeds `max_bytes`. The type
+    of the file is checked as soon as its part headers are parsed. Other fields are
+    skipped. The caller must `close()` the returned upload.
+
+    Args:
+        request (Request): The incoming HTTP request.
+        field (str): Name of the file field.
+        max_bytes (int): Maximum size of the file.
+        content_types (Iterable[str]): Accepted content types of the file.
+        spool_bytes (int): Size above which the file is moved to disk.
+        tmp_dir (Optional[str]): Directory of files moved to disk.
+
+    Returns:
+        SpooledUpload: The received file.
+
+    Raises:
+        HTTPException: 413 if the body or the file is too large, 415 if the request is
+            not multipart or the file type is not accepted, 400 if the body is malformed,
+            and 422 if the field is missing.
+    """
+    media_type, params = parse_options_header(request.headers.get("content-type"))
+    if media_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Expected a multipart/form-data body",
+        )
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"The avatar must not exceed {max_bytes} bytes",
+    )
+    max_body = max_bytes + MULTIPART_OVERHEAD_BYTES
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_body:
+        raise too_large
+
+    upload = SpooledUpload(spool_bytes, tmp_dir)
+    handler = _AvatarPartParser(field, upload, content_types)
+    parser = MultipartParser(params[b"boundary"], handler.callbacks())
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_body:
+                raise too_large
+            try:
+                parser.write(chunk)
+            except Exception:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Malformed multipart body",
+                )
+            if handler.error is not None:
+                raise handler.error
+            for data in handler.chunks:
+                if upload.size + len(data) > max_bytes:
+                    raise too_large
+                await upload.write(data)
+            handler.chunks.clear()
+        parser.finalize()
+        if not handler.found:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Missing file field: {field}",
+            )
+        await upload.finish()
+        return upload
+    except BaseException:
+        upload.close()
+        raise
+
+
+async def read_body(
+    request: Request,
+    max_bytes: int,
+    spool_bytes: int,
+    tmp_dir: Optional[str] = None,
+) -> SpooledUpload:
+    """
+    Stream a raw request body into a `SpooledUpload`.
+
+    A `Content-Length` over the limit is rejected before anything is read, and a
+    body without one is cut off as soon as it exceeds `max_bytes`. The caller must
+    `close()` the returned upload.
+
+    Args:
+        request (Request): The incoming HTTP request.
+        max_bytes (int): Maximum size of the body.
+        spool_bytes (int): Size above which the body is moved to disk.
+        tmp_dir (Optional[str]): Directory of bodies moved to disk.
+
+    Returns:
+        SpooledUpload: The received body.
+
+    Raises:
+        HTTPException: 413 if the body is too large.
+    """
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"The body must not exceed {max_bytes} bytes",
+    )
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+
+    upload = SpooledUpload(spool_bytes, tmp_dir)
+    upload.content_type = request.headers.get("content-type")
+    try:
+        async for chunk in request.stream():
+            if upload.size + len(chunk) > max_bytes:
+                raise too_large
+            await upload.write(chunk)
+        await upload.finish()
+        return upload
+    except BaseException:
+        upload.close()
+        raise
@@ -1,9 +1,12 @@
 import logging
 
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from libgravatar import Gravatar
 
 from src.repositories.users import UserRepository
+from src.services.cache import principal_cache, token_version_cache
 from src.schemas import UserCreate
 
 logging.basicConfig(
@@ -40,11 +43,17 @@ class UserService:
         This method attempts to retrieve a Gravatar image for the user's email address
         and uses it as the default avatar. If an error occurs, the avatar will be set to `None`.
 
+        Uniqueness is enforced by the database: the user is inserted directly, and only
+        when that violates a unique constraint is the conflicting field looked up.
+
         Args:
             body (UserCreate): The user creation data.
 
         Returns:
             User: The newly created user object.
+
+        Raises:
+            HTTPException: If the email or username is already in use.
         """
         avatar = None
         try:
@@ -53,7 +62,36 @@ class UserService:
         except Exception as e:
             logger.error("Create user exception occurred: %s", e)
 
-        return await self.repository.create_user(body, avatar)
+        try:
+            return await self.repository.create_user(body, avatar)
+        except IntegrityError:
+            conflict = await self.repository.find_conflict(body.email, body.username)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"You can't use this {conflict or 'email'}",
+            )
+
+    async def ensure_available(self, email: str, username: str) -> None:
+        """
+        Reject a registration whose email or username is already taken, in one query.
+
+        Registration calls it before hashing the password, so duplicates do not take
+        a slot of the hashing pool. `create_user` still handles a concurrent registration
+        that takes the email or username after this check.
+
+        Args:
+            email (str): The email address of the new user.
+            username (str): The username of the new user.
+
+        Raises:
+            HTTPException: If the email or username is already in use.
+        """
+        conflict = await self.repository.find_conflict(email, username)
+        if conflict is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"You can't use this {conflict}",
+            )
 
     async def get_user_by_username(self, username: str):
         """
@@ -79,6 +117,18 @@ class UserService:
         """
         return await self.repository.get_user_by_id(user_id)
 
+    async def get_token_version(self, user_id: int):
+        """
+        Retrieve the current token version of a user.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            int | None: The token version, or `None` if no user exists with the given ID.
+        """
+        return await self.repository.get_token_version(user_id)
+
     async def get_user_by_email(self, email: str):
         """
         Retrieve a user by their email address.
@@ -102,7 +152,9 @@ class UserService:
         Returns:
             User: The updated user object.
         """
-        return await self.repository.update_avatar_url(email, url)
+        user = await self.repository.update_avatar_url(email, url)
+        await principal_cache.delete(user.username)
+        return user
 
     async def confirmed_email(self, email: str):
         """
@@ -114,4 +166,35 @@ class UserService:
         Returns:
             None
         """
-        return await self.repository.confirm_email(email)
\ No newline at end of file
+        user = await self.repository.confirm_email(email)
+        await principal_cache.delete(user.username)
+
+    async def reset_password(self, user_id: int, hashed_password: str):
+        """
+        Replace a user's password hash.
+
+        Args:
+            user_id (int): The ID of the user.
+            hashed_password (str): The new password hash.
+
+        Returns:
+            User | None: The updated user object, or `None` if the user does not exist.
+        """
+        user = await self.repository.reset_password(user_id, hashed_password)
+        if user is not None:
+            await principal_cache.delete(user.username)
+            await token_version_cache.delete(str(user.id))
+        return user
+
+    async def update_password_hash(self, user_id: int, hashed_password: str):
+        """
+        Replace a user's password hash without revoking their tokens.
+
+        Args:
+            user_id (int): The ID of the user.
+            hashed_password (str): The new hash of the same password.
+
+        Returns:
+            None
+        """
+        return await self.repository.update_password_hash(user_id, hashed_password)
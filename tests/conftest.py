@@ -1,17 +1,20 @@
 import asyncio
+from datetime import date, datetime
 from unittest.mock import MagicMock
 
 import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.pool import StaticPool
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
 from main import app
 from src.db.models import Base, User, Contact
-from src.db.db import get_db
+from src.db.db import get_db, get_db_session_factory
 from src.schemas import ContactModel
 from src.services.auth import create_access_token, Hash
+from src.services.rate_limit import RateLimiter, MemoryGCRAStore
 
 SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
@@ -124,10 +127,21 @@ def client():
                 raise
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_db_session_factory] = lambda: TestingSessionLocal
 
     yield TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def rate_limiter(monkeypatch):
+    """
+    Fresh in-memory rate limiter for every test
+    """
+    test_limiter = RateLimiter(store=MemoryGCRAStore())
+    monkeypatch.setattr("src.services.rate_limit.limiter", test_limiter)
+    return test_limiter
+
+
 @pytest.fixture
 def auth_headers():
     """
@@ -158,4 +172,62 @@ def event_loop():
 @pytest_asyncio.fixture()
 async def get_token():
     token = await create_access_token(data={"sub": test_user["username"]})
-    return token
\ No newline at end of file
+    return token
+
+@pytest.fixture
+def add_records():
+    """
+    Fixture that commits model instances to the test database: `add_records(*records)`.
+    """
+    def add(*records):
+        async def commit():
+            async with TestingSessionLocal() as session:
+                session.add_all(records)
+                await session.commit()
+
+        asyncio.run(commit())
+
+    return add
+
+
+@pytest.fixture
+def seed_contacts(add_records):
+    """
+    Fixture that adds numbered contacts of the test user: `seed_contacts(count, prefix)`.
+
+    Names and emails start with `prefix`, and several contacts share a creation date.
+    """
+    def seed(count: int, prefix: str):
+        add_records(*(
+            Contact(
+                first_name=f"{prefix}{i:03}",
+                last_name=f"Last{i % 3}",
+                email=f"{prefix}{i}@example.com",
+                phone_number=f"+380{prefix}{i:04}",
+                birthday_date=date(1990, 1, 1),
+                # Several contacts share a timestamp, so the ID has to break ties.
+                created_at=datetime(2024, 1, 1 + i // 4),
+                user_id=test_user["id"],
+            )
+            for i in range(count)
+        ))
+
+    return seed
+
+
+@pytest.fixture
+def contact_statements():
+    """
+    Fixture recording the verb (`SELECT`, `INSERT`, ...) of every statement sent to the
+    test database that touches the contacts table, e.g. to count round trips.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        # Only the contacts table: resolving the caller reads users.
+        if " contacts" in statement:
+            statements.append(statement.split()[0].upper())
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
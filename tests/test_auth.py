@@ -3,7 +3,7 @@ from unittest.mock import Mock, AsyncMock
 import pytest
 
 from sqlalchemy import select
-from src.db.models import User
+from src.db.models import User, OutboxEmail
 from tests.conftest import TestingSessionLocal
 
 # Test user data
@@ -29,9 +29,7 @@ user_data_unique = {
 }
 
 
-def test_signup(client, monkeypatch):
-    mock_send_email = Mock()
-    monkeypatch.setattr("src.api.auth.send_email_confirmation", mock_send_email)
+def test_signup(client):
     response = client.post("api/auth/register", json=user_data)
     assert response.status_code == 201, response.text
     data = response.json()
@@ -41,25 +39,34 @@ def test_signup(client, monkeypatch):
     assert "avatar" in data
 
 
+@pytest.mark.asyncio
+async def test_signup_queues_confirmation_email(client):
+    async with TestingSessionLocal() as session:
+        result = await session.execute(
+            select(OutboxEmail).where(OutboxEmail.recipient == user_data["email"])
+        )
+        emails = result.scalars().all()
+
+    assert [(e.kind, e.status) for e in emails] == [("email_confirmation", "pending")]
+    assert emails[0].payload["username"] == user_data["username"]
+
+
 def test_signup_same_email(client, monkeypatch):
-    mock_send_email = Mock()
-    monkeypatch.setattr("src.api.auth.send_email_confirmation", mock_send_email)
+    hash_password = AsyncMock()
+    monkeypatch.setattr("src.api.auth.Hash.get_pwd_hash_async", hash_password)
     response = client.post("api/auth/register", json=user_data)
     assert response.status_code == 409, response.text
     assert response.json()["detail"] == "You can't use this email"
+    hash_password.assert_not_awaited()
 
 
-def test_signup_same_username(client, monkeypatch):
-    mock_send_email = Mock()
-    monkeypatch.setattr("src.api.auth.send_email_confirmation", mock_send_email)
+def test_signup_same_username(client):
     response = client.post("api/auth/register", json=user_data_unique_email)
     assert response.status_code == 409, response.text
     assert response.json()["detail"] == "You can't use this username"
 
 
-def test_repeat_signup(client, monkeypatch):
-    mock_send_email = Mock()
-    monkeypatch.setattr("src.api.auth.send_email_confirmation", mock_send_email)
+def test_repeat_signup(client):
     response = client.post("api/auth/register", json=user_data)
     assert response.status_code == 409, response.text
     data = response.json()
@@ -168,10 +175,7 @@ async def test_confirm_email_already_confirmed(client, monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_request_email(client, monkeypatch):
-    mock_send_email = AsyncMock()
-    monkeypatch.setattr("src.api.auth.send_email_confirmation", mock_send_email)
-
+async def test_request_email(client):
     client.post("api/auth/register", json=user_data_unique)
     response = client.post(
         "api/auth/request_email", json={"email": user_data_unique["email"]}
@@ -0,0 +1,141 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.db.models import User, Role
+from src.services.auth import get_current_user, create_access_token
+from src.services.cache import TwoTierCache, principal_cache, token_version_cache
+from src.services.users import UserService
+
+
+class DictBackend:
+    """
+    Minimal in-memory stand-in for the aiocache Redis backend.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ttl=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.mark.asyncio
+async def test_local_hit_after_set():
+    cache = TwoTierCache("test", ttl=60, local_ttl=60, max_size=10, backend=DictBackend())
+
+    await cache.set("alice", {"id": 1})
+
+    assert await cache.get("alice") == {"id": 1}
+    assert cache.stats()["local_hits"] == 1
+    assert cache.stats()["misses"] == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_hit_refills_local_layer():
+    backend = DictBackend()
+    cache = TwoTierCache("test", ttl=60, local_ttl=60, max_size=10, backend=backend)
+    backend.data["test:alice"] = {"id": 1}
+
+    assert await cache.get("alice") == {"id": 1}
+    assert await cache.get("alice") == {"id": 1}
+
+    stats = cache.stats()
+    assert stats["redis_hits"] == 1
+    assert stats["local_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_miss():
+    cache = TwoTierCache("test", ttl=60, local_ttl=60, max_size=2, backend=DictBackend())
+    cache._backend.get = AsyncMock(return_value=None)
+
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    await cache.get("a")
+    await cache.set("c", 3)
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_delete_removes_both_layers():
+    backend = DictBackend()
+    cache = TwoTierCache("test", ttl=60, local_ttl=60, max_size=10, backend=backend)
+
+    await cache.set("alice", 1)
+    await cache.delete("alice")
+
+    assert backend.data == {}
+    assert await cache.get("alice") is None
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_fall_back_to_local_layer():
+    backend = MagicMock()
+    backend.get = AsyncMock(side_effect=ConnectionError("down"))
+    backend.set = AsyncMock(side_effect=ConnectionError("down"))
+    cache = TwoTierCache("test", ttl=60, local_ttl=60, max_size=10, backend=backend)
+
+    await cache.set("alice", 1)
+    assert await cache.get("alice") == 1
+    assert await cache.get("bob") is None
+    assert cache.stats()["redis_errors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_uses_cache(monkeypatch):
+    principal_cache.clear_local()
+    user = User(
+        id=42,
+        username="cached",
+        email="cached@example.com",
+        hashed_password="hash",
+        avatar="https://example.com/avatar.png",
+        confirmed=True,
+        role=Role.USER,
+    )
+    mock_user_service = MagicMock()
+    mock_user_service.get_user_by_username = AsyncMock(return_value=user)
+    monkeypatch.setattr("src.services.auth.UserService", lambda db: mock_user_service)
+    token = await create_access_token(data={"sub": "cached"})
+
+    first = await get_current_user(token, db=None)
+    second = await get_current_user(token, db=None)
+
+    assert first.id == second.id == 42
+    assert second.hashed_password is None
+    mock_user_service.get_user_by_username.assert_awaited_once_with("cached")
+
+    await principal_cache.delete("cached")
+
+
+@pytest.mark.asyncio
+async def test_user_service_writes_invalidate_caches(monkeypatch):
+    user = User(id=7, username="stale", email="stale@example.com", token_version=1)
+    repository = MagicMock()
+    repository.confirm_email = AsyncMock(return_value=user)
+    repository.update_avatar_url = AsyncMock(return_value=user)
+    repository.reset_password = AsyncMock(return_value=user)
+    service = UserService(MagicMock())
+    service.repository = repository
+    principal_delete = AsyncMock()
+    token_version_delete = AsyncMock()
+    monkeypatch.setattr(principal_cache, "delete", principal_delete)
+    monkeypatch.setattr(token_version_cache, "delete", token_version_delete)
+
+    await service.confirmed_email(user.email)
+    await service.update_avatar_url(user.email, "https://example.com/new.png")
+    await service.reset_password(user.id, "new_hash")
+
+    assert principal_delete.await_count == 3
+    principal_delete.assert_awaited_with("stale")
+    token_version_delete.assert_awaited_once_with("7")
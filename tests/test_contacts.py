@@ -1,7 +1,25 @@
+import asyncio
+import csv
+import io
+import json
+import os
+from contextlib import asynccontextmanager
+from datetime import date
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 from fastapi import HTTPException, status
+from sqlalchemy import text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.db.models import Base, Contact, User
+from src.repositories.contacts import ContactRepository
 from src.schemas import ContactModel
+from src.services.contact_import import import_contacts
+from src.services.pagination import encode_cursor
+from tests.conftest import TestingSessionLocal, test_user
 
 # Mock user data
 user_data = {
@@ -121,4 +139,579 @@ async def test_delete_contact_not_found(client, monkeypatch, auth_headers):
     # Assertions
     assert response.status_code == 404
     assert response.json()["detail"] == "Contact not found."
-    mock_delete_contact.assert_called_once_with(contact_id)
\ No newline at end of file
+    mock_delete_contact.assert_called_once_with(contact_id)
+
+
+@pytest.mark.parametrize("sort", ["created_at", "last_name"])
+def test_contacts_keyset_pagination_walks_every_contact_once(client, seed_contacts, sort):
+    prefix = "Ks" if sort == "created_at" else "Kl"
+    seed_contacts(23, prefix)
+
+    seen, url, pages = [], f"/api/contacts/?first_name={prefix}&limit=10&sort={sort}", 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        seen += response.json()
+        pages += 1
+        link = response.headers.get("link")
+        url = link[link.index("<") + 1:link.index(">")] if link else None
+        assert (link is None) == ("x-next-cursor" not in response.headers)
+
+    assert pages == 3
+    assert len({c["id"] for c in seen}) == len(seen) == 23
+    keys = [(c[sort], c["id"]) for c in seen]
+    assert keys == sorted(keys)
+
+
+def test_contacts_skip_is_kept_and_limit_is_capped(client, monkeypatch, seed_contacts):
+    seed_contacts(6, "Sk")
+    monkeypatch.setattr("src.conf.config.config.CONTACTS_MAX_PAGE_SIZE", 4)
+
+    first = client.get("/api/contacts/?first_name=Sk&limit=50")
+    skipped = client.get("/api/contacts/?first_name=Sk&skip=2&limit=2")
+
+    assert len(first.json()) == 4
+    assert [c["id"] for c in skipped.json()] == [c["id"] for c in first.json()][2:4]
+    assert "skip=" not in skipped.headers["link"]
+
+
+def test_contacts_invalid_cursor(client):
+    response = client.get("/api/contacts/?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+    response = client.get(f"/api/contacts/?sort=last_name&cursor={encode_cursor('created_at', 'x', 1)}")
+    assert response.status_code == 400
+
+
+def test_contacts_substring_search_uses_the_fts_index(client, seed_contacts):
+    seed_contacts(5, "Srch")
+
+    response = client.get("/api/contacts/?first_name=rch002")
+    assert [c["first_name"] for c in response.json()] == ["Srch002"]
+    response = client.get("/api/contacts/?first_name=Srch&email=h4@example")
+    assert [c["email"] for c in response.json()] == ["Srch4@example.com"]
+
+    async def rename_and_inspect():
+        async with TestingSessionLocal() as session:
+            await session.execute(
+                update(Contact).where(Contact.first_name == "Srch001").values(first_name="Renamed")
+            )
+            await session.commit()
+            names = await session.execute(text("SELECT name FROM sqlite_master"))
+            return {name for name, in names}
+
+    names = asyncio.run(rename_and_inspect())
+    assert "contacts_fts" in names
+    assert "ix_contacts_first_name_trgm" not in names
+    assert client.get("/api/contacts/?first_name=Srch001").json() == []
+    assert len(client.get("/api/contacts/?first_name=enamed").json()) == 1
+
+
+def test_search_contacts_ranks_name_matches_first(client, add_records):
+    add_records(
+        Contact(first_name="Olena", last_name="Kovalenko", email="olena@mail.com",
+                phone_number="+380671110001", birthday_date=date(1990, 1, 1),
+                info="Met Marta at the conference", user_id=test_user["id"]),
+        Contact(first_name="Marta", last_name="Shevchenko", email="ms@mail.com",
+                phone_number="+380671110002", birthday_date=date(1990, 1, 1),
+                user_id=test_user["id"]),
+        Contact(first_name="Taras", last_name="Martynenko", email="taras@mail.com",
+                phone_number="+380671110003", birthday_date=date(1990, 1, 1),
+                info="dentist", user_id=test_user["id"]),
+    )
+
+    response = client.get("/api/contacts/search?q=marta")
+    assert response.status_code == 200
+    assert [c["first_name"] for c in response.json()] == ["Marta", "Olena"]
+
+    response = client.get("/api/contacts/search?q=mart")
+    assert [c["first_name"] for c in response.json()][-1] == "Olena"
+    assert len(response.json()) == 3
+
+    assert [c["first_name"] for c in client.get("/api/contacts/search?q=mart dent").json()] == ["Taras"]
+    assert [c["first_name"] for c in client.get("/api/contacts/search?q=380671110002").json()] == ["Marta"]
+    assert len(client.get("/api/contacts/search?q=mart&skip=1&limit=1").json()) == 1
+    assert client.get("/api/contacts/search?q=%22%29(").json() == []
+    assert client.get("/api/contacts/search?q=").status_code == 422
+
+
+SEARCH_DATABASE_URLS = [
+    pytest.param("sqlite+aiosqlite://", id="sqlite"),
+    pytest.param(
+        os.environ.get("TEST_POSTGRES_URL"),
+        marks=pytest.mark.skipif(
+            not os.environ.get("TEST_POSTGRES_URL"),
+            reason="TEST_POSTGRES_URL (an empty PostgreSQL database) is not set",
+        ),
+        id="postgresql",
+    ),
+]
+
+
+@pytest.mark.parametrize("url", SEARCH_DATABASE_URLS)
+def test_search_contacts_splits_emails_and_phones_into_words(url):
+    asyncio.run(_check_search_words(url))
+
+
+async def _check_search_words(url: str):
+    engine = create_async_engine(url, poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        async with async_sessionmaker(bind=engine, expire_on_commit=False)() as session:
+            owner = User(username="searcher", email="searcher@example.com", hashed_password="x")
+            session.add(owner)
+            await session.flush()
+            session.add_all([
+                Contact(first_name="John", last_name="Doe", email="john.doe@example.com",
+                        phone_number="+380501234567", birthday_date=date(1990, 1, 1),
+                        info="Prefers e-mail", user_id=owner.id),
+                Contact(first_name="Jane", last_name="Roe", email="jane_roe@mail.org",
+                        phone_number="+380679876543", birthday_date=date(1990, 1, 1),
+                        user_id=owner.id),
+            ])
+            await session.commit()
+            repository = ContactRepository(session)
+
+            async def names(q):
+                return sorted(c.first_name for c in await repository.search_contacts(q, 0, 10))
+
+            assert await names("john.doe@example") == ["John"]
+            assert await names("doe") == ["John"]
+            assert await names("example.com") == ["John"]
+            assert await names("380501") == ["John"]
+            assert await names("+380679") == ["Jane"]
+            assert await names("roe") == ["Jane"]
+            assert await names("mail") == ["Jane", "John"]
+            assert await names("234567") == []
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+def test_upcoming_birthdays_wrap_around_the_year():
+    asyncio.run(_check_upcoming_birthdays())
+
+
+async def _check_upcoming_birthdays():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    birthdays = {
+        "Dec30": date(1980, 12, 30),
+        "Jan02": date(1991, 1, 2),
+        "Jan20": date(1985, 1, 20),
+        "Feb28": date(1990, 2, 28),
+        "Feb29": date(1992, 2, 29),
+        "Mar01": date(1993, 3, 1),
+        "Dec01": date(1970, 12, 1),
+    }
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        session.add_all(
+            Contact(first_name=name, last_name="Test", email=f"{name}@example.com",
+                    phone_number=f"+38050{i:07}", birthday_date=birthday, user_id=1)
+            for i, (name, birthday) in enumerate(birthdays.items())
+        )
+        await session.commit()
+        repository = ContactRepository(session)
+
+        async def upcoming(today, days, **page):
+            contacts = await repository.get_upcoming_birthdays(days, today=today, **page)
+            return [contact.first_name for contact in contacts]
+
+        assert await upcoming(date(2024, 12, 28), 7) == ["Dec30", "Jan02"]
+        assert await upcoming(date(2024, 12, 28), 7, skip=1, limit=1) == ["Jan02"]
+        assert await upcoming(date(2025, 2, 25), 3) == ["Feb28", "Feb29"]
+        assert await upcoming(date(2024, 2, 25), 3) == ["Feb28"]
+        assert await upcoming(date(2025, 3, 1), 2) == ["Mar01"]
+        assert await upcoming(date(2025, 1, 15), 10) == ["Jan20"]
+        assert await upcoming(date(2025, 6, 1), 400) == [
+            "Dec01", "Dec30", "Jan02", "Jan20", "Feb28", "Feb29", "Mar01"
+        ]
+        assert await upcoming(date(2025, 1, 10), 365) == [
+            "Jan20", "Feb28", "Feb29", "Mar01", "Dec01", "Dec30", "Jan02"
+        ]
+
+        contact = (await repository.get_upcoming_birthdays(1, today=date(2025, 1, 2)))[0]
+        contact.birthday_date = date(1991, 6, 15)
+        await session.commit()
+        assert contact.birthday_mmdd == 615
+        assert await upcoming(date(2025, 6, 15), 1) == ["Jan02"]
+    await engine.dispose()
+
+
+def _bulk_item(i: int, **overrides) -> dict:
+    item = {
+        "first_name": f"Bulk{i}",
+        "last_name": "Importer",
+        "email": f"bulk{i}@example.com",
+        "phone_number": f"+3806300{i:05}",
+        "birthday_date": "1990-05-17",
+    }
+    return {**item, **overrides}
+
+
+def test_create_contacts_bulk_reports_every_item(client, monkeypatch, get_token, seed_contacts):
+    monkeypatch.setattr("src.conf.config.config.CONTACTS_BULK_CHUNK_SIZE", 2)
+    headers = {"Authorization": f"Bearer {get_token}"}
+    seed_contacts(1, "Taken")
+
+    items = [
+        _bulk_item(0),
+        _bulk_item(1, email="not-an-email"),
+        _bulk_item(2, email="Taken0@example.com"),
+        _bulk_item(3),
+        _bulk_item(4, phone_number=_bulk_item(0)["phone_number"]),
+        "not an object",
+        _bulk_item(6),
+    ]
+    response = client.post("/api/contacts/bulk", json=items, headers=headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["conflicts"], body["invalid"]) == (3, 2, 2)
+    statuses = [result["status"] for result in body["results"]]
+    assert statuses == ["created", "invalid", "conflict", "created", "conflict", "invalid", "created"]
+    assert [result["index"] for result in body["results"]] == list(range(7))
+    assert body["results"][3]["contact"]["email"] == "bulk3@example.com"
+    assert "email" in body["results"][1]["error"]
+
+    created_id = body["results"][0]["contact"]["id"]
+    assert client.get(f"/api/contacts/{created_id}").json()["first_name"] == "Bulk0"
+
+    again = client.post("/api/contacts/bulk", json=[_bulk_item(0)], headers=headers).json()
+    assert again["conflicts"] == 1
+
+    assert client.post("/api/contacts/bulk", json=[_bulk_item(9)]).status_code == 401
+    assert client.post("/api/contacts/bulk", json=[], headers=headers).status_code == 422
+
+
+def test_import_contacts_streams_progress_and_rejected_rows(client, monkeypatch, get_token, seed_contacts):
+    monkeypatch.setattr("src.conf.config.config.CONTACTS_IMPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr("src.conf.config.config.CONTACTS_IMPORT_SPOOL_BYTES", 64)
+    headers = {"Authorization": f"Bearer {get_token}"}
+    seed_contacts(1, "ImportTaken")
+
+    csv_body = (
+        "﻿First_Name,last_name,email,phone_number,birthday_date,info\r\n"
+        'Csv,Importer,csv0@example.com,+380670000000,1990-01-01,"two\r\nlines, quoted"\r\n'
+        "Csv,Importer,not-an-email,+380670000001,1990-01-01,\r\n"
+        "Csv,Importer,ImportTaken0@example.com,+380670000002,1990-01-01,\r\n"
+        "Csv,Importer\r\n"
+        "\r\n"
+        "Csv,Importer,csv4@example.com,+380670000004,1990-01-01,\r\n"
+    )
+    response = client.post(
+        "/api/contacts/import",
+        content=csv_body.encode(),
+        headers={**headers, "Content-Type": "text/csv"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    events = [json.loads(line) for line in response.text.splitlines()]
+    rejected = [(e["line"], e["status"]) for e in events if e["event"] == "rejected"]
+    assert sorted(rejected) == [(4, "invalid"), (5, "conflict"), (6, "invalid")]
+    assert [e["rows"] for e in events if e["event"] == "progress"] == [2, 4, 5]
+    assert events[-1] == {"event": "done", "rows": 5, "created": 2, "conflicts": 1, "invalid": 2, "failed": 0}
+    found = client.get("/api/contacts/", params={"email": "csv0@example.com"}).json()
+    assert found[0]["info"] == "two\nlines, quoted"
+
+    ndjson_body = "\n".join([
+        json.dumps(_bulk_item(100)),
+        "{not json",
+        json.dumps(_bulk_item(101, email="csv4@example.com")),
+        "[]",
+        json.dumps(_bulk_item(102)),
+    ])
+    response = client.post(
+        "/api/contacts/import",
+        content=ndjson_body.encode(),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    events = [json.loads(line) for line in response.text.splitlines()]
+    rejected = [(e["line"], e["status"]) for e in events if e["event"] == "rejected"]
+    assert sorted(rejected) == [(2, "invalid"), (3, "conflict"), (4, "invalid")]
+    assert events[-1] == {"event": "done", "rows": 5, "created": 2, "conflicts": 1, "invalid": 2, "failed": 0}
+
+    unterminated = client.post(
+        "/api/contacts/import?format=csv",
+        content=b'first_name,last_name\n"open,quote\n',
+        headers=headers,
+    )
+    assert json.loads(unterminated.text.splitlines()[-1])["event"] == "error"
+
+    assert client.post("/api/contacts/import", content=b"x", headers=headers).status_code == 415
+    assert client.post(
+        "/api/contacts/import", content=b"{}", headers={"Content-Type": "text/csv"}
+    ).status_code == 401
+
+
+def test_import_contacts_parses_at_most_max_in_flight_batches_ahead():
+    read = {"lines": 0}
+    ahead = []
+
+    async def chunks():
+        for i in range(40):
+            read["lines"] += 1
+            yield (json.dumps(_bulk_item(200 + i)) + "\n").encode()
+
+    @asynccontextmanager
+    async def session_factory():
+        ahead.append(read["lines"] - 4 * len(ahead))
+        async with TestingSessionLocal() as session:
+            yield session
+
+    async def run():
+        return [
+            event async for event in import_contacts(
+                chunks(), "ndjson", test_user["id"], session_factory, batch_size=4, max_in_flight=2
+            )
+        ]
+
+    events = asyncio.run(run())
+    assert events[-1] == {"event": "done", "rows": 40, "created": 40, "conflicts": 0, "invalid": 0, "failed": 0}
+    # The batch being written, two queued batches and the one being filled.
+    assert len(ahead) == 10 and max(ahead) <= 4 * 4
+
+
+def test_import_contacts_reports_a_batch_that_keeps_colliding(monkeypatch):
+    create_contacts = ContactRepository.create_contacts
+    attempts = []
+
+    async def collide(self, rows):
+        if any(row["email"] == "bulk301@example.com" for row in rows):
+            attempts.append(len(rows))
+            raise IntegrityError("INSERT INTO contacts", {}, Exception("UNIQUE constraint failed"))
+        return await create_contacts(self, rows)
+
+    monkeypatch.setattr(ContactRepository, "create_contacts", collide)
+
+    async def chunks():
+        for i in range(5):
+            yield (json.dumps(_bulk_item(300 + i)) + "\n").encode()
+
+    async def run():
+        return [
+            event async for event in import_contacts(
+                chunks(), "ndjson", test_user["id"], TestingSessionLocal, batch_size=2
+            )
+        ]
+
+    events = asyncio.run(run())
+    assert attempts == [2, 2]
+    assert events[0] == {
+        "event": "error",
+        "error": "Conflicting concurrent writes",
+        "first_line": 1,
+        "last_line": 2,
+        "rows": 2,
+        "created": 0,
+        "conflicts": 0,
+        "invalid": 0,
+        "failed": 2,
+    }
+    assert [e["event"] for e in events[1:]] == ["progress", "progress", "done"]
+    assert events[-1] == {"event": "done", "rows": 5, "created": 3, "conflicts": 0, "invalid": 0, "failed": 2}
+
+
+def test_export_contacts_streams_every_matching_row(client, monkeypatch, seed_contacts):
+    monkeypatch.setattr("src.conf.config.config.CONTACTS_EXPORT_BATCH_SIZE", 3)
+    seed_contacts(10, "Export")
+    listed = client.get("/api/contacts/", params={"email": "export", "limit": 100}).json()
+    assert len(listed) == 10
+
+    response = client.get("/api/contacts/export", params={"email": "export"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == listed
+
+    response = client.get("/api/contacts/export", params={"email": "export", "format": "csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="contacts.csv"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["email"] for row in rows] == [contact["email"] for contact in listed]
+    assert rows[0]["birthday_date"] == listed[0]["birthday_date"]
+    assert rows[0]["created_at"] == listed[0]["created_at"]
+    assert rows[0]["info"] == ""
+
+    empty = client.get("/api/contacts/export", params={"email": "no-such-contact", "format": "csv"})
+    assert empty.text.splitlines() == response.text.splitlines()[:1]
+
+
+def test_contact_writes_take_one_statement(client, get_token, contact_statements):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    statements = contact_statements
+
+    item = _bulk_item(300, info="single")
+    created = client.post("/api/contacts/", json=item, headers=headers)
+    assert created.status_code == 201
+    assert statements == ["INSERT"]
+    contact = created.json()
+    assert contact["info"] == "single" and contact["created_at"]
+
+    statements.clear()
+    assert client.post("/api/contacts/", json=item, headers=headers).status_code == 400
+    assert statements == ["INSERT"]
+
+    statements.clear()
+    changed = client.put(
+        f"/api/contacts/{contact['id']}",
+        json={**item, "first_name": "Renamed", "birthday_date": "1990-12-31"},
+    )
+    assert changed.status_code == 200
+    assert statements == ["UPDATE"]
+    assert changed.json()["first_name"] == "Renamed"
+    assert changed.json()["birthday_date"] == "1990-12-31"
+
+    other = client.post("/api/contacts/", json=_bulk_item(301), headers=headers).json()
+    duplicate = client.put(f"/api/contacts/{other['id']}", json={**_bulk_item(301), "email": item["email"]})
+    assert duplicate.status_code == 400 and item["email"] in duplicate.json()["detail"]
+    taken_phone = {**_bulk_item(301), "phone_number": item["phone_number"]}
+    assert client.put(f"/api/contacts/{other['id']}", json=taken_phone).status_code == 400
+    assert client.get(f"/api/contacts/{other['id']}").json()["email"] == other["email"]
+
+    statements.clear()
+    assert client.put("/api/contacts/999999", json=item).status_code == 404
+    assert client.delete(f"/api/contacts/{contact['id']}").json()["first_name"] == "Renamed"
+    assert statements == ["UPDATE", "DELETE"]
+    assert client.delete(f"/api/contacts/{contact['id']}").status_code == 404
+    assert client.post("/api/contacts/", json=item).status_code == 401
+
+
+def test_upsert_contacts_by_email_is_idempotent(client, monkeypatch, get_token, contact_statements):
+    monkeypatch.setattr("src.conf.config.config.CONTACTS_BULK_CHUNK_SIZE", 2)
+    headers = {"Authorization": f"Bearer {get_token}"}
+
+    item = _bulk_item(400)
+    created = client.put(f"/api/contacts/by-email/{item['email']}", json=item, headers=headers)
+    assert created.status_code == 200
+    assert contact_statements == ["INSERT"]
+    contact_statements.clear()
+    updated = client.put(
+        f"/api/contacts/by-email/{item['email']}",
+        json={**item, "first_name": "Upserted", "birthday_date": "1990-12-31"},
+        headers=headers,
+    )
+    assert contact_statements == ["INSERT"]
+    assert updated.json()["id"] == created.json()["id"]
+    assert updated.json()["first_name"] == "Upserted"
+    assert client.get(f"/api/contacts/{created.json()['id']}").json()["birthday_date"] == "1990-12-31"
+
+    mismatch = client.put("/api/contacts/by-email/other@example.com", json=item, headers=headers)
+    assert mismatch.status_code == 400
+    taken_phone = {**_bulk_item(401), "phone_number": item["phone_number"]}
+    conflict = client.put(
+        f"/api/contacts/by-email/{taken_phone['email']}", json=taken_phone, headers=headers
+    )
+    assert conflict.status_code == 400 and "phone" in conflict.json()["detail"]
+    assert client.put(f"/api/contacts/by-email/{item['email']}", json=item).status_code == 401
+
+    items = [
+        _bulk_item(400, first_name="Again"),
+        _bulk_item(402),
+        _bulk_item(403, email="not-an-email"),
+        _bulk_item(404, phone_number=item["phone_number"]),
+        _bulk_item(405),
+        _bulk_item(402, last_name="Latest"),
+    ]
+    for _ in range(2):
+        response = client.put("/api/contacts/by-email", json=items, headers=headers)
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["upserted"], body["conflicts"], body["invalid"]) == (3, 2, 1)
+        statuses = [result["status"] for result in body["results"]]
+        assert statuses == ["upserted", "conflict", "invalid", "conflict", "upserted", "upserted"]
+        assert body["results"][0]["contact"]["id"] == created.json()["id"]
+        assert body["results"][5]["contact"]["last_name"] == "Latest"
+    found = client.get("/api/contacts/", params={"email": "bulk40"}).json()
+    assert sorted(contact["email"] for contact in found) == [
+        "bulk400@example.com", "bulk402@example.com", "bulk405@example.com"
+    ]
+
+
+def test_contacts_total_count_modes(client, monkeypatch, seed_contacts, contact_statements):
+    seed_contacts(12, "Counted")
+    params = {"first_name": "Counted", "limit": 5}
+    assert "X-Total-Count" not in client.get("/api/contacts/", params=params).headers
+
+    contact_statements.clear()
+    first = client.get("/api/contacts/", params={**params, "count": "exact"})
+    assert contact_statements == ["SELECT"]
+    assert first.headers["X-Total-Count"] == "12"
+    assert first.headers["X-Total-Count-Mode"] == "exact"
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get("/api/contacts/", params={**params, "count": "exact", "cursor": cursor})
+    assert second.headers["X-Total-Count"] == "12"
+    beyond = client.get("/api/contacts/", params={**params, "count": "exact", "skip": 100})
+    assert beyond.json() == [] and beyond.headers["X-Total-Count"] == "12"
+
+    # SQLite has no statistics for filters: it counts, and says so.
+    counted = client.get("/api/contacts/", params={**params, "count": "estimated"})
+    assert counted.headers["X-Total-Count-Mode"] == "exact"
+    assert counted.headers["X-Total-Count"] == "12"
+    estimated = client.get("/api/contacts/", params={"limit": 5, "count": "estimated"})
+    assert estimated.headers["X-Total-Count-Mode"] == "estimated"
+    assert int(estimated.headers["X-Total-Count"]) >= 12
+
+    monkeypatch.setattr("src.conf.config.config.CONTACTS_EXACT_COUNT_MAX", 10)
+    degraded = client.get("/api/contacts/", params={"limit": 5, "count": "exact"})
+    assert degraded.headers["X-Total-Count-Mode"] == "estimated"
+    assert int(degraded.headers["X-Total-Count"]) >= 12
+    assert len(degraded.json()) == 5
+    contact_statements.clear()
+    capped = client.get("/api/contacts/", params={**params, "count": "exact"})
+    assert contact_statements == ["SELECT"]
+    assert capped.headers["X-Total-Count-Mode"] == "estimated"
+    assert capped.headers["X-Total-Count"] == "11"
+
+    assert client.get("/api/contacts/", params={"count": "all"}).status_code == 422
+
+
+def test_upsert_contacts_keep_contacts_of_other_users(client, monkeypatch, get_token, add_records):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    theirs = _bulk_item(420)
+    owner = User(username="upsert-owner", email="upsert-owner@example.com", hashed_password="x")
+    add_records(owner, Contact(**{**theirs, "birthday_date": date(1990, 5, 17)}, user=owner))
+    conflict = client.put(
+        f"/api/contacts/by-email/{theirs['email']}",
+        json={**theirs, "first_name": "Hijacked"},
+        headers=headers,
+    )
+    assert conflict.status_code == 409 and "another user" in conflict.json()["detail"]
+
+    items = [{**theirs, "first_name": "Hijacked"}, _bulk_item(421)]
+    body = client.put("/api/contacts/by-email", json=items, headers=headers).json()
+    assert (body["upserted"], body["conflicts"]) == (1, 1)
+    assert body["results"][0]["status"] == "conflict" and "another user" in body["results"][0]["error"]
+    found = client.get("/api/contacts/", params={"email": theirs["email"]}).json()
+    assert [contact["first_name"] for contact in found] == [theirs["first_name"]]
+
+    # A phone number taken again by a concurrent request during the retry.
+    monkeypatch.setattr(
+        "src.repositories.contacts.ContactRepository.upsert_contacts",
+        AsyncMock(side_effect=IntegrityError("INSERT", {}, Exception("UNIQUE"))),
+    )
+    racer = _bulk_item(423)
+    owners = AsyncMock(side_effect=[{}, {}, {racer["phone_number"]: "racer@example.com"}])
+    monkeypatch.setattr("src.repositories.contacts.ContactRepository.find_phone_owners", owners)
+    response = client.put("/api/contacts/by-email", json=[_bulk_item(422), racer], headers=headers)
+    assert response.status_code == 409
+    assert response.json()["detail"].startswith("Item 1: ")
+
+
+def test_contacts_created_in_the_same_second_are_paged_once(client, get_token):
+    headers = {"Authorization": f"Bearer {get_token}"}
+    created = [
+        client.post("/api/contacts/", json=_bulk_item(500 + i, first_name=f"Same{i}"), headers=headers)
+        for i in range(5)
+    ]
+    assert [response.status_code for response in created] == [201] * 5
+
+    seen, url = [], "/api/contacts/?first_name=Same&limit=2"
+    while url:
+        response = client.get(url)
+        seen += [contact["id"] for contact in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        url = f"/api/contacts/?first_name=Same&limit=2&cursor={cursor}" if cursor else None
+    assert seen == [response.json()["id"] for response in created]
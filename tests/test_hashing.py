@@ -0,0 +1,54 @@
+import pytest
+from passlib.context import CryptContext
+from sqlalchemy import select
+
+from src.conf.config import config
+from src.db.models import User
+from src.services import hashing
+from tests.conftest import TestingSessionLocal, test_user
+
+cheap_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+
+
+def test_needs_rehash_for_other_cost():
+    assert hashing.needs_rehash(cheap_context.hash("secret"))
+    assert not hashing.needs_rehash(hashing.hash_password("secret"))
+
+
+def test_calibrate_picks_highest_cost_within_budget(monkeypatch):
+    monkeypatch.setattr(
+        hashing, "measure_rounds", lambda rounds, samples=3: 2 ** (rounds - 4)
+    )
+
+    chosen, timings = hashing.calibrate(target_ms=100, min_rounds=8, max_rounds=16)
+
+    assert chosen == 10
+    assert list(timings) == [8, 9, 10, 11]
+
+
+def test_calibrate_falls_back_to_min_rounds(monkeypatch):
+    monkeypatch.setattr(hashing, "measure_rounds", lambda rounds, samples=3: 1000.0)
+
+    chosen, _ = hashing.calibrate(target_ms=100, min_rounds=10, max_rounds=16)
+
+    assert chosen == 10
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_hash(client):
+    async with TestingSessionLocal() as session:
+        user = await session.scalar(select(User).filter_by(username=test_user["username"]))
+        user.hashed_password = cheap_context.hash(test_user["password"])
+        await session.commit()
+
+    response = client.post(
+        "api/auth/login",
+        data={"username": test_user["username"], "password": test_user["password"]},
+    )
+    assert response.status_code == 200, response.text
+
+    async with TestingSessionLocal() as session:
+        hashed = await session.scalar(
+            select(User.hashed_password).filter_by(username=test_user["username"])
+        )
+    assert hashed.startswith(f"$2b${config.BCRYPT_ROUNDS}$")
@@ -0,0 +1,98 @@
+import asyncio
+import socket
+from pathlib import Path
+
+import pytest
+from aiosmtpd.controller import Controller
+from aiosmtpd.handlers import Sink
+from fastapi_mail import ConnectionConfig
+from fastapi_mail.errors import ConnectionErrors
+
+from src.services.mail_transport import SMTPTransport
+
+TEMPLATE_FOLDER = Path(__file__).parent.parent / "src" / "mail-templates"
+
+
+class CountingHandler(Sink):
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        self.sessions.add(id(session))
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _settings(port: int) -> ConnectionConfig:
+    return ConnectionConfig(
+        MAIL_USERNAME="sender@example.com",
+        MAIL_PASSWORD="secret",
+        MAIL_FROM="sender@example.com",
+        MAIL_PORT=port,
+        MAIL_SERVER="127.0.0.1",
+        MAIL_STARTTLS=False,
+        MAIL_SSL_TLS=False,
+        USE_CREDENTIALS=False,
+        VALIDATE_CERTS=False,
+        TEMPLATE_FOLDER=TEMPLATE_FOLDER,
+    )
+
+
+@pytest.fixture
+def smtp_server():
+    handler = CountingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+def test_render_uses_cached_templates():
+    transport = SMTPTransport(_settings(25))
+
+    html = transport.render(
+        "email-confirmation.html", {"host": "http://h/", "username": "bob", "token": "t"}
+    )
+
+    assert "Dear bob" in html
+    assert "http://h/api/auth/confirmed_email/t" in html
+    assert transport.templates.get_template("email-confirmation.html") is (
+        transport.templates.get_template("email-confirmation.html")
+    )
+
+
+@pytest.mark.asyncio
+async def test_burst_reuses_pooled_connections(smtp_server):
+    controller, handler = smtp_server
+    transport = SMTPTransport(_settings(controller.port), pool_size=2, batch_size=5)
+
+    messages = [
+        transport.build_message("Hi", [f"user{i}@example.com"], "<p>hi</p>")
+        for i in range(20)
+    ]
+    await asyncio.gather(*(transport.send(message) for message in messages))
+    await transport.close()
+
+    assert len(handler.messages) == 20
+    stats = transport.stats()
+    assert stats["sent"] == 20
+    assert stats["connections_opened"] <= 2
+    assert len(handler.sessions) <= 2
+
+
+@pytest.mark.asyncio
+async def test_unreachable_server_fails_the_send():
+    transport = SMTPTransport(_settings(_free_port()), pool_size=1)
+
+    with pytest.raises(ConnectionErrors):
+        await transport.send(transport.build_message("Hi", ["a@example.com"], "<p>hi</p>"))
+    await transport.close()
+
+    assert transport.stats()["failed"] == 1
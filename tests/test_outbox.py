@@ -0,0 +1,199 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from src.db.models import OutboxEmail
+from src.services.auth import Hash, get_password_from_token
+from src.services.outbox import SENDERS, OutboxService, OutboxWorker
+from tests.conftest import TestingSessionLocal
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def empty_outbox():
+    async with TestingSessionLocal() as session:
+        await session.execute(delete(OutboxEmail))
+        await session.commit()
+
+
+@pytest.fixture
+def delivered(monkeypatch):
+    recipients = []
+
+    async def fake_send(email):
+        recipients.append(email.recipient)
+
+    monkeypatch.setitem(SENDERS, "email_confirmation", fake_send)
+    return recipients
+
+
+async def _queue(count: int) -> None:
+    async with TestingSessionLocal() as session:
+        service = OutboxService(session)
+        for i in range(count):
+            await service.email_confirmation(f"user{i}@example.com", f"user{i}", "http://test/")
+        await service.commit()
+
+
+async def _emails() -> dict:
+    async with TestingSessionLocal() as session:
+        result = await session.execute(select(OutboxEmail))
+        return {email.recipient: email for email in result.scalars().all()}
+
+
+async def _set(**values) -> None:
+    async with TestingSessionLocal() as session:
+        await session.execute(update(OutboxEmail).values(**values))
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_worker_delivers_in_batches(delivered):
+    await _queue(3)
+    worker = OutboxWorker(TestingSessionLocal, batch_size=2)
+
+    assert await worker.run_once() == 2
+    assert await worker.run_once() == 1
+    assert await worker.run_once() == 0
+
+    assert sorted(delivered) == [f"user{i}@example.com" for i in range(3)]
+    assert {email.status for email in (await _emails()).values()} == {"sent"}
+    assert worker.stats()["sent"] == 3
+
+
+@pytest.mark.asyncio
+async def test_worker_retries_with_backoff_then_gives_up(monkeypatch):
+    async def failing_send(email):
+        raise ConnectionError("smtp down")
+
+    monkeypatch.setitem(SENDERS, "email_confirmation", failing_send)
+    await _queue(1)
+    worker = OutboxWorker(TestingSessionLocal, max_attempts=2, backoff_seconds=60)
+
+    assert await worker.run_once() == 1
+    email = (await _emails())["user0@example.com"]
+    assert (email.status, email.attempts, email.last_error) == ("pending", 1, "smtp down")
+    assert email.available_at > datetime.utcnow() + timedelta(seconds=50)
+    assert await worker.run_once() == 0
+
+    await _set(available_at=datetime.utcnow())
+    assert await worker.run_once() == 1
+    assert (await _emails())["user0@example.com"].status == "failed"
+    assert worker.stats()["retried"] == 1
+    assert worker.stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_claim_is_claimed_again(delivered):
+    await _queue(1)
+    await _set(status="sending", claimed_at=datetime.utcnow() - timedelta(hours=1))
+    worker = OutboxWorker(TestingSessionLocal, lease_seconds=60)
+
+    assert await worker.run_once() == 1
+    assert delivered == ["user0@example.com"]
+    assert (await _emails())["user0@example.com"].status == "sent"
+
+
+@pytest.mark.asyncio
+async def test_repeated_confirmation_requests_are_coalesced():
+    async with TestingSessionLocal() as session:
+        service = OutboxService(session)
+        assert await service.email_confirmation("bob@example.com", "bob", "http://a/")
+        await service.commit()
+        assert not await service.email_confirmation("Bob@example.com", "bob", "http://b/")
+        await service.commit()
+
+    emails = await _emails()
+    assert len(emails) == 1
+    email = emails["bob@example.com"]
+    assert email.suppressed == 1
+    assert email.payload["host"] == "http://b/"
+
+
+@pytest.mark.asyncio
+async def test_reset_requests_merge_only_while_pending(monkeypatch):
+    tokens = []
+
+    async def fake_send_reset(to_email, username, host, reset_token):
+        tokens.append(reset_token)
+
+    monkeypatch.setattr("src.services.outbox.send_reset_password_email", fake_send_reset)
+    async with TestingSessionLocal() as session:
+        service = OutboxService(session)
+        assert await service.reset_password_email("bob@example.com", "bob", "http://a/", "first")
+        await service.commit()
+        assert not await service.reset_password_email("bob@example.com", "bob", "http://a/", "second")
+        await service.commit()
+
+    worker = OutboxWorker(TestingSessionLocal)
+    assert await worker.run_once() == 1
+    assert worker.stats()["suppressed"] == 1
+    assert Hash().verify_password("second", await get_password_from_token(tokens[0]))
+
+    # The first email went out: the password submitted now needs an email of its own.
+    async with TestingSessionLocal() as session:
+        service = OutboxService(session)
+        assert await service.reset_password_email("bob@example.com", "bob", "http://a/", "third")
+        await service.commit()
+    assert await worker.run_once() == 1
+    assert Hash().verify_password("third", await get_password_from_token(tokens[1]))
+
+
+@pytest.mark.asyncio
+async def test_repeated_requests_keep_one_pending_email():
+    async def request(host: str) -> bool:
+        async with TestingSessionLocal() as session:
+            service = OutboxService(session)
+            queued = await service.email_confirmation("eve@example.com", "eve", host)
+            await service.commit()
+            return queued
+
+    results = [await request(f"http://{i}/") for i in range(3)]
+
+    assert results == [True, False, False]
+    async with TestingSessionLocal() as session:
+        emails = (await session.execute(select(OutboxEmail))).scalars().all()
+    assert [(e.status, e.suppressed, e.payload["host"]) for e in emails] == [("pending", 2, "http://2/")]
+
+    # The database itself refuses a second pending email, whatever the interleaving.
+    async with TestingSessionLocal() as session:
+        session.add(OutboxEmail(
+            kind="email_confirmation", recipient="eve@example.com", payload={},
+            dedupe_key=emails[0].dedupe_key, status="pending",
+        ))
+        with pytest.raises(IntegrityError):
+            await session.commit()
+
+@pytest.mark.asyncio
+async def test_request_queued_during_a_failing_send_absorbs_the_retry(monkeypatch, delivered):
+    async def request_again_then_fail(to_email, username, host, reset_token):
+        # A second reset request arrives while the first email is being sent.
+        async with TestingSessionLocal() as session:
+            service = OutboxService(session)
+            assert await service.reset_password_email("bob@example.com", "bob", "http://a/", "second")
+            await service.commit()
+        raise ConnectionError("smtp down")
+
+    monkeypatch.setattr("src.services.outbox.send_reset_password_email", request_again_then_fail)
+    async with TestingSessionLocal() as session:
+        service = OutboxService(session)
+        await service.reset_password_email("bob@example.com", "bob", "http://a/", "first")
+        await service.email_confirmation("alice@example.com", "alice", "http://a/")
+        await service.commit()
+
+    worker = OutboxWorker(TestingSessionLocal)
+    assert await worker.run_once() == 2
+
+    async with TestingSessionLocal() as session:
+        emails = (await session.execute(select(OutboxEmail).order_by(OutboxEmail.id))).scalars().all()
+    assert [(e.recipient, e.status, e.suppressed) for e in emails] == [
+        ("bob@example.com", "failed", 0),
+        ("alice@example.com", "sent", 0),
+        ("bob@example.com", "pending", 1),
+    ]
+    assert "Superseded" in emails[0].last_error
+    assert Hash().verify_password("second", emails[2].payload["hashed_password"])
+    assert delivered == ["alice@example.com"]
+    assert worker.stats()["sent"] == 1
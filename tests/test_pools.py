@@ -0,0 +1,82 @@
+import asyncio
+import threading
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.services.auth import Hash
+from src.services.pools import BoundedPool, PoolSaturatedError
+
+
+@pytest.mark.asyncio
+async def test_run_returns_result():
+    pool = BoundedPool("test", kind="thread", size=2, max_queue=2)
+
+    assert await pool.run(sum, [1, 2, 3]) == 6
+    assert pool.stats()["completed"] == 1
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_saturated():
+    pool = BoundedPool("test", kind="thread", size=1, max_queue=1)
+    release = threading.Event()
+
+    running = [asyncio.create_task(pool.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(PoolSaturatedError):
+        await pool.run(release.wait)
+
+    release.set()
+    await asyncio.gather(*running)
+    assert pool.stats()["rejected"] == 1
+    assert pool.stats()["in_flight"] == 0
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_call_keeps_its_slot_until_it_returns():
+    pool = BoundedPool("test", kind="thread", size=1, max_queue=0)
+    release = threading.Event()
+
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.run(release.wait), 0.05)
+
+        assert pool.stats()["in_flight"] == 1
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(release.wait)
+    finally:
+        release.set()
+    await asyncio.sleep(0.05)
+    assert pool.stats()["in_flight"] == 0
+    assert await pool.run(sum, [1, 2]) == 3
+    pool.shutdown()
+
+
+def test_unsupported_kind():
+    with pytest.raises(ValueError):
+        BoundedPool("test", kind="fiber", size=1, max_queue=1)
+
+
+@pytest.mark.asyncio
+async def test_hash_async_roundtrip():
+    hashed = await Hash().get_pwd_hash_async("secret")
+
+    assert await Hash().verify_password_async("secret", hashed)
+    assert not await Hash().verify_password_async("wrong", hashed)
+
+
+def test_login_returns_503_when_hash_pool_saturated(client, monkeypatch):
+    monkeypatch.setattr(
+        "src.services.hashing.hash_pool.run",
+        AsyncMock(side_effect=PoolSaturatedError("hash")),
+    )
+
+    response = client.post(
+        "api/auth/login", data={"username": "test123", "password": "12345678"}
+    )
+
+    assert response.status_code == 503, response.text
+    assert response.headers["Retry-After"] == "1"
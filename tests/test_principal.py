@@ -0,0 +1,106 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from src.db.models import User, Role
+from src.schemas import Principal
+from src.services.auth import (
+    build_access_claims,
+    create_access_token,
+    get_admin_principal,
+    get_current_principal,
+)
+from src.services.cache import token_version_cache
+
+
+@pytest.fixture
+def admin():
+    return User(
+        id=7,
+        username="admin",
+        email="admin@example.com",
+        avatar="https://example.com/avatar.png",
+        role=Role.ADMIN,
+        token_version=3,
+    )
+
+
+@pytest.fixture
+def claims_tokens(monkeypatch):
+    monkeypatch.setattr("src.services.auth.config.JWT_CLAIMS_TOKENS", True)
+    token_version_cache.clear_local()
+    yield
+    token_version_cache.clear_local()
+
+
+@pytest.fixture
+def user_service(monkeypatch):
+    service = MagicMock()
+    monkeypatch.setattr("src.services.auth.UserService", lambda db: service)
+    return service
+
+
+def test_claims_disabled_by_default(admin):
+    assert build_access_claims(admin) == {"sub": "admin"}
+
+
+@pytest.mark.asyncio
+async def test_principal_from_claims_queries_version_once(claims_tokens, user_service, admin):
+    user_service.get_token_version = AsyncMock(return_value=3)
+    token = await create_access_token(build_access_claims(admin))
+
+    first = await get_current_principal(token, db=None)
+    second = await get_current_principal(token, db=None)
+
+    assert first == second == Principal(
+        id=7, username="admin", email="admin@example.com", role=Role.ADMIN
+    )
+    user_service.get_token_version.assert_awaited_once_with(7)
+
+
+@pytest.mark.asyncio
+async def test_superseded_token_version_is_rejected(claims_tokens, user_service, admin):
+    user_service.get_token_version = AsyncMock(return_value=4)
+    token = await create_access_token(build_access_claims(admin))
+
+    with pytest.raises(HTTPException) as exc:
+        await get_current_principal(token, db=None)
+
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_token_without_claims_falls_back_to_user_lookup(monkeypatch, admin):
+    mock_get_current_user = AsyncMock(return_value=admin)
+    monkeypatch.setattr("src.services.auth.get_current_user", mock_get_current_user)
+    token = await create_access_token({"sub": "admin"})
+
+    principal = await get_current_principal(token, db=None)
+
+    assert principal.id == 7
+    mock_get_current_user.assert_awaited_once()
+
+
+def test_admin_principal_rejects_regular_users():
+    principal = Principal(id=1, username="user", email="user@example.com", role=Role.USER)
+
+    with pytest.raises(HTTPException) as exc:
+        get_admin_principal(principal)
+
+    assert exc.value.status_code == 403
+
+
+def test_metrics_are_for_admins_only(client, get_token, admin):
+    assert client.get("/api/metrics").status_code == 401
+    headers = {"Authorization": f"Bearer {get_token}"}
+    assert client.get("/api/metrics", headers=headers).status_code == 403
+
+    client.app.dependency_overrides[get_admin_principal] = lambda: admin
+    try:
+        response = client.get("/api/metrics")
+    finally:
+        del client.app.dependency_overrides[get_admin_principal]
+
+    assert response.status_code == 200
+    assert {"principal_cache", "token_version_cache"} <= response.json().keys()
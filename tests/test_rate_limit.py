@@ -0,0 +1,87 @@
+import pytest
+from fakeredis import aioredis as fakeredis
+
+from src.services.rate_limit import (
+    MemoryGCRAStore,
+    Rate,
+    RateLimiter,
+    RateLimitExceeded,
+    RedisGCRAStore,
+)
+
+
+def test_parse_rate():
+    assert Rate.parse("10 per minute") == Rate(10, 60)
+    assert Rate.parse("100/hour") == Rate(100, 3600)
+    with pytest.raises(ValueError):
+        Rate.parse("often")
+
+
+@pytest.mark.asyncio
+async def test_redis_gcra_grants_up_to_limit():
+    store = RedisGCRAStore(fakeredis.FakeRedis())
+    rate = Rate(10, 60)
+
+    assert await store.acquire("k", rate, 4, now=1000.0) == (4, 0.0)
+    assert await store.acquire("k", rate, 10, now=1000.0) == (6, 0.0)
+
+    granted, retry_after = await store.acquire("k", rate, 1, now=1000.0)
+    assert granted == 0
+    assert retry_after == pytest.approx(6.0)
+
+    assert (await store.acquire("k", rate, 1, now=1006.0))[0] == 1
+
+
+@pytest.mark.asyncio
+async def test_memory_store_matches_redis_script():
+    redis_store = RedisGCRAStore(fakeredis.FakeRedis())
+    memory_store = MemoryGCRAStore()
+    rate = Rate(5, 10)
+
+    for now, quantity in [(0.0, 2), (0.5, 5), (1.0, 1), (3.0, 3), (30.0, 10)]:
+        assert await memory_store.acquire("k", rate, quantity, now) == pytest.approx(
+            await redis_store.acquire("k", rate, quantity, now)
+        )
+
+
+@pytest.mark.asyncio
+async def test_leases_spare_store_round_trips():
+    limiter = RateLimiter(store=MemoryGCRAStore(), lease_fraction=0.25)
+    rate = Rate(8, 60)
+
+    for _ in range(8):
+        await limiter.hit("contacts", "user:alice", rate)
+    with pytest.raises(RateLimitExceeded):
+        await limiter.hit("contacts", "user:alice", rate)
+
+    stats = limiter.stats()
+    assert stats["store_round_trips"] == 4
+    assert stats["local_rejections"] == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_store_limits_across_processes():
+    redis = fakeredis.FakeRedis()
+    workers = [RateLimiter(store=RedisGCRAStore(redis), lease_fraction=0) for _ in range(3)]
+    rate = Rate(6, 60)
+
+    allowed = 0
+    for _ in range(4):
+        for worker in workers:
+            try:
+                await worker.hit("users", "user:alice", rate)
+                allowed += 1
+            except RateLimitExceeded:
+                pass
+
+    assert allowed == 6
+
+
+def test_users_me_is_limited_per_user(client, monkeypatch):
+    monkeypatch.setattr("src.services.rate_limit.config.RATE_LIMIT_ENABLED", True)
+
+    responses = [client.get("/api/users/me") for _ in range(11)]
+
+    assert [r.status_code for r in responses[:10]] == [401] * 10
+    assert responses[10].status_code == 429
+    assert int(responses[10].headers["Retry-After"]) >= 1
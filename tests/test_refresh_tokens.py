@@ -0,0 +1,55 @@
+import pytest
+
+from tests.conftest import test_user
+
+
+@pytest.fixture(scope="module")
+def login_tokens(client):
+    response = client.post(
+        "api/auth/login",
+        data={"username": test_user["username"], "password": test_user["password"]},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_login_returns_refresh_token(login_tokens):
+    assert login_tokens["refresh_token"]
+    assert login_tokens["access_token"]
+
+
+def test_refresh_rotates_token(client, login_tokens):
+    response = client.post(
+        "api/auth/refresh", json={"refresh_token": login_tokens["refresh_token"]}
+    )
+
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["refresh_token"] != login_tokens["refresh_token"]
+    assert data["token_type"] == "bearer"
+    login_tokens["rotated"] = data["refresh_token"]
+
+    me = client.get(
+        "api/users/me", headers={"Authorization": f"Bearer {data['access_token']}"}
+    )
+    assert me.status_code == 200, me.text
+    assert me.json()["username"] == test_user["username"]
+
+
+def test_reused_token_revokes_family(client, login_tokens):
+    reused = client.post(
+        "api/auth/refresh", json={"refresh_token": login_tokens["refresh_token"]}
+    )
+    assert reused.status_code == 401, reused.text
+
+    rotated = client.post(
+        "api/auth/refresh", json={"refresh_token": login_tokens["rotated"]}
+    )
+    assert rotated.status_code == 401, rotated.text
+
+
+def test_unknown_refresh_token(client):
+    response = client.post("api/auth/refresh", json={"refresh_token": "unknown"})
+
+    assert response.status_code == 401, response.text
+    assert response.json()["detail"] == "Invalid refresh token"
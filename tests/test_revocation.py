@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.repositories.revoked_tokens import RevokedTokenRepository
+from src.services.revocation import BloomFilter, RevocationList
+from tests.conftest import TestingSessionLocal, test_user
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+@pytest.fixture(scope="module")
+def login_tokens(client):
+    response = client.post(
+        "api/auth/login",
+        data={"username": test_user["username"], "password": test_user["password"]},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_logout_revokes_access_and_refresh_tokens(client, login_tokens):
+    headers = {"Authorization": f"Bearer {login_tokens['access_token']}"}
+    assert client.get("api/users/me", headers=headers).status_code == 200
+
+    response = client.post(
+        "api/auth/logout",
+        headers=headers,
+        json={"refresh_token": login_tokens["refresh_token"]},
+    )
+    assert response.status_code == 200, response.text
+
+    assert client.get("api/users/me", headers=headers).status_code == 401
+    refreshed = client.post(
+        "api/auth/refresh", json={"refresh_token": login_tokens["refresh_token"]}
+    )
+    assert refreshed.status_code == 401
+
+
+def test_logout_twice_is_rejected(client, login_tokens):
+    headers = {"Authorization": f"Bearer {login_tokens['access_token']}"}
+
+    response = client.post("api/auth/logout", headers=headers)
+
+    assert response.status_code == 401, response.text
+
+
+@pytest.mark.asyncio
+async def test_rebuild_sees_other_workers_and_drops_expired():
+    writer = RevocationList(capacity=100, error_rate=0.01)
+    reader = RevocationList(capacity=100, error_rate=0.01)
+    now = datetime.utcnow()
+
+    async with TestingSessionLocal() as session:
+        await writer.revoke("active-jti", now + timedelta(minutes=5), session)
+        await writer.revoke("expired-jti", now - timedelta(minutes=5), session)
+        assert not await reader.is_revoked("active-jti", session)
+
+        await reader.rebuild(session)
+
+        assert await reader.is_revoked("active-jti", session)
+        assert not await reader.is_revoked("expired-jti", session)
+        assert not await reader.is_revoked("unknown-jti", session)
+
+
+@pytest.mark.asyncio
+async def test_rebuild_keeps_tokens_revoked_while_it_runs(monkeypatch):
+    revocations = RevocationList(capacity=100, error_rate=0.01)
+    expires_at = datetime.utcnow() + timedelta(minutes=5)
+    get_active_jtis = RevokedTokenRepository.get_active_jtis
+
+    async with TestingSessionLocal() as session:
+        async def snapshot_then_revoke(self, now):
+            jtis = await get_active_jtis(self, now)
+            await revocations.revoke("revoked-during-rebuild", expires_at, session)
+            return jtis
+
+        monkeypatch.setattr(RevokedTokenRepository, "get_active_jtis", snapshot_then_revoke)
+        await revocations.rebuild(session)
+
+        assert await revocations.is_revoked("revoked-during-rebuild", session)
@@ -0,0 +1,172 @@
+import asyncio
+import io
+
+import cloudinary.uploader
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+from benchmarks.cloudinary_stub import CloudinaryStub
+from src.services.cache import TwoTierCache
+from src.services.images import InvalidImageError, preprocess_avatar
+from src.services.pools import BoundedPool
+from src.services.storage import CloudinaryStorage, LocalStorage
+from src.services.upload_file import UploadFileService
+from src.services.upload_stream import SpooledUpload
+from tests.test_cache import DictBackend
+
+
+@pytest.fixture
+def cloudinary_stub():
+    stub = CloudinaryStub(delay=0.2).start()
+    yield stub
+    stub.stop()
+
+
+def _cache() -> TwoTierCache:
+    return TwoTierCache("avatar_url", ttl=60, local_ttl=60, max_size=10, backend=DictBackend())
+
+
+def _service(stub: CloudinaryStub, size: int = 2, timeout: float = 5) -> UploadFileService:
+    storage = CloudinaryStorage(
+        "demo",
+        "123",
+        "secret",
+        upload_prefix=stub.url,
+        pool=BoundedPool("upload-test", "thread", size, 8),
+        timeout=timeout,
+    )
+    return UploadFileService(storage, cache=_cache())
+
+
+def _image(color: str = "red", size: tuple = (1200, 800), fmt: str = "JPEG", **params) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", size, color).save(output, format=fmt, **params)
+    return output.getvalue()
+
+
+async def _upload(data: bytes, spool_bytes: int = 1 << 20) -> SpooledUpload:
+    upload = SpooledUpload(spool_bytes)
+    await upload.write(data)
+    await upload.finish()
+    return upload
+
+
+def test_preprocess_resizes_and_hashes():
+    data, digest = preprocess_avatar(_image(), 250, 250, 85)
+
+    image = Image.open(io.BytesIO(data))
+    assert (image.format, image.size) == ("JPEG", (250, 250))
+    assert preprocess_avatar(_image(), 250, 250, 85)[1] == digest
+    assert preprocess_avatar(_image("blue"), 250, 250, 85)[1] != digest
+
+
+def test_preprocess_rejects_non_images():
+    with pytest.raises(InvalidImageError):
+        preprocess_avatar(b"not an image", 250, 250, 85)
+
+
+@pytest.mark.asyncio
+async def test_uploads_do_not_block_the_event_loop(cloudinary_stub):
+    service = _service(cloudinary_stub, size=2)
+    colors = ["red", "green", "blue", "white"]
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    uploads = [await _upload(_image(color)) for color in colors]
+    urls = await asyncio.gather(*(service.upload_spooled_async(upload) for upload in uploads))
+    task.cancel()
+
+    assert len(set(urls)) == 4
+    assert "RestApp/avatars/" in urls[0]
+    assert cloudinary_stub.uploads == 4
+    assert cloudinary_stub.max_concurrency == 2
+    assert ticks >= 10
+    assert cloudinary.uploader._http.connection_pool_kw["maxsize"] == 2
+
+
+@pytest.mark.asyncio
+async def test_identical_avatar_skips_upload(cloudinary_stub):
+    service = _service(cloudinary_stub)
+
+    first = await service.upload_spooled_async(await _upload(_image(fmt="PNG")))
+    same_file = await service.upload_spooled_async(await _upload(_image(fmt="PNG")))
+    # Rolled over to disk: the image worker reads it from the file.
+    on_disk = await _upload(_image(fmt="PNG", compress_level=1), spool_bytes=1024)
+    assert on_disk.path is not None
+    same_pixels = await service.upload_spooled_async(on_disk)
+    on_disk.close()
+
+    assert first == same_file == same_pixels
+    assert cloudinary_stub.uploads == 1
+    assert service.deduplicated == 2
+
+
+@pytest.mark.asyncio
+async def test_invalid_image_is_rejected(cloudinary_stub):
+    service = _service(cloudinary_stub)
+
+    with pytest.raises(HTTPException) as exc:
+        await service.upload_spooled_async(await _upload(b"not an image"))
+
+    assert exc.value.status_code == 400
+    assert cloudinary_stub.uploads == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_upload_times_out(cloudinary_stub):
+    service = _service(cloudinary_stub, timeout=0.05)
+
+    with pytest.raises(HTTPException) as exc:
+        await service.upload_spooled_async(await _upload(_image()))
+
+    assert exc.value.status_code == 504
+
+
+@pytest.mark.asyncio
+async def test_local_storage_writes_content_addressed_files(tmp_path):
+    storage = LocalStorage(str(tmp_path), "/api/avatars/")
+    service = UploadFileService(storage, cache=_cache())
+
+    url = await service.upload_spooled_async(await _upload(_image()))
+
+    digest = url.removeprefix("/api/avatars/").removesuffix(".jpg")
+    path = storage.path_for(digest)
+    assert path == tmp_path / digest[:2] / f"{digest}.jpg"
+    assert Image.open(path).size == (250, 250)
+    assert list(path.parent.iterdir()) == [path]
+    assert storage.path_for("../../etc/passwd") is None
+
+
+def test_local_avatar_is_served_with_etag(client, tmp_path, monkeypatch):
+    storage = LocalStorage(str(tmp_path), "/api/avatars")
+    monkeypatch.setattr("src.api.avatars.avatar_storage", storage)
+    data, digest = preprocess_avatar(_image(), 250, 250, 85)
+    url = asyncio.run(storage.save(data, digest))
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content == data
+    assert response.headers["content-type"] == "image/jpeg"
+    assert response.headers["etag"] == f'"{digest}"'
+    assert "immutable" in response.headers["cache-control"]
+
+    response = client.get(url, headers={"If-None-Match": f'"{digest}"'})
+    assert response.status_code == 304
+    assert response.content == b""
+    for header in (f'"other", W/"{digest}"', "*"):
+        assert client.get(url, headers={"If-None-Match": header}).status_code == 304
+    for header in (f'"{digest[:8]}"', f'"x{digest}"', f'"{digest}x"'):
+        assert client.get(url, headers={"If-None-Match": header}).status_code == 200
+
+    missing = f"/api/avatars/{'0' * 64}.jpg"
+    assert client.get(missing).status_code == 404
+    assert client.get(missing, headers={"If-None-Match": f'"{"0" * 64}"'}).status_code == 404
+    assert client.get(missing, headers={"If-None-Match": "*"}).status_code == 404
+    assert client.get("/api/avatars/avatar.png").status_code == 404
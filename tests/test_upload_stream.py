@@ -0,0 +1,147 @@
+import hashlib
+import os
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from src.services.upload_stream import read_upload
+
+MAX_BYTES = 64 * 1024
+SPOOL_BYTES = 8 * 1024
+BOUNDARY = "testboundary"
+
+app = FastAPI()
+spooled = {}
+
+
+@app.post("/upload")
+async def upload(request: Request):
+    upload = await read_upload(
+        request,
+        "file",
+        max_bytes=MAX_BYTES,
+        content_types=["image/png"],
+        spool_bytes=SPOOL_BYTES,
+    )
+    try:
+        source = upload.source
+        spooled["path"] = upload.path
+        if isinstance(source, str):
+            with open(source, "rb") as file:
+                source = file.read()
+        return {
+            "size": upload.size,
+            "sha256": upload.sha256,
+            "on_disk": upload.path is not None,
+            "filename": upload.filename,
+            "matches": hashlib.sha256(source).hexdigest() == upload.sha256,
+        }
+    finally:
+        upload.close()
+
+
+@pytest.fixture
+def upload_client():
+    return TestClient(app)
+
+
+def _body(data: bytes, content_type: str = "image/png", field: str = "file") -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="note"\r\n\r\n'
+        f"hello\r\n"
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="avatar.png"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def _headers() -> dict:
+    return {"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}
+
+
+def _request(body: bytes, sent: list, content_length: bool, size: int = 4096) -> Request:
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    chunks = [body[start:start + size] for start in range(0, len(body), size)]
+
+    async def receive():
+        chunk = chunks[len(sent)]
+        sent.append(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": len(sent) < len(chunks)}
+
+    return Request({"type": "http", "method": "POST", "headers": headers}, receive)
+
+
+async def _read(request: Request):
+    return await read_upload(
+        request, "file", max_bytes=MAX_BYTES, content_types=["image/png"], spool_bytes=SPOOL_BYTES
+    )
+
+
+def test_small_upload_stays_in_memory(upload_client):
+    data = os.urandom(1000)
+
+    response = upload_client.post("/upload", content=_body(data), headers=_headers())
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "size": 1000,
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "on_disk": False,
+        "filename": "avatar.png",
+        "matches": True,
+    }
+
+
+def test_large_upload_is_spooled_to_disk_and_removed(upload_client):
+    data = os.urandom(40 * 1024)
+
+    response = upload_client.post("/upload", content=_body(data), headers=_headers())
+
+    assert response.status_code == 200
+    assert response.json()["on_disk"] is True
+    assert response.json()["matches"] is True
+    assert not os.path.exists(spooled["path"])
+
+
+@pytest.mark.asyncio
+async def test_declared_oversized_body_is_rejected_before_reading():
+    sent = []
+    request = _request(_body(os.urandom(MAX_BYTES * 2)), sent, content_length=True)
+
+    with pytest.raises(HTTPException) as exc:
+        await _read(request)
+
+    assert exc.value.status_code == 413
+    assert sent == []
+
+
+@pytest.mark.asyncio
+async def test_streamed_oversized_body_is_cut_off():
+    sent = []
+    request = _request(_body(os.urandom(MAX_BYTES * 4)), sent, content_length=False)
+
+    with pytest.raises(HTTPException) as exc:
+        await _read(request)
+
+    assert exc.value.status_code == 413
+    assert sum(map(len, sent)) <= MAX_BYTES + 2 * 4096
+
+
+def test_unaccepted_type_is_rejected(upload_client):
+    response = upload_client.post(
+        "/upload", content=_body(b"GIF89a", "text/html"), headers=_headers()
+    )
+
+    assert response.status_code == 415
+
+
+def test_non_multipart_and_missing_field_are_rejected(upload_client):
+    assert upload_client.post("/upload", json={"file": "x"}).status_code == 415
+    response = upload_client.post(
+        "/upload", content=_body(b"data", field="avatar"), headers=_headers()
+    )
+    assert response.status_code == 422
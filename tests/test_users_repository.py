@@ -1,5 +1,6 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.models import User
@@ -91,7 +92,8 @@ async def test_get_user_by_email(user_repository, mock_session, user):
 async def test_create_user(user_repository, mock_session, user, user_body):
     # Setup mock
     mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = user
+    mock_result.scalar_one.return_value = user
+    mock_session.execute = AsyncMock(return_value=mock_result)
 
     # Run test
     result = await user_repository.create_user(
@@ -104,9 +106,40 @@ async def test_create_user(user_repository, mock_session, user, user_body):
     assert result.username == user.username
     assert result.avatar == user.avatar
 
-    mock_session.add.assert_called_once()
+    mock_session.execute.assert_awaited_once()
     mock_session.commit.assert_awaited_once()
-    mock_session.refresh.assert_awaited_once_with(result)
+    mock_session.refresh.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_create_user_conflict_rolls_back(user_repository, mock_session, user_body):
+    # Setup mock
+    mock_session.execute = AsyncMock(
+        side_effect=IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed"))
+    )
+
+    # Run test
+    with pytest.raises(IntegrityError):
+        await user_repository.create_user(user_body)
+
+    # Assert
+    mock_session.rollback.assert_awaited_once()
+    mock_session.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_find_conflict_prefers_email(user_repository, mock_session):
+    # Setup mock
+    mock_result = MagicMock()
+    mock_result.all.return_value = [(False, True), (True, False)]
+    mock_session.execute = AsyncMock(return_value=mock_result)
+
+    # Run test
+    result = await user_repository.find_conflict("test@example.com", "testuser")
+
+    # Assert
+    assert result == "email"
+    mock_session.execute.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -140,3 +173,20 @@ async def test_update_avatar_url(user_repository, mock_session, user):
     assert result.avatar == new_avatar_url
     mock_session.commit.assert_awaited_once()
     mock_session.refresh.assert_awaited_once_with(result)
+
+
+@pytest.mark.asyncio
+async def test_reset_password_bumps_token_version(user_repository, mock_session, user):
+    # Setup mock
+    mock_session.execute = AsyncMock(
+        return_value=MagicMock(scalar_one_or_none=MagicMock(return_value=user))
+    )
+    user.token_version = 0
+
+    # Run test
+    result = await user_repository.reset_password(user.id, "new_hash")
+
+    # Assert
+    assert result.hashed_password == "new_hash"
+    assert result.token_version == 1
+    mock_session.commit.assert_awaited_once()